@@ -6,11 +6,15 @@ from datetime import datetime, timedelta
 import json
 import io
 import csv
+import gzip
+import math
 from collections import deque
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from backend.services.zone_catalog import get_zone_catalog
+
 # Import Milestone-4 components
 try:
     from backend.db import init_database, get_db
@@ -19,8 +23,11 @@ try:
     from backend.routes.history import history_bp
     from backend.routes.export import export_bp
     from backend.routes.admin import admin_bp
-    from backend.services.recorder import start_recorder
-    from backend.services.alerts import get_alert_manager
+    from backend.services.recorder import start_recorder, record_observation, record_historical
+    from backend.services.alert_worker import start_alert_worker, submit_alert_check
+    from backend.services.broadcaster import get_broadcaster
+    from backend.services.rollups import backfill_rollups
+    from backend.services.retention import seed_counters, start_retention
     MILESTONE4_ENABLED = True
     print("✅ Milestone-4 modules loaded successfully")
 except ImportError as e:
@@ -102,34 +109,15 @@ ALERTS_CONFIG = {
     "foodcourt": {"limit": None, "active": False}
 }
 
-def load_zone_info(zone_file):
-    """Load zone information from zone file"""
-    zone_path = os.path.join(os.path.dirname(__file__), '..', zone_file)
-    try:
-        if os.path.exists(zone_path):
-            with open(zone_path, 'r') as f:
-                content = f.read().strip()
-                if content:
-                    zones = json.loads(content)
-                    if isinstance(zones, list):
-                        return zones
-                    elif isinstance(zones, dict):
-                        return zones.get('zones', [])
-        return []
-    except Exception as e:
-        print(f"Error loading {zone_file}: {e}")
-        return []
+# Parsed zone files, re-read only when a file changes or an admin edits zones
+zone_catalog = get_zone_catalog()
+for _area_id, _config in AREAS_CONFIG.items():
+    zone_catalog.register(_area_id, os.path.join(os.path.dirname(__file__), '..', _config['zone_file']))
 
 def update_areas_config():
-    """Update areas configuration with current zone info"""
+    """Update areas configuration with current zone info (from the zone catalog)"""
     for area_id, config in AREAS_CONFIG.items():
-        zones = load_zone_info(config['zone_file'])
-        config['total_zones'] = len(zones)
-        config['zones_info'] = [{
-            'id': zone.get('id', i+1),
-            'points_count': len(zone.get('points', [])),
-            'color': zone.get('color', [0, 255, 0])
-        } for i, zone in enumerate(zones)]
+        config.update(zone_catalog.get(area_id))
 
 AVAILABLE_AREAS = ["entrance", "retail", "foodcourt"]
 
@@ -191,7 +179,7 @@ def health_check():
 @app.route("/areas", methods=["GET"])
 def list_areas():
     """List all available areas with detailed configuration."""
-    update_areas_config()  # Refresh zone info
+    update_areas_config()  # Refresh zone info (cached)
     
     areas_info = {}
     for area_id in AVAILABLE_AREAS:
@@ -213,7 +201,7 @@ def live_metrics(area):
     if area not in AVAILABLE_AREAS:
         return jsonify({"error": "Invalid area"}), 404
     
-    # Update zone configuration
+    # Update zone configuration (cached)
     update_areas_config()
     
     # Combine configuration and current state
@@ -259,6 +247,99 @@ def update_area(area):
         return jsonify({"error": str(e)}), 500
 
 
+def parse_ingest_sample(sample):
+    """
+    Validate one /ingest sample.
+
+    Returns:
+        (area, observed_at datetime, live_people, zone_counts)
+
+    Raises:
+        ValueError describing why the sample is malformed
+    """
+    if not isinstance(sample, list) or len(sample) != 4:
+        raise ValueError("sample must be [area, unix_ts, live_people, zone_counts]")
+
+    area, ts, live_people, zone_counts = sample
+    if area not in AVAILABLE_AREAS:
+        raise ValueError(f"unknown area {area!r}")
+    if isinstance(ts, bool) or not isinstance(ts, (int, float)) or not math.isfinite(ts):
+        raise ValueError("unix_ts must be a number")
+    if isinstance(live_people, bool) or not isinstance(live_people, int) or live_people < 0:
+        raise ValueError("live_people must be a non-negative integer")
+    if zone_counts is None:
+        zone_counts = {}
+    if not isinstance(zone_counts, dict) or not all(
+            isinstance(c, int) and not isinstance(c, bool) and c >= 0
+            for c in zone_counts.values()):
+        raise ValueError("zone_counts must map zone ids to non-negative integers")
+
+    try:
+        observed_at = datetime.fromtimestamp(ts)
+    except (OverflowError, OSError, ValueError):
+        raise ValueError("unix_ts is out of range")
+    return area, observed_at, live_people, zone_counts
+
+
+@app.route("/ingest", methods=["POST"])
+def ingest():
+    """
+    Batched ingest from the detection system.
+
+    Body (optionally gzip-compressed with Content-Encoding: gzip):
+        {"samples": [[area, unix_ts, live_people, {zone_id: count}], ...],
+         "replay": false}
+
+    Samples are applied in order, so each area ends on its newest sample
+    while every sample still lands in history. Samples older than their
+    area's live state (and every sample of a "replay" batch sent from a
+    client's offline spool) are historical: they are written to
+    historical_counts at their own timestamp without touching the live
+    state, the stream or alerts. A malformed body is a 400; malformed
+    samples are skipped and reported in "errors" by index.
+    """
+    try:
+        body = request.get_data()
+        if request.headers.get('Content-Encoding', '').lower() == 'gzip':
+            body = gzip.decompress(body)
+        data = json.loads(body) if body else None
+    except (OSError, ValueError) as e:
+        return jsonify({"error": f"Invalid payload: {e}"}), 400
+
+    if not isinstance(data, dict) or not isinstance(data.get('samples'), list):
+        return jsonify({"error": "No samples provided"}), 400
+
+    replay = data.get('replay') is True
+    accepted = 0
+    errors = []
+    historical = []
+    for index, sample in enumerate(data['samples']):
+        try:
+            area, observed_at, live_people, zone_counts = parse_ingest_sample(sample)
+        except ValueError as e:
+            errors.append({"index": index, "error": str(e)})
+            continue
+        accepted += 1
+        if replay or observed_at < datetime.fromisoformat(AREAS_STATE[area]['timestamp']):
+            historical.append((area, observed_at, live_people, zone_counts))
+        else:
+            update_area_state(area, live_people, zone_counts, timestamp=observed_at.isoformat())
+
+    if historical and MILESTONE4_ENABLED:
+        record_historical(historical)
+
+    if errors:
+        print(f"⚠️ Rejected {len(errors)} ingest sample(s), first: {errors[0]}")
+
+    return jsonify({
+        "success": True,
+        "accepted": accepted,
+        "historical": len(historical),
+        "rejected": len(errors),
+        "errors": errors
+    })
+
+
 @app.route("/history/<area>", methods=["GET"])
 def get_history(area):
     """Get historical data for charts."""
@@ -407,41 +488,43 @@ def serve_video(video_name):
         return jsonify({"error": "Video not found"}), 404
 
 
-def update_area_state(area, live_people, zone_counts):
+def update_area_state(area, live_people, zone_counts, timestamp=None):
     """
     Function to update area state and store in history.
-    This is called by the video processing system via POST /update/<area>.
+    This is called by the video processing system via POST /update/<area>
+    or POST /ingest (which passes the sample's capture timestamp).
     """
     global AREAS_STATE  # Declare we're modifying the module-level variable!
-    import os
     
     if area in AVAILABLE_AREAS:
         # Convert zone_counts keys to strings for consistency
         zone_counts_str = {str(k): v for k, v in zone_counts.items()}
+        timestamp = timestamp or datetime.now().isoformat()
         
         # Update current state
         AREAS_STATE[area] = {
             "live_people": live_people,
             "zone_counts": zone_counts_str,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "status": "active"
         }
         
-        # DEBUGGING: Verify the update actually happened
-        print(f"🔍 IMMEDIATELY AFTER UPDATE - PID {os.getpid()} - AREAS_STATE[{area}]: {AREAS_STATE[area]}")
-        print(f"🔍 id(AREAS_STATE) = {id(AREAS_STATE)}")
+        # Push to live stream subscribers and the recorder's
+        # per-interval aggregates (Milestone-4)
+        if MILESTONE4_ENABLED:
+            get_broadcaster().publish(area, AREAS_STATE[area])
+            record_observation(area, live_people, zone_counts_str)
         
         # Add to history
         HISTORY_LOGS[area].append({
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "total": live_people,
             "zone_counts": zone_counts_str
         })
         
-        # Check threshold alerts (Milestone-4)
+        # Queue threshold alert evaluation (Milestone-4)
         if MILESTONE4_ENABLED:
-            alert_manager = get_alert_manager()
-            alert_manager.check_threshold(area, live_people, zone_counts_str)
+            submit_alert_check(area, live_people, zone_counts_str)
         
         # Legacy threshold check
         if ALERTS_CONFIG[area]['limit'] is not None:
@@ -467,9 +550,14 @@ if __name__ == "__main__":
         if init_database():
             print("✅ MySQL Database initialized")
             print("✅ JWT Authentication enabled")
+            backfill_rollups(get_db())
+            seed_counters(get_db())
+            print("✅ Live stream: /api/live/stream")
             print("✅ Historical recorder starting...")
             # Pass a lambda that returns the CURRENT AREAS_STATE from THIS module
             start_recorder(lambda: AREAS_STATE)
+            start_retention()
+            start_alert_worker()
             print("\n🔑 Login Page: http://127.0.0.1:5000/login.html")
             print("\n📝 Demo Accounts:")
             print("   Admin: admin@crowdcount.com / admin123")
@@ -80,6 +80,49 @@ class Database:
             if connection and connection.is_connected():
                 connection.close()
     
+    def execute_many(self, query, params_seq):
+        """Execute one statement for many parameter sets in a single round trip"""
+        return self.execute_transaction([(query, params_seq)])
+    
+    def execute_transaction(self, statements):
+        """
+        Execute several batched statements atomically on one connection.
+        
+        Args:
+            statements: list of (query, params_seq); each runs via executemany,
+                which sends INSERT ... VALUES as one multi-row statement
+        
+        Returns:
+            True if committed, False if rolled back
+        """
+        connection = None
+        cursor = None
+        try:
+            if not self.pool:
+                self.connect()
+            
+            connection = self.pool.get_connection()
+            connection.start_transaction()
+            cursor = connection.cursor()
+            for query, params_seq in statements:
+                if params_seq:
+                    cursor.executemany(query, params_seq)
+            connection.commit()
+            return True
+        except Error as e:
+            print(f"❌ Transaction error: {e}")
+            if connection:
+                try:
+                    connection.rollback()
+                except Error:
+                    pass
+            return False
+        finally:
+            if cursor:
+                cursor.close()
+            if connection and connection.is_connected():
+                connection.close()
+    
     def initialize_schema(self):
         """Create all required tables"""
         schemas = [
@@ -153,11 +196,43 @@ class Database:
                 area_id INT NOT NULL,
                 zone_id INT,
                 count INT NOT NULL DEFAULT 0,
+                avg_count FLOAT,
+                min_count INT,
+                max_count INT,
+                sample_count INT NOT NULL DEFAULT 0,
                 timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (area_id) REFERENCES areas(area_id) ON DELETE CASCADE,
                 FOREIGN KEY (zone_id) REFERENCES zones(zone_id) ON DELETE SET NULL,
                 INDEX idx_area_timestamp (area_id, timestamp),
-                INDEX idx_zone_timestamp (zone_id, timestamp)
+                INDEX idx_zone_timestamp (zone_id, timestamp),
+                INDEX idx_timestamp (timestamp)
+            )
+            """,
+            
+            # Time-bucketed rollups of historical_counts (zone_id 0 = whole area)
+            """
+            CREATE TABLE IF NOT EXISTS count_rollups (
+                tier ENUM('1m', '1h', '1d') NOT NULL,
+                area_id INT NOT NULL,
+                zone_id INT NOT NULL DEFAULT 0,
+                bucket_start DATETIME NOT NULL,
+                records INT NOT NULL DEFAULT 0,
+                sum_count DOUBLE NOT NULL DEFAULT 0,
+                min_count INT,
+                max_count INT,
+                last_count INT,
+                last_at DATETIME,
+                PRIMARY KEY (tier, area_id, zone_id, bucket_start),
+                FOREIGN KEY (area_id) REFERENCES areas(area_id) ON DELETE CASCADE,
+                INDEX idx_tier_bucket (tier, bucket_start)
+            )
+            """,
+            
+            # Maintained row counters (avoid COUNT(*) on large tables)
+            """
+            CREATE TABLE IF NOT EXISTS table_counters (
+                name VARCHAR(64) PRIMARY KEY,
+                value BIGINT NOT NULL DEFAULT 0
             )
             """,
             
@@ -172,12 +247,32 @@ class Database:
             )
             """,
             
+            # Per-area / per-zone threshold rules (zone_id NULL = area total)
+            """
+            CREATE TABLE IF NOT EXISTS threshold_rules (
+                rule_id INT AUTO_INCREMENT PRIMARY KEY,
+                area_id INT NOT NULL,
+                zone_id INT,
+                threshold INT NOT NULL,
+                clear_threshold INT,
+                sustain_seconds INT NOT NULL DEFAULT 0,
+                enabled BOOLEAN DEFAULT TRUE,
+                created_by INT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                FOREIGN KEY (area_id) REFERENCES areas(area_id) ON DELETE CASCADE,
+                FOREIGN KEY (created_by) REFERENCES users(user_id) ON DELETE SET NULL,
+                INDEX idx_area (area_id)
+            )
+            """,
+            
             # Alerts
             """
             CREATE TABLE IF NOT EXISTS alerts (
                 alert_id INT AUTO_INCREMENT PRIMARY KEY,
                 area_id INT NOT NULL,
                 zone_id INT,
+                rule_id INT,
                 observed_count INT NOT NULL,
                 threshold INT NOT NULL,
                 status ENUM('active', 'acknowledged') NOT NULL DEFAULT 'active',
@@ -212,9 +307,48 @@ class Database:
         for schema in schemas:
             self.execute_query(schema)
         
+        # Columns added after the first release (existing databases)
+        self._ensure_column('historical_counts', 'avg_count', 'FLOAT')
+        self._ensure_column('historical_counts', 'min_count', 'INT')
+        self._ensure_column('historical_counts', 'max_count', 'INT')
+        self._ensure_column('historical_counts', 'sample_count', 'INT NOT NULL DEFAULT 0')
+        self._ensure_index('historical_counts', 'idx_timestamp', '(timestamp)')
+        self._ensure_index('count_rollups', 'idx_tier_bucket', '(tier, bucket_start)')
+        self._ensure_column('count_rollups', 'last_at', 'DATETIME')
+        self._ensure_column('alerts', 'rule_id', 'INT')
+        
         print("✅ Database schema initialized")
         self._seed_default_data()
     
+    def _ensure_column(self, table, column, definition):
+        """Add a column to an existing table if it is missing"""
+        exists = self.execute_query(
+            """
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+            """,
+            (table, column),
+            fetch_one=True
+        )
+        if not exists:
+            self.execute_query(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            print(f"✅ Added column {table}.{column}")
+    
+    def _ensure_index(self, table, index, columns):
+        """Add an index to an existing table if it is missing"""
+        exists = self.execute_query(
+            """
+            SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+            LIMIT 1
+            """,
+            (table, index),
+            fetch_one=True
+        )
+        if not exists:
+            self.execute_query(f"ALTER TABLE {table} ADD INDEX {index} {columns}")
+            print(f"✅ Added index {table}.{index}")
+    
     def _seed_default_data(self):
         """Insert default admin user and areas"""
         # Check if admin exists
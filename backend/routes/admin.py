@@ -6,13 +6,22 @@ Protected endpoints for system administration
 from flask import Blueprint, jsonify, request
 from backend.auth.jwt_utils import admin_required
 from backend.db import get_db
+from backend.services.zone_catalog import get_zone_catalog
+from backend.services.recorder import invalidate_recorder_cache, recorder_rows_last_minute
+from backend.services.retention import get_counter, get_retention_manager
+from backend.services.alerts import get_alert_manager
+from backend.services.alert_worker import get_alert_worker
+from backend.services.acl import get_access_cache
 import bcrypt
 import json
+import math
 import os
 from datetime import datetime
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
+MAX_USERS_PER_PAGE = 200
+
 @admin_bp.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint for admin API"""
@@ -61,6 +70,8 @@ def _sync_zones_to_json(area_name, db, area_id):
         json_file = os.path.join(zones_dir, f'zones_{area_name}.json')
         with open(json_file, 'w') as f:
             json.dump({'zones': zones_list}, f, indent=4)
+        get_zone_catalog().invalidate(area_name)
+        invalidate_recorder_cache()
         
         print(f"✅ Synced {len(zones_list)} zones to {json_file}")
         
@@ -123,6 +134,7 @@ def manage_threshold():
                     (new_threshold, user['user_id'])
                 )
             
+            get_alert_manager().invalidate_cache()
             print(f"✅ Threshold updated to {new_threshold} by {user['name']}")
             
             return jsonify({
@@ -134,44 +146,292 @@ def manage_threshold():
         print(f"❌ Threshold management error: {e}")
         return jsonify({'error': 'Failed to manage threshold'}), 500
 
+# === Threshold Rules ===
+
+def _is_int(value):
+    """JSON integer check that rejects true/false (bool is an int subclass)"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _parse_rule(data):
+    """Validate a threshold rule payload; returns (values, error)"""
+    threshold = data.get('threshold')
+    clear_threshold = data.get('clear_threshold')
+    sustain_seconds = data.get('sustain_seconds', 0)
+    zone_id = data.get('zone_id')
+    
+    if not data.get('area'):
+        return None, 'Area required'
+    if not _is_int(threshold) or threshold < 1:
+        return None, 'Invalid threshold value'
+    if clear_threshold is not None and (not _is_int(clear_threshold) or not 0 <= clear_threshold <= threshold):
+        return None, 'clear_threshold must be between 0 and threshold'
+    if not _is_int(sustain_seconds) or sustain_seconds < 0:
+        return None, 'Invalid sustain_seconds value'
+    if zone_id is not None and not _is_int(zone_id):
+        return None, 'Invalid zone_id'
+    
+    return {
+        'area': data['area'],
+        'zone_id': zone_id,
+        'threshold': threshold,
+        'clear_threshold': clear_threshold,
+        'sustain_seconds': sustain_seconds,
+        'enabled': bool(data.get('enabled', True))
+    }, None
+
+@admin_bp.route('/rules', methods=['GET'])
+@admin_required
+def list_rules():
+    """List threshold rules, optionally for one area (Admin only)"""
+    try:
+        db = get_db()
+        area = request.args.get('area')
+        
+        query = """
+            SELECT 
+                r.rule_id,
+                a.area_name as area,
+                r.zone_id,
+                r.threshold,
+                r.clear_threshold,
+                r.sustain_seconds,
+                r.enabled,
+                r.updated_at
+            FROM threshold_rules r
+            JOIN areas a ON r.area_id = a.area_id
+        """
+        params = ()
+        if area:
+            query += " WHERE a.area_name = %s"
+            params = (area,)
+        query += " ORDER BY a.area_name, r.zone_id, r.rule_id"
+        
+        rules = db.execute_query(query, params, fetch=True) or []
+        for rule in rules:
+            rule['enabled'] = bool(rule['enabled'])
+            rule['updated_at'] = rule['updated_at'].isoformat() if rule['updated_at'] else None
+        
+        return jsonify({
+            'success': True,
+            'rules': rules
+        }), 200
+        
+    except Exception as e:
+        print(f"❌ List rules error: {e}")
+        return jsonify({'error': 'Failed to fetch rules'}), 500
+
+@admin_bp.route('/rules', methods=['POST'])
+@admin_required
+def create_rule():
+    """Create a per-area or per-zone threshold rule (Admin only)"""
+    try:
+        rule, error = _parse_rule(request.get_json() or {})
+        if error:
+            return jsonify({'error': error}), 400
+        
+        db = get_db()
+        user = request.current_user
+        
+        area = db.execute_query(
+            "SELECT area_id FROM areas WHERE area_name = %s",
+            (rule['area'],),
+            fetch_one=True
+        )
+        
+        if not area:
+            return jsonify({'error': 'Area not found'}), 404
+        
+        if rule['zone_id'] is not None and not db.execute_query(
+            "SELECT 1 FROM zones WHERE area_id = %s AND zone_id = %s",
+            (area['area_id'], rule['zone_id']),
+            fetch_one=True
+        ):
+            return jsonify({'error': 'Zone not found'}), 404
+        
+        rule_id = db.execute_query(
+            """
+            INSERT INTO threshold_rules 
+            (area_id, zone_id, threshold, clear_threshold, sustain_seconds, enabled, created_by)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """,
+            (area['area_id'], rule['zone_id'], rule['threshold'], rule['clear_threshold'],
+             rule['sustain_seconds'], rule['enabled'], user['user_id'])
+        )
+        
+        if not rule_id:
+            return jsonify({'error': 'Failed to create rule'}), 500
+        
+        get_alert_manager().invalidate_cache()
+        print(f"✅ Threshold rule {rule_id} created for {rule['area']} by {user['name']}")
+        
+        return jsonify({
+            'success': True,
+            'rule_id': rule_id
+        }), 201
+        
+    except Exception as e:
+        print(f"❌ Create rule error: {e}")
+        return jsonify({'error': 'Failed to create rule'}), 500
+
+@admin_bp.route('/rules/<int:rule_id>', methods=['PUT'])
+@admin_required
+def update_rule(rule_id):
+    """Update a threshold rule (Admin only)"""
+    try:
+        rule, error = _parse_rule(request.get_json() or {})
+        if error:
+            return jsonify({'error': error}), 400
+        
+        db = get_db()
+        
+        # Checked up front: an UPDATE that changes nothing also affects 0 rows
+        if not db.execute_query(
+            "SELECT 1 FROM threshold_rules WHERE rule_id = %s",
+            (rule_id,),
+            fetch_one=True
+        ):
+            return jsonify({'error': 'Rule not found'}), 404
+        
+        area = db.execute_query(
+            "SELECT area_id FROM areas WHERE area_name = %s",
+            (rule['area'],),
+            fetch_one=True
+        )
+        
+        if not area:
+            return jsonify({'error': 'Area not found'}), 404
+        
+        if rule['zone_id'] is not None and not db.execute_query(
+            "SELECT 1 FROM zones WHERE area_id = %s AND zone_id = %s",
+            (area['area_id'], rule['zone_id']),
+            fetch_one=True
+        ):
+            return jsonify({'error': 'Zone not found'}), 404
+        
+        updated = db.execute_query(
+            """
+            UPDATE threshold_rules 
+            SET area_id = %s, zone_id = %s, threshold = %s, clear_threshold = %s,
+                sustain_seconds = %s, enabled = %s
+            WHERE rule_id = %s
+            """,
+            (area['area_id'], rule['zone_id'], rule['threshold'], rule['clear_threshold'],
+             rule['sustain_seconds'], rule['enabled'], rule_id)
+        )
+        
+        if updated is None:
+            return jsonify({'error': 'Failed to update rule'}), 500
+        
+        get_alert_manager().invalidate_cache()
+        print(f"✅ Threshold rule {rule_id} updated")
+        
+        return jsonify({
+            'success': True,
+            'rule_id': rule_id
+        }), 200
+        
+    except Exception as e:
+        print(f"❌ Update rule error: {e}")
+        return jsonify({'error': 'Failed to update rule'}), 500
+
+@admin_bp.route('/rules/<int:rule_id>', methods=['DELETE'])
+@admin_required
+def delete_rule(rule_id):
+    """Delete a threshold rule (Admin only)"""
+    try:
+        db = get_db()
+        
+        result = db.execute_query(
+            "DELETE FROM threshold_rules WHERE rule_id = %s",
+            (rule_id,)
+        )
+        
+        if not result:
+            return jsonify({'error': 'Rule not found'}), 404
+        
+        get_alert_manager().invalidate_cache()
+        print(f"✅ Threshold rule {rule_id} deleted")
+        
+        return jsonify({'success': True}), 200
+        
+    except Exception as e:
+        print(f"❌ Delete rule error: {e}")
+        return jsonify({'error': 'Failed to delete rule'}), 500
+
 @admin_bp.route('/users', methods=['GET'])
 @admin_required
 def list_users():
-    """List all users (Admin only)"""
+    """
+    List users with their assigned areas (Admin only).
+    
+    Query params: page (default 1), per_page (default 50, max 200),
+    q (matches name or email) and role.
+    """
     try:
         db = get_db()
         
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 50, type=int), 1), MAX_USERS_PER_PAGE)
+        search = request.args.get('q', '').strip()
+        role = request.args.get('role')
+        
+        filters = []
+        params = []
+        if search:
+            # Match q literally: escape LIKE wildcards and the escape char
+            pattern = '%' + search.replace('!', '!!').replace('%', '!%').replace('_', '!_') + '%'
+            filters.append("(u.name LIKE %s ESCAPE '!' OR u.email LIKE %s ESCAPE '!')")
+            params += [pattern, pattern]
+        if role:
+            filters.append("u.role = %s")
+            params.append(role)
+        where = f"WHERE {' AND '.join(filters)}" if filters else ""
+        
+        total = db.execute_query(
+            f"SELECT COUNT(*) as count FROM users u {where}",
+            tuple(params),
+            fetch_one=True
+        )
+        
+        # Users and their area ids in one grouped query; ids are joined with
+        # a separator that cannot occur in them, names are looked up below
         users = db.execute_query(
-            """
+            f"""
             SELECT 
-                user_id,
-                name,
-                email,
-                role,
-                created_at
-            FROM users
-            ORDER BY created_at DESC
+                u.user_id,
+                u.name,
+                u.email,
+                u.role,
+                u.created_at,
+                GROUP_CONCAT(a.area_id ORDER BY a.area_name SEPARATOR ',') as area_ids
+            FROM users u
+            LEFT JOIN user_areas ua ON u.user_id = ua.user_id
+            LEFT JOIN areas a ON ua.area_id = a.area_id
+            {where}
+            GROUP BY u.user_id
+            ORDER BY u.created_at DESC, u.user_id DESC
+            LIMIT %s OFFSET %s
             """,
+            tuple(params) + (per_page, (page - 1) * per_page),
             fetch=True
         )
         
-        # Get assigned areas for each user
+        areas = db.execute_query("SELECT area_id, area_name FROM areas", fetch=True) if users else []
+        area_names = {row['area_id']: row['area_name'] for row in (areas or [])}
         for user in (users or []):
-            areas = db.execute_query(
-                """
-                SELECT a.area_name
-                FROM areas a
-                JOIN user_areas ua ON a.area_id = ua.area_id
-                WHERE ua.user_id = %s
-                """,
-                (user['user_id'],),
-                fetch=True
-            )
-            user['areas'] = [area['area_name'] for area in (areas or [])]
+            area_ids = user.pop('area_ids')
+            user['areas'] = [area_names[int(area_id)] for area_id in area_ids.split(',')
+                             if int(area_id) in area_names] if area_ids else []
+        
+        total_count = total['count'] if total else 0
         
         return jsonify({
             'success': True,
-            'users': users or []
+            'users': users or [],
+            'page': page,
+            'per_page': per_page,
+            'total': total_count,
+            'pages': math.ceil(total_count / per_page)
         }), 200
         
     except Exception as e:
@@ -233,6 +493,7 @@ def create_user():
                     (user_id, area['area_id'])
                 )
         
+        get_access_cache().invalidate(user_id)
         print(f"✅ User created: {email} (role: {role})")
         
         return jsonify({
@@ -317,6 +578,7 @@ def update_user(user_id):
                     (user_id, area['area_id'])
                 )
         
+        get_access_cache().invalidate(user_id)
         print(f"✅ User {user_id} updated")
         
         return jsonify({
@@ -346,6 +608,7 @@ def delete_user(user_id):
         )
         
         if result:
+            get_access_cache().invalidate(user_id)
             print(f"✅ User {user_id} deleted by {current_user['name']}")
             return jsonify({'success': True}), 200
         else:
@@ -360,8 +623,6 @@ def delete_user(user_id):
 def get_all_alerts():
     """Get all alerts (Admin only)"""
     try:
-        from backend.services.alerts import get_alert_manager
-        
         alert_manager = get_alert_manager()
         limit = request.args.get('limit', 50, type=int)
         
@@ -381,8 +642,6 @@ def get_all_alerts():
 def acknowledge_alert(alert_id):
     """Acknowledge an alert (Admin only)"""
     try:
-        from backend.services.alerts import get_alert_manager
-        
         alert_manager = get_alert_manager()
         user = request.current_user
         
@@ -404,11 +663,9 @@ def get_diagnostics():
     try:
         db = get_db()
         
-        # Database stats
-        record_count = db.execute_query(
-            "SELECT COUNT(*) as count FROM historical_counts",
-            fetch_one=True
-        )
+        # Database stats (historical_counts size is a maintained counter,
+        # not a COUNT(*) over the whole table)
+        record_count = get_counter(db, 'historical_counts')
         
         user_count = db.execute_query(
             "SELECT COUNT(*) as count FROM users",
@@ -420,29 +677,24 @@ def get_diagnostics():
             fetch_one=True
         )
         
-        # Calculate sampling rate (records per minute)
-        recent_records = db.execute_query(
-            """
-            SELECT COUNT(*) as count 
-            FROM historical_counts 
-            WHERE timestamp >= NOW() - INTERVAL 1 MINUTE
-            """,
-            fetch_one=True
-        )
+        # Sampling rate (records per minute) as tracked by the recorder
+        recent_records = recorder_rows_last_minute()
         
         return jsonify({
             'success': True,
             'diagnostics': {
                 'database': {
                     'connected': db.connection.is_connected(),
-                    'total_records': record_count['count'] if record_count else 0,
+                    'total_records': record_count,
                     'active_alerts': alert_count['count'] if alert_count else 0,
                     'total_users': user_count['count'] if user_count else 0
                 },
                 'sampling': {
-                    'rate_per_minute': recent_records['count'] if recent_records else 0,
+                    'rate_per_minute': recent_records,
                     'expected_rate': 12  # 3 areas * 5 second interval = 12 per minute
                 },
+                'retention': get_retention_manager().stats(),
+                'alert_worker': get_alert_worker().stats(),
                 'status': 'operational'
             }
         }), 200
@@ -514,6 +766,8 @@ def create_camera():
             (area_name, video_source)
         )
         
+        invalidate_recorder_cache()
+        get_alert_manager().invalidate_cache()
         print(f"✅ Camera feed created: {area_name}")
         
         return jsonify({
@@ -584,6 +838,9 @@ def delete_camera(area_id):
         )
         
         if result:
+            invalidate_recorder_cache()
+            get_alert_manager().invalidate_cache()
+            get_access_cache().invalidate()
             print(f"✅ Camera {area_id} deleted")
             return jsonify({'success': True}), 200
         else:
@@ -672,6 +929,7 @@ def save_zones(area_id):
                 (area_id, zone['zone_id'], zone.get('zone_name'), zone.get('polygon_coords'))
             )
         
+        invalidate_recorder_cache()
         print(f"✅ Zones saved for area {area_id}: {len(zones)} zones")
         
         return jsonify({'success': True}), 200
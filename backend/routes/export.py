@@ -6,6 +6,7 @@ Protected endpoints for data export (Admin only)
 from flask import Blueprint, jsonify, make_response
 from backend.auth.jwt_utils import admin_required
 from backend.db import get_db
+from backend.services.rollups import OVERALL_ZONE
 from datetime import datetime
 import csv
 import io
@@ -93,22 +94,21 @@ def export_area_summary(area):
         
         area_id = area_data['area_id']
         
-        # Get summary stats
+        # Get summary stats from the daily rollup tier
         summary = db.execute_query(
             """
             SELECT 
-                DATE(timestamp) as date,
-                AVG(count) as avg_count,
-                MAX(count) as max_count,
-                MIN(count) as min_count,
-                COUNT(*) as records
-            FROM historical_counts
-            WHERE area_id = %s AND zone_id IS NULL
-            GROUP BY DATE(timestamp)
-            ORDER BY date DESC
+                DATE(bucket_start) as date,
+                sum_count / records as avg_count,
+                max_count,
+                min_count,
+                records
+            FROM count_rollups
+            WHERE tier = '1d' AND area_id = %s AND zone_id = %s
+            ORDER BY bucket_start DESC
             LIMIT 30
             """,
-            (area_id,),
+            (area_id, OVERALL_ZONE),
             fetch=True
         )
         
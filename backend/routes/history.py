@@ -6,39 +6,148 @@ Protected endpoints for analytics and trends
 from flask import Blueprint, jsonify, request
 from backend.auth.jwt_utils import token_required
 from backend.db import get_db
+from backend.services.rollups import OVERALL_ZONE, TIERS, bucket_origin, pick_tier, window_start
+from backend.services.retention import ROLLUP_RETENTION_DAYS
+from backend.services.acl import get_access_cache
 from datetime import datetime, timedelta
+import math
 
 history_bp = Blueprint('history', __name__, url_prefix='/api/history')
 
+MAX_POINTS = 2000
+
+def _source_tier(bucket_seconds, span_seconds):
+    """Coarsest rollup tier that can build bucket_seconds buckets for the window, or None for raw rows"""
+    best = None
+    for tier, width in TIERS.items():
+        if width > bucket_seconds or bucket_seconds % width:
+            continue
+        retention_days = ROLLUP_RETENTION_DAYS.get(tier)
+        if retention_days is not None and span_seconds > retention_days * 86400:
+            continue
+        best = tier
+    return best
+
+def _align_bucket(bucket_seconds, span_seconds):
+    """Round a bucket of a minute or more up to a multiple of the finest rollup tier kept for the window"""
+    if bucket_seconds < TIERS['1m']:
+        return bucket_seconds
+    for tier, width in TIERS.items():
+        retention_days = ROLLUP_RETENTION_DAYS.get(tier)
+        if retention_days is None or span_seconds <= retention_days * 86400:
+            return math.ceil(bucket_seconds / width) * width
+    return bucket_seconds
+
+def _isoformat(value):
+    """ISO string for a bucket value, whether the driver returned a datetime or text"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).isoformat()
+    return value.isoformat()
+
+def _bucketed_history(db, area_id, span_seconds, bucket_seconds, include_zones):
+    """
+    Aggregate an area's history into fixed time buckets in SQL.
+    
+    Returns:
+        (source, overall, zones) where source is the rollup tier or 'raw',
+        overall is a list of bucket dicts and zones maps zone_id -> list
+    """
+    # Buckets are counted from since, a local-time boundary, in wall-clock
+    # seconds: UNIX_TIMESTAMP would align them to the UTC epoch instead
+    since = bucket_origin(datetime.now() - timedelta(seconds=span_seconds), bucket_seconds)
+    
+    tier = _source_tier(bucket_seconds, span_seconds)
+    if tier:
+        zone_filter = "" if include_zones else f"AND zone_id = {OVERALL_ZONE}"
+        rows = db.execute_query(
+            f"""
+            SELECT 
+                DATE_ADD(CAST(%s AS DATETIME), INTERVAL FLOOR(TIMESTAMPDIFF(SECOND, %s, bucket_start) / %s) * %s SECOND) as bucket,
+                zone_id as zone_key,
+                SUM(sum_count) / SUM(records) as avg_count,
+                MAX(max_count) as max_count,
+                MIN(min_count) as min_count
+            FROM count_rollups
+            WHERE tier = %s
+                AND area_id = %s
+                AND bucket_start >= %s
+                {zone_filter}
+            GROUP BY bucket, zone_key
+            ORDER BY bucket ASC
+            """,
+            (since, since, bucket_seconds, bucket_seconds, tier, area_id, since),
+            fetch=True
+        )
+    else:
+        zone_filter = "" if include_zones else "AND zone_id IS NULL"
+        rows = db.execute_query(
+            f"""
+            SELECT 
+                DATE_ADD(CAST(%s AS DATETIME), INTERVAL FLOOR(TIMESTAMPDIFF(SECOND, %s, timestamp) / %s) * %s SECOND) as bucket,
+                COALESCE(zone_id, {OVERALL_ZONE}) as zone_key,
+                AVG(COALESCE(avg_count, count)) as avg_count,
+                MAX(COALESCE(max_count, count)) as max_count,
+                MIN(COALESCE(min_count, count)) as min_count
+            FROM historical_counts
+            WHERE area_id = %s
+                AND timestamp >= %s
+                {zone_filter}
+            GROUP BY bucket, zone_key
+            ORDER BY bucket ASC
+            """,
+            (since, since, bucket_seconds, bucket_seconds, area_id, since),
+            fetch=True
+        )
+    
+    overall = []
+    zones = {}
+    for row in (rows or []):
+        point = {
+            'recorded_at': _isoformat(row['bucket']),
+            'avg_count': round(float(row['avg_count'] or 0), 2),
+            'max_count': row['max_count'],
+            'min_count': row['min_count']
+        }
+        if row['zone_key'] == OVERALL_ZONE:
+            point['total_count'] = point['avg_count']
+            overall.append(point)
+        else:
+            zones.setdefault(str(row['zone_key']), []).append(point)
+    
+    return tier or 'raw', overall, zones
+
 @history_bp.route('/<area>', methods=['GET'])
 @token_required
 def get_historical_data(area):
-    """Get historical data for area"""
+    """
+    Get historical data for area.
+    
+    Without points/bucket, returns raw rows (up to limit). With points=N or
+    bucket=<seconds>, returns fixed time buckets with avg/max/min computed in
+    SQL (from rollups when a tier fits), plus per-zone series if zones=1.
+    """
     try:
         user = request.current_user
-        user_id = user['user_id']
-        role = user['role']
         
         # Get query parameters
         limit = request.args.get('limit', 100, type=int)
         hours = request.args.get('hours', 1, type=int)
+        points = request.args.get('points', type=int)
+        bucket = request.args.get('bucket', type=int)
+        include_zones = request.args.get('zones', '0').lower() in ('1', 'true', 'yes')
+        
+        if hours <= 0:
+            return jsonify({'error': 'hours must be a positive integer'}), 400
+        if (points is not None and points <= 0) or (bucket is not None and bucket <= 0):
+            return jsonify({'error': 'points and bucket must be positive integers'}), 400
         
         # Check access
-        db = get_db()
+        if not get_access_cache().can_access(user, area):
+            return jsonify({'error': 'Access denied'}), 403
         
-        if role != 'admin':
-            has_access = db.execute_query(
-                """
-                SELECT 1 FROM user_areas ua
-                JOIN areas a ON ua.area_id = a.area_id
-                WHERE ua.user_id = %s AND a.area_name = %s
-                """,
-                (user_id, area),
-                fetch_one=True
-            )
-            
-            if not has_access:
-                return jsonify({'error': 'Access denied'}), 403
+        db = get_db()
         
         # Get area_id
         area_data = db.execute_query(
@@ -52,6 +161,29 @@ def get_historical_data(area):
         
         area_id = area_data['area_id']
         
+        # Downsampled: fixed number of buckets regardless of window size
+        if points or bucket:
+            span = hours * 3600
+            if bucket:
+                bucket_seconds = max(bucket, 1, math.ceil(span / MAX_POINTS))
+            else:
+                bucket_seconds = math.ceil(span / min(max(points, 1), MAX_POINTS))
+                bucket_seconds = _align_bucket(bucket_seconds, span)
+            
+            source, overall, zones = _bucketed_history(db, area_id, span, bucket_seconds, include_zones)
+            
+            response = {
+                'success': True,
+                'area': area,
+                'bucket_seconds': bucket_seconds,
+                'source': source,
+                'history': overall,
+                'total_records': len(overall)
+            }
+            if include_zones:
+                response['zones'] = zones
+            return jsonify(response), 200
+        
         # Get historical data
         since = datetime.now() - timedelta(hours=hours)
         
@@ -96,25 +228,12 @@ def get_area_stats(area):
     """Get statistical summary for area"""
     try:
         user = request.current_user
-        user_id = user['user_id']
-        role = user['role']
-        
-        db = get_db()
         
         # Check access
-        if role != 'admin':
-            has_access = db.execute_query(
-                """
-                SELECT 1 FROM user_areas ua
-                JOIN areas a ON ua.area_id = a.area_id
-                WHERE ua.user_id = %s AND a.area_name = %s
-                """,
-                (user_id, area),
-                fetch_one=True
-            )
-            
-            if not has_access:
-                return jsonify({'error': 'Access denied'}), 403
+        if not get_access_cache().can_access(user, area):
+            return jsonify({'error': 'Access denied'}), 403
+        
+        db = get_db()
         
         # Get area_id
         area_data = db.execute_query(
@@ -128,20 +247,23 @@ def get_area_stats(area):
         
         area_id = area_data['area_id']
         
-        # Calculate stats
+        # Calculate stats over the last 24 hours from rollup buckets
+        span = 24 * 3600
+        tier = pick_tier(span)
         stats = db.execute_query(
             """
             SELECT 
-                AVG(count) as avg_count,
-                MAX(count) as max_count,
-                MIN(count) as min_count,
-                COUNT(*) as total_records
-            FROM historical_counts
-            WHERE area_id = %s 
-                AND zone_id IS NULL
-                AND timestamp >= NOW() - INTERVAL 24 HOUR
+                SUM(sum_count) / SUM(records) as avg_count,
+                MAX(max_count) as max_count,
+                MIN(min_count) as min_count,
+                SUM(records) as total_records
+            FROM count_rollups
+            WHERE tier = %s
+                AND area_id = %s 
+                AND zone_id = %s
+                AND bucket_start >= %s
             """,
-            (area_id,),
+            (tier, area_id, OVERALL_ZONE, window_start(datetime.now(), span, tier)),
             fetch_one=True
         )
         
@@ -152,7 +274,7 @@ def get_area_stats(area):
                 'average': round(stats['avg_count'], 2) if stats['avg_count'] else 0,
                 'maximum': stats['max_count'] or 0,
                 'minimum': stats['min_count'] or 0,
-                'records': stats['total_records'] or 0
+                'records': int(stats['total_records'] or 0)
             }
         }), 200
         
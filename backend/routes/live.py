@@ -3,9 +3,16 @@ Live Monitoring Routes
 Protected endpoints for real-time crowd data
 """
 
-from flask import Blueprint, jsonify, request
-from backend.auth.jwt_utils import token_required
+import json
+import time
+from flask import Blueprint, jsonify, request, Response, stream_with_context
+from backend.auth.jwt_utils import token_required, decode_token
 from backend.db import get_db
+from backend.services.broadcaster import get_broadcaster
+from backend.services.acl import get_access_cache
+from backend.services.stream_tickets import get_stream_tickets
+
+STREAM_KEEPALIVE_SECONDS = 15
 
 live_bp = Blueprint('live', __name__, url_prefix='/api/live')
 
@@ -47,6 +54,98 @@ def get_user_areas():
         print(f"❌ Get areas error: {e}")
         return jsonify({'error': 'Failed to fetch areas'}), 500
 
+@live_bp.route('/stream/ticket', methods=['POST'])
+@token_required
+def issue_stream_ticket():
+    """
+    Exchange the bearer token for a single-use ticket to open the live stream.
+
+    EventSource cannot set headers, and a JWT in the stream URL would be
+    written to access logs, so the URL carries this short-lived ticket instead.
+    """
+    tickets = get_stream_tickets()
+    return jsonify({
+        'success': True,
+        'ticket': tickets.issue(request.current_user),
+        'expires_in': tickets.ttl
+    }), 200
+
+@live_bp.route('/stream', methods=['GET'])
+def stream_live_data():
+    """
+    Server-Sent Events stream of live area state.
+
+    Sends the last known state of every permitted area on connect, then one
+    'state' event each time an area is updated. Authenticate with a ticket
+    from POST /api/live/stream/ticket as ?ticket=, or an Authorization header.
+    Area access is re-checked against the access cache for every event, so
+    revoked areas stop streaming without reconnecting.
+    """
+    auth_header = request.headers.get('Authorization')
+    if auth_header:
+        try:
+            token = auth_header.split(' ')[1]
+        except IndexError:
+            return jsonify({'error': 'Invalid token format'}), 401
+        user = decode_token(token)
+    elif request.args.get('ticket'):
+        user = get_stream_tickets().redeem(request.args['ticket'])
+    else:
+        return jsonify({'error': 'Token is missing'}), 401
+    
+    if not user:
+        return jsonify({'error': 'Token is invalid or expired'}), 401
+    
+    try:
+        # Optional ?areas=entrance,retail narrows the stream
+        requested = request.args.get('areas')
+        if requested:
+            requested = {a for a in requested.split(',') if a}
+        
+        broadcaster = get_broadcaster()
+        subscription = broadcaster.subscribe(requested or None)
+    except Exception as e:
+        print(f"❌ Live stream error: {e}")
+        return jsonify({'error': 'Failed to open live stream'}), 500
+    
+    access_cache = get_access_cache()
+    
+    def format_event(event):
+        return f"event: state\ndata: {json.dumps(event)}\n\n"
+    
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            for event in broadcaster.snapshot(subscription):
+                if access_cache.can_access(user, event['area']):
+                    yield format_event(event)
+            
+            while True:
+                event = subscription.get(timeout=STREAM_KEEPALIVE_SECONDS)
+                # Close the stream once the token expires, checked on every
+                # event since a busy stream never idles; the client falls
+                # back to polling and re-authenticates
+                if user.get('exp') and user['exp'] < time.time():
+                    yield "event: expired\ndata: {}\n\n"
+                    return
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                # Cached per user; admin edits invalidate the entry
+                if access_cache.can_access(user, event['area']):
+                    yield format_event(event)
+        finally:
+            broadcaster.unsubscribe(subscription)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 @live_bp.route('/<area>', methods=['GET'])
 @token_required
 def get_live_data(area):
@@ -55,24 +154,10 @@ def get_live_data(area):
         from backend.app import AREAS_STATE
         
         user = request.current_user
-        user_id = user['user_id']
-        role = user['role']
         
-        # Check if user has access to this area
-        if role != 'admin':
-            db = get_db()
-            has_access = db.execute_query(
-                """
-                SELECT 1 FROM user_areas ua
-                JOIN areas a ON ua.area_id = a.area_id
-                WHERE ua.user_id = %s AND a.area_name = %s
-                """,
-                (user_id, area),
-                fetch_one=True
-            )
-            
-            if not has_access:
-                return jsonify({'error': 'Access denied to this area'}), 403
+        # Check if user has access to this area (cached, no DB query)
+        if not get_access_cache().can_access(user, area):
+            return jsonify({'error': 'Access denied to this area'}), 403
         
         # Get live state
         if area not in AREAS_STATE:
@@ -0,0 +1,67 @@
+"""
+Area Access Cache
+Keeps each user's set of permitted area names in memory so per-request
+access checks do not query user_areas
+"""
+
+import threading
+import time
+from backend.db import get_db
+
+class AccessCache:
+    def __init__(self, ttl=300):
+        # Entries are invalidated by the admin user/camera endpoints; the TTL
+        # only bounds staleness from changes made outside this process
+        self.ttl = ttl
+        self.entries = {}  # user_id -> (frozenset of area names, loaded_at)
+        # Bumped by invalidate(); a load that started before an invalidation
+        # may have read the old assignments and must not be stored
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def allowed_areas(self, user_id):
+        """Area names assigned to a user (one query on a cache miss)"""
+        with self.lock:
+            entry = self.entries.get(user_id)
+            generation = self.generation
+        if entry and time.time() - entry[1] < self.ttl:
+            return entry[0]
+
+        rows = get_db().execute_query(
+            """
+            SELECT a.area_name FROM user_areas ua
+            JOIN areas a ON ua.area_id = a.area_id
+            WHERE ua.user_id = %s
+            """,
+            (user_id,),
+            fetch=True
+        )
+        if rows is None:
+            # DB error: don't cache a spurious empty set
+            return frozenset()
+
+        areas = frozenset(row['area_name'] for row in rows)
+        with self.lock:
+            if self.generation == generation:
+                self.entries[user_id] = (areas, time.time())
+        return areas
+
+    def can_access(self, user, area_name):
+        """Whether a decoded token's user may see area_name"""
+        return user['role'] == 'admin' or area_name in self.allowed_areas(user['user_id'])
+
+    def invalidate(self, user_id=None):
+        """Drop one user's entry, or every entry when user_id is None"""
+        with self.lock:
+            self.generation += 1
+            if user_id is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(user_id, None)
+
+# Global access cache instance
+access_cache = AccessCache()
+
+def get_access_cache():
+    """Get the access cache instance"""
+    return access_cache
@@ -0,0 +1,116 @@
+"""
+Alert Worker Service
+Evaluates thresholds for queued state updates on a background thread and
+batch-persists the resulting alerts, keeping DB writes off the ingest path
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from backend.services.alerts import get_alert_manager
+
+class AlertWorker:
+    def __init__(self, max_queue=10000, batch_size=500):
+        self.running = False
+        self.thread = None
+        self.batch_size = batch_size  # Updates evaluated per persisted batch
+        # A full queue drops its oldest updates: under a surge the newest
+        # counts are the ones worth alerting on
+        self.queue = deque(maxlen=max_queue)
+        self.condition = threading.Condition()
+        self.updates_processed = 0
+        self.updates_dropped = 0
+        self.alerts_written = 0
+        self.last_batch_seconds = 0.0
+
+    def start(self):
+        """Start the alert worker"""
+        if not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self._worker_loop, daemon=True)
+            self.thread.start()
+            print("✅ Alert worker started")
+
+    def stop(self):
+        """Stop the alert worker after draining queued updates"""
+        self.running = False
+        with self.condition:
+            self.condition.notify()
+        if self.thread:
+            self.thread.join()
+        print("⏹ Alert worker stopped")
+
+    def submit(self, area_name, live_count, zone_counts):
+        """Queue a state update for evaluation (never blocks)"""
+        with self.condition:
+            if len(self.queue) == self.queue.maxlen:
+                self.updates_dropped += 1
+            self.queue.append((time.monotonic(), datetime.now(), area_name, live_count, zone_counts))
+            self.condition.notify()
+
+    def _take_batch(self):
+        """Wait for queued updates and remove up to batch_size of them"""
+        with self.condition:
+            while self.running and not self.queue:
+                self.condition.wait(timeout=1.0)
+            count = min(len(self.queue), self.batch_size)
+            return [self.queue.popleft() for _ in range(count)]
+
+    def _worker_loop(self):
+        """Main evaluation loop"""
+        while self.running or self.queue:
+            batch = self._take_batch()
+            if not batch:
+                continue
+            try:
+                self._process_batch(batch)
+            except Exception as e:
+                print(f"❌ Alert worker error: {e}")
+
+    def _process_batch(self, batch):
+        """Evaluate a batch of updates and persist any alerts they raise"""
+        started = time.monotonic()
+        alert_manager = get_alert_manager()
+
+        pending = []
+        for _, observed_at, area_name, live_count, zone_counts in batch:
+            pending.extend(alert_manager.evaluate(area_name, live_count, zone_counts, observed_at))
+
+        self.alerts_written += len(alert_manager.persist_alerts(pending))
+
+        self.updates_processed += len(batch)
+        self.last_batch_seconds = time.monotonic() - started
+
+    def stats(self):
+        """Queue depth and lag of the worker"""
+        with self.condition:
+            depth = len(self.queue)
+            oldest = self.queue[0][0] if self.queue else None
+        return {
+            'running': self.running,
+            'queue_depth': depth,
+            'oldest_age_seconds': round(time.monotonic() - oldest, 3) if oldest is not None else 0,
+            'last_batch_seconds': round(self.last_batch_seconds, 3),
+            'updates_processed': self.updates_processed,
+            'updates_dropped': self.updates_dropped,
+            'alerts_written': self.alerts_written
+        }
+
+# Global alert worker instance
+alert_worker = AlertWorker()
+
+def get_alert_worker():
+    """Get the alert worker instance"""
+    return alert_worker
+
+def start_alert_worker():
+    """Start the alert worker"""
+    alert_worker.start()
+
+def submit_alert_check(area_name, live_count, zone_counts):
+    """Queue an update for the worker, or check inline if it is not running"""
+    if alert_worker.running:
+        alert_worker.submit(area_name, live_count, zone_counts)
+    else:
+        get_alert_manager().check_threshold(area_name, live_count, zone_counts)
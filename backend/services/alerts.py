@@ -3,94 +3,223 @@ Alert Management Service
 Handles threshold-based alerts and notifications
 """
 
+import threading
+import time
 from datetime import datetime
 from backend.db import get_db
+from backend.services.rules import RulesEngine
 
 class AlertManager:
     def __init__(self):
         self.last_alert_time = {}
         self.cooldown = 20  # 20 seconds cooldown per area
+        
+        # Cached lookups so evaluation needs no DB reads. Refreshed by
+        # invalidate_cache() (threshold/camera changes) or after cache_ttl.
+        self.cache_ttl = 300
+        self.threshold = None     # (global_threshold, threshold_id), or () if none set
+        self.area_ids = None      # area_name -> area_id
+        self.cache_loaded_at = 0
+        self.cache_lock = threading.Lock()
+        
+        # Per-area / per-zone rules (threshold_rules), compiled per area
+        self.rules = RulesEngine(self.cache_ttl)
     
-    def check_threshold(self, area_name, live_count, zone_counts):
-        """Check if count exceeds threshold and create alert if needed"""
-        try:
-            db = get_db()
-            
-            # Get current global threshold
-            threshold_data = db.execute_query(
-                "SELECT global_threshold FROM thresholds ORDER BY id DESC LIMIT 1",
-                fetch_one=True
-            )
-            
-            if not threshold_data:
-                return None
-            
-            threshold = threshold_data['global_threshold']
-            
-            # Check if live count exceeds threshold
-            if live_count <= threshold:
-                return None
-            
-            # Check cooldown
-            current_time = datetime.now().timestamp()
-            last_alert = self.last_alert_time.get(area_name, 0)
-            
-            if current_time - last_alert < self.cooldown:
-                return None  # Still in cooldown
-            
-            # Get area_id
-            area = db.execute_query(
-                "SELECT area_id FROM areas WHERE area_name = %s",
-                (area_name,),
-                fetch_one=True
-            )
-            
-            if not area:
-                return None
-            
-            area_id = area['area_id']
-            
-            # Get threshold_id
-            threshold_record = db.execute_query(
-                "SELECT id FROM thresholds ORDER BY id DESC LIMIT 1",
-                fetch_one=True
-            )
-            threshold_id = threshold_record['id'] if threshold_record else None
-            
-            # Create alert
-            alert_id = db.execute_query(
+    def invalidate_cache(self):
+        """Forget cached threshold, area ids and compiled rules"""
+        with self.cache_lock:
+            self.threshold = None
+            self.area_ids = None
+        self.rules.invalidate()
+    
+    def _load_cache(self, db):
+        """Return (threshold, area_ids), reading the DB only when stale"""
+        with self.cache_lock:
+            if self.threshold is not None and time.time() - self.cache_loaded_at < self.cache_ttl:
+                return self.threshold, self.area_ids
+        
+        # fetch (not fetch_one) so a DB error (None) differs from "no threshold set" ([])
+        thresholds = db.execute_query(
+            "SELECT id, global_threshold FROM thresholds ORDER BY id DESC LIMIT 1",
+            fetch=True
+        )
+        areas = db.execute_query("SELECT area_id, area_name FROM areas", fetch=True)
+        if thresholds is None or areas is None:
+            # DB error: keep serving the last good values uncached, so the
+            # next evaluation retries instead of caching "no threshold"
+            with self.cache_lock:
+                return self.threshold or (), self.area_ids or {}
+        
+        threshold = (thresholds[0]['global_threshold'], thresholds[0]['id']) if thresholds else ()
+        area_ids = {row['area_name']: row['area_id'] for row in areas}
+        with self.cache_lock:
+            self.threshold = threshold
+            self.area_ids = area_ids
+            self.cache_loaded_at = time.time()
+        return threshold, area_ids
+    
+    def evaluate(self, area_name, live_count, zone_counts, observed_at=None):
+        """
+        Decide in memory which alerts an update should raise.
+        
+        The area's threshold rules are evaluated together; the global
+        threshold (with its cooldown) applies unless the area has an
+        area-wide rule of its own.
+        
+        Returns:
+            List of pending alert dicts for persist_alerts()
+        """
+        db = get_db()
+        observed_at = observed_at or datetime.now()
+        
+        pending = self.rules.evaluate(db, area_name, live_count, zone_counts, observed_at)
+        
+        if not self.rules.has_area_rule(db, area_name):
+            alert = self._evaluate_global(db, area_name, live_count, zone_counts, observed_at)
+            if alert:
+                pending.append(alert)
+        
+        return pending
+    
+    def _evaluate_global(self, db, area_name, live_count, zone_counts, observed_at):
+        """Check the area total against the global threshold"""
+        # Get current global threshold (cached)
+        threshold_data, area_ids = self._load_cache(db)
+        
+        if not threshold_data:
+            return None
+        
+        threshold, threshold_id = threshold_data
+        
+        # Check if live count exceeds threshold
+        if live_count <= threshold:
+            return None
+        
+        # Check cooldown
+        current_time = observed_at.timestamp()
+        last_alert = self.last_alert_time.get(area_name, 0)
+        
+        if current_time - last_alert < self.cooldown:
+            return None  # Still in cooldown
+        
+        # Get area_id (cached)
+        area_id = area_ids.get(area_name)
+        
+        if not area_id:
+            return None
+        
+        # Start the cooldown now so later updates in the same batch don't
+        # alert again; persist_alerts() restores it if the write fails
+        self.last_alert_time[area_name] = current_time
+        
+        # Format zone details
+        zone_details = ', '.join([f"Zone {k}: {v}" for k, v in zone_counts.items()]) if zone_counts else 'N/A'
+        
+        return {
+            'area': area_name,
+            'area_id': area_id,
+            'zone_id': None,
+            'rule_id': None,
+            'count': live_count,
+            'threshold': threshold,
+            'threshold_id': threshold_id,
+            'zone_details': zone_details,
+            'observed_at': observed_at,
+            'previous_alert_time': last_alert
+        }
+    
+    def persist_alerts(self, pending):
+        """
+        Write pending alerts and their threshold violations.
+        
+        The batch is written in one transaction. If that fails, each alert
+        is retried on its own so one bad row (e.g. a just-deleted area)
+        only loses its own alert. Alerts that still fail have their
+        cooldown or rule state undone, so they fire again.
+        
+        Returns:
+            The alerts that were written
+        """
+        if not pending:
+            return []
+        
+        if self._write_alerts(pending):
+            written = pending
+        elif len(pending) > 1:
+            written = [p for p in pending if self._write_alerts([p])]
+        else:
+            written = []
+        
+        failed = [p for p in pending if not any(p is w for w in written)]
+        if failed:
+            print(f"❌ {len(failed)} alert(s) could not be stored; they will re-fire")
+            self._undo_alerts(failed)
+        
+        for p in written:
+            where = f"{p['area']} zone {p['zone_id']}" if p['zone_id'] is not None else p['area']
+            print(f"⚠️  ALERT: {where} exceeded threshold ({p['count']} > {p['threshold']})")
+        return written
+    
+    def _undo_alerts(self, failed):
+        """Restore cooldowns and re-arm rules of alerts that were not stored"""
+        rearm = {}
+        # Newest first, unwinding each area's cooldown only while it still
+        # belongs to an unstored alert (not to a later one that was written)
+        for p in reversed(failed):
+            if p['rule_id'] is None:
+                if self.last_alert_time.get(p['area']) == p['observed_at'].timestamp():
+                    self.last_alert_time[p['area']] = p['previous_alert_time']
+            else:
+                rearm.setdefault(p['area'], set()).add(p['rule_id'])
+        for area_name, rule_ids in rearm.items():
+            self.rules.rearm(area_name, rule_ids)
+    
+    def _write_alerts(self, pending):
+        """Insert alerts and their threshold violations in one transaction"""
+        alert_rows = [
+            (p['area_id'], p['zone_id'], p['rule_id'], p['count'], p['threshold'], p['observed_at'])
+            for p in pending
+        ]
+        violation_rows = [
+            (p['area_id'], p['threshold_id'], p['count'], p['observed_at'], p['zone_details'])
+            for p in pending if p['threshold_id']
+        ]
+        
+        return get_db().execute_transaction([
+            (
                 """
-                INSERT INTO alerts (area_id, zone_id, observed_count, threshold, status)
-                VALUES (%s, NULL, %s, %s, 'active')
+                INSERT INTO alerts (area_id, zone_id, rule_id, observed_count, threshold, status, created_at)
+                VALUES (%s, %s, %s, %s, %s, 'active', %s)
                 """,
-                (area_id, live_count, threshold)
+                alert_rows
+            ),
+            (
+                """
+                INSERT INTO threshold_violations 
+                (area_id, threshold_id, people_count, violation_time, zone_details)
+                VALUES (%s, %s, %s, %s, %s)
+                """,
+                violation_rows
             )
+        ])
+    
+    def check_threshold(self, area_name, live_count, zone_counts):
+        """Check if count exceeds thresholds and create alerts if needed"""
+        try:
+            written = self.persist_alerts(self.evaluate(area_name, live_count, zone_counts))
             
-            # Record threshold violation for history
-            if threshold_id:
-                # Format zone details
-                zone_details = ', '.join([f"Zone {k}: {v}" for k, v in zone_counts.items()]) if zone_counts else 'N/A'
-                
-                db.execute_query(
-                    """
-                    INSERT INTO threshold_violations 
-                    (area_id, threshold_id, people_count, violation_time, zone_details)
-                    VALUES (%s, %s, %s, %s, %s)
-                    """,
-                    (area_id, threshold_id, live_count, datetime.now(), zone_details)
-                )
-            
-            # Update last alert time
-            self.last_alert_time[area_name] = current_time
-            
-            print(f"⚠️  ALERT: {area_name} exceeded threshold ({live_count} > {threshold})")
+            if not written:
+                return None
             
-            return {
-                'alert_id': alert_id,
-                'area': area_name,
-                'count': live_count,
-                'threshold': threshold
-            }
+            return [
+                {
+                    'area': area_name,
+                    'zone_id': p['zone_id'],
+                    'count': p['count'],
+                    'threshold': p['threshold']
+                }
+                for p in written
+            ]
             
         except Exception as e:
             print(f"❌ Alert check error: {e}")
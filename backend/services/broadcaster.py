@@ -0,0 +1,86 @@
+"""
+Live Update Broadcaster
+Pushes area state changes to Server-Sent Events subscribers
+"""
+
+import queue
+import threading
+
+class Subscription:
+    """One connected stream client"""
+
+    def __init__(self, areas=None, max_queue=100):
+        # None means every area (admins)
+        self.areas = set(areas) if areas is not None else None
+        self.queue = queue.Queue(maxsize=max_queue)
+
+    def wants(self, area):
+        """Whether this subscriber may receive updates for area"""
+        return self.areas is None or area in self.areas
+
+    def push(self, event):
+        """Queue an event without blocking; a slow client loses its oldest events"""
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Next event, or None if nothing arrived within timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class LiveBroadcaster:
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self.subscribers = set()
+        self.latest = {}  # area -> last published state, sent on connect
+        self.lock = threading.Lock()
+
+    def subscribe(self, areas=None):
+        """Register a stream client for the given areas (None = all)"""
+        subscription = Subscription(areas, self.max_queue)
+        with self.lock:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a disconnected stream client"""
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def publish(self, area, state):
+        """Send an area's new state to every subscriber allowed to see it"""
+        event = {'area': area, 'data': state}
+        with self.lock:
+            self.latest[area] = state
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            if subscription.wants(area):
+                subscription.push(event)
+
+    def snapshot(self, subscription):
+        """Last known state of every area the subscriber may see"""
+        with self.lock:
+            return [{'area': area, 'data': state}
+                    for area, state in self.latest.items()
+                    if subscription.wants(area)]
+
+    def subscriber_count(self):
+        """Number of connected stream clients"""
+        with self.lock:
+            return len(self.subscribers)
+
+# Global broadcaster instance
+live_broadcaster = LiveBroadcaster()
+
+def get_broadcaster():
+    """Get the live broadcaster instance"""
+    return live_broadcaster
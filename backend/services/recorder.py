@@ -1,27 +1,50 @@
 """
 Historical Data Recorder Service
-Records crowd counts every 5 seconds for analytics
+Aggregates every live update in memory and flushes min/max/mean/last
+per area and zone every interval (5 seconds by default) for analytics
 """
 
+import os
 import threading
 import time
+from collections import deque
 from datetime import datetime
 from backend.db import get_db
+from backend.services.rollups import UPSERT_QUERY, rollup_rows
+from backend.services.retention import COUNTER_UPSERT_QUERY
+
+# Flush interval in seconds (RECORDER_INTERVAL env var overrides)
+DEFAULT_INTERVAL = float(os.getenv('RECORDER_INTERVAL', 5))
 
 class HistoricalRecorder:
-    def __init__(self, get_areas_state_func=None):
+    def __init__(self, get_areas_state_func=None, interval=None):
         self.running = False
         self.thread = None
-        self.interval = 5  # Record every 5 seconds
+        self.interval = interval or DEFAULT_INTERVAL
         self.get_areas_state = get_areas_state_func  # Function to get AREAS_STATE
         
+        # Running aggregates since the last flush:
+        # (area_name, zone_id_str or None) -> [sum, samples, min, max, last]
+        self.accumulators = {}
+        self.accumulators_lock = threading.Lock()
+        
+        # (flush time, rows written) for the last minute, for diagnostics
+        self.recent_writes = deque()
+        
+        # Cached id lookups (refreshed on invalidate_id_maps() or after id_map_ttl)
+        self.id_map_ttl = 300
+        self.area_ids = None      # area_name -> area_id
+        self.zone_keys = None     # {(area_id, zone_id), ...} that exist in zones
+        self.id_maps_loaded_at = 0
+        self.id_maps_lock = threading.Lock()
+        
     def start(self):
         """Start the recording service"""
         if not self.running:
             self.running = True
             self.thread = threading.Thread(target=self._record_loop, daemon=True)
             self.thread.start()
-            print("✅ Historical recorder started (5s interval)")
+            print(f"✅ Historical recorder started ({self.interval:g}s interval)")
     
     def stop(self):
         """Stop the recording service"""
@@ -30,6 +53,44 @@ class HistoricalRecorder:
             self.thread.join()
         print("⏹ Historical recorder stopped")
     
+    def observe(self, area_name, live_people, zone_counts):
+        """Fold one live update into the current interval's aggregates"""
+        with self.accumulators_lock:
+            self._accumulate((area_name, None), live_people)
+            for zone_id, count in (zone_counts or {}).items():
+                self._accumulate((area_name, str(zone_id)), count)
+    
+    def _accumulate(self, key, value):
+        """Update [sum, samples, min, max, last] for one series"""
+        acc = self.accumulators.get(key)
+        if acc is None:
+            self.accumulators[key] = [value, 1, value, value, value]
+        else:
+            acc[0] += value
+            acc[1] += 1
+            acc[2] = min(acc[2], value)
+            acc[3] = max(acc[3], value)
+            acc[4] = value
+    
+    def _take_accumulators(self):
+        """Swap out and return this interval's aggregates"""
+        with self.accumulators_lock:
+            accumulators, self.accumulators = self.accumulators, {}
+        return accumulators
+    
+    def _restore_accumulators(self, accumulators):
+        """Merge aggregates from a failed flush back in front of newer ones"""
+        with self.accumulators_lock:
+            for key, (total, samples, low, high, last) in accumulators.items():
+                acc = self.accumulators.get(key)
+                if acc is None:
+                    self.accumulators[key] = [total, samples, low, high, last]
+                else:
+                    acc[0] += total
+                    acc[1] += samples
+                    acc[2] = min(acc[2], low)
+                    acc[3] = max(acc[3], high)
+    
     def _record_loop(self):
         """Main recording loop"""
         while self.running:
@@ -41,9 +102,7 @@ class HistoricalRecorder:
             time.sleep(self.interval)
     
     def _record_snapshot(self):
-        """Record current counts to historical_counts table"""
-        import os
-        
+        """Record this interval's aggregates to historical_counts table"""
         # Get AREAS_STATE from the callback function
         if self.get_areas_state is None:
             print("❌ Recording error: No AREAS_STATE accessor provided!")
@@ -54,66 +113,136 @@ class HistoricalRecorder:
         db = get_db()
         timestamp = datetime.now()
         
-        # DEBUGGING: Check object IDs and PID
-        print(f"🔍 RECORDER - PID {os.getpid()} - id(AREAS_STATE) = {id(AREAS_STATE)}")
-        print(f"📊 Recording snapshot - AREAS_STATE: {AREAS_STATE}")
+        # Resolve ids before taking the aggregates, so an unreachable DB
+        # leaves them accumulating for the next flush
+        area_ids, zone_keys = self._get_id_maps(db)
+        if area_ids is None:
+            return
         
+        accumulators = self._take_accumulators()
+        
+        rows = []
         for area_name, state in AREAS_STATE.items():
-            try:
-                # Get area_id from database
-                area = db.execute_query(
-                    "SELECT area_id FROM areas WHERE area_name = %s",
-                    (area_name,),
-                    fetch_one=True
-                )
-                
-                if not area:
+            area_id = area_ids.get(area_name)
+            if area_id is None:
+                continue
+            
+            # Always record, even if zero (to track when areas are empty)
+            # Overall area count uses zone_id = NULL
+            series = [(None, None, state.get('live_people', 0))]
+            for zone_id_str, count in (state.get('zone_counts') or {}).items():
+                try:
+                    zone_id = int(zone_id_str)
+                except (ValueError, TypeError):
+                    # Skip invalid zone IDs
                     continue
-                
-                area_id = area['area_id']
-                live_people = state.get('live_people', 0)
-                zone_counts = state.get('zone_counts', {})
-                
-                # Always record, even if zero (to track when areas are empty)
-                # Record overall area count (zone_id = NULL)
-                db.execute_query(
-                    """
-                    INSERT INTO historical_counts (area_id, zone_id, count, timestamp)
-                    VALUES (%s, NULL, %s, %s)
-                    """,
-                    (area_id, live_people, timestamp)
-                )
-                
-                # Record individual zone counts
-                if zone_counts:
-                    for zone_id_str, count in zone_counts.items():
-                        try:
-                            zone_id = int(zone_id_str)
-                            
-                            # Verify zone exists in database
-                            zone_exists = db.execute_query(
-                                """
-                                SELECT id FROM zones 
-                                WHERE area_id = %s AND zone_id = %s
-                                """,
-                                (area_id, zone_id),
-                                fetch_one=True
-                            )
-                            
-                            if zone_exists:
-                                db.execute_query(
-                                    """
-                                    INSERT INTO historical_counts (area_id, zone_id, count, timestamp)
-                                    VALUES (%s, %s, %s, %s)
-                                    """,
-                                    (area_id, zone_id, count, timestamp)
-                                )
-                        except (ValueError, TypeError):
-                            # Skip invalid zone IDs
-                            continue
-            except Exception as e:
-                print(f"❌ Recording error for {area_name}: {e}")
+                if (area_id, zone_id) in zone_keys:
+                    series.append((zone_id, str(zone_id_str), count))
+            
+            for zone_id, zone_key, current in series:
+                acc = accumulators.get((area_name, zone_key))
+                if acc:
+                    total, samples, low, high, last = acc
+                    rows.append((area_id, zone_id, last, total / samples, low, high, samples, timestamp))
+                else:
+                    # No updates this interval: carry the current value forward
+                    rows.append((area_id, zone_id, current, current, current, current, 0, timestamp))
+        
+        if not self._write_rows(db, rows):
+            self._restore_accumulators(accumulators)
+    
+    def write_samples(self, samples):
+        """
+        Store samples captured in the past (e.g. replayed from a detection
+        client's offline spool) at their own timestamps.
+        
+        They bypass the interval aggregates, which describe the live state:
+        each sample becomes one historical_counts row per series plus its
+        rollups.
+        
+        Args:
+            samples: (area_name, observed_at datetime, live_people, zone_counts)
+        
+        Returns:
+            Number of rows written
+        """
+        db = get_db()
+        area_ids, zone_keys = self._get_id_maps(db)
+        if area_ids is None:
+            return 0
+        
+        rows = []
+        for area_name, observed_at, live_people, zone_counts in samples:
+            area_id = area_ids.get(area_name)
+            if area_id is None:
                 continue
+            rows.append((area_id, None, live_people, live_people, live_people, live_people, 1, observed_at))
+            for zone_id_str, count in (zone_counts or {}).items():
+                try:
+                    zone_id = int(zone_id_str)
+                except (ValueError, TypeError):
+                    continue
+                if (area_id, zone_id) in zone_keys:
+                    rows.append((area_id, zone_id, count, count, count, count, 1, observed_at))
+        
+        return len(rows) if self._write_rows(db, rows) else 0
+    
+    def _write_rows(self, db, rows):
+        """Insert historical_counts rows with their rollups and row counter"""
+        if not rows:
+            return True
+        
+        # Raw rows, their 1m/1h/1d rollups and the row counter:
+        # one transaction, one pooled connection
+        committed = db.execute_transaction([
+            (
+                """
+                INSERT INTO historical_counts
+                (area_id, zone_id, count, avg_count, min_count, max_count, sample_count, timestamp)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                rows
+            ),
+            (UPSERT_QUERY, rollup_rows(rows)),
+            (COUNTER_UPSERT_QUERY, [('historical_counts', len(rows))])
+        ])
+        
+        if committed:
+            now = time.time()
+            self.recent_writes.append((now, len(rows)))
+            while self.recent_writes and self.recent_writes[0][0] < now - 60:
+                self.recent_writes.popleft()
+        return committed
+    
+    def rows_last_minute(self):
+        """Rows written to historical_counts in the last 60 seconds"""
+        cutoff = time.time() - 60
+        return sum(n for t, n in list(self.recent_writes) if t >= cutoff)
+    
+    def invalidate_id_maps(self):
+        """Forget cached area/zone ids (call after areas or zones change)"""
+        with self.id_maps_lock:
+            self.area_ids = None
+            self.zone_keys = None
+    
+    def _get_id_maps(self, db):
+        """Return (area_ids, zone_keys), loading them with two queries when stale"""
+        with self.id_maps_lock:
+            if self.area_ids is not None and time.time() - self.id_maps_loaded_at < self.id_map_ttl:
+                return self.area_ids, self.zone_keys
+        
+        areas = db.execute_query("SELECT area_id, area_name FROM areas", fetch=True)
+        zones = db.execute_query("SELECT area_id, zone_id FROM zones", fetch=True)
+        if areas is None or zones is None:
+            return None, None
+        
+        area_ids = {row['area_name']: row['area_id'] for row in areas}
+        zone_keys = {(row['area_id'], row['zone_id']) for row in zones}
+        with self.id_maps_lock:
+            self.area_ids = area_ids
+            self.zone_keys = zone_keys
+            self.id_maps_loaded_at = time.time()
+        return area_ids, zone_keys
 
 
 # Global recorder instance (singleton pattern)
@@ -121,10 +250,9 @@ _recorder_instance = None
 _recorder_lock = threading.Lock()
 _recorder_process_id = None
 
-def get_recorder(get_areas_state_func=None):
+def get_recorder(get_areas_state_func=None, interval=None):
     """Get the singleton recorder instance"""
     global _recorder_instance, _recorder_process_id
-    import os
     current_pid = os.getpid()
     
     # If we're in a different process, reset the instance
@@ -134,20 +262,40 @@ def get_recorder(get_areas_state_func=None):
     if _recorder_instance is None:
         with _recorder_lock:
             if _recorder_instance is None:
-                _recorder_instance = HistoricalRecorder(get_areas_state_func)
+                _recorder_instance = HistoricalRecorder(get_areas_state_func, interval)
                 _recorder_process_id = current_pid
     return _recorder_instance
 
-def start_recorder(get_areas_state_func=None):
+def start_recorder(get_areas_state_func=None, interval=None):
     """Start the historical recorder service"""
-    import os
-    recorder = get_recorder(get_areas_state_func)
+    recorder = get_recorder(get_areas_state_func, interval)
     if not recorder.running:
-        print(f"🔵 Starting recorder in PID {os.getpid()}, Thread {threading.current_thread().ident}")
         recorder.start()
     else:
         print(f"⚠️  Recorder already running in PID {os.getpid()}")
 
+def record_observation(area_name, live_people, zone_counts):
+    """Feed a live update into the running recorder's aggregates"""
+    if _recorder_instance is not None and _recorder_instance.running:
+        _recorder_instance.observe(area_name, live_people, zone_counts)
+
+def record_historical(samples):
+    """Write past samples straight to history (0 rows if the recorder is not running)"""
+    if _recorder_instance is None or not _recorder_instance.running:
+        return 0
+    return _recorder_instance.write_samples(samples)
+
+def recorder_rows_last_minute():
+    """Recent write rate of the running recorder (0 if not running)"""
+    if _recorder_instance is None:
+        return 0
+    return _recorder_instance.rows_last_minute()
+
+def invalidate_recorder_cache():
+    """Drop the recorder's cached area/zone ids after admin changes"""
+    if _recorder_instance is not None:
+        _recorder_instance.invalidate_id_maps()
+
 def stop_recorder():
     """Stop the historical recorder service"""
     recorder = get_recorder()
@@ -0,0 +1,167 @@
+"""
+Data Retention Service
+Prunes raw historical_counts rows (and fine rollup tiers) past their
+retention age in small chunks, and keeps the maintained row counters in sync
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from backend.db import get_db
+
+# Ages in days (env vars override). Rollups are written together with the
+# raw rows, so pruning raw rows only drops per-interval detail: long-range
+# analytics keep working from count_rollups. The 1d tier is kept forever.
+RAW_RETENTION_DAYS = float(os.getenv('RAW_RETENTION_DAYS', 30))
+ROLLUP_RETENTION_DAYS = {
+    '1m': float(os.getenv('ROLLUP_1M_RETENTION_DAYS', 7)),
+    '1h': float(os.getenv('ROLLUP_1H_RETENTION_DAYS', 365))
+}
+
+COUNTER_UPSERT_QUERY = """
+    INSERT INTO table_counters (name, value) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE value = value + VALUES(value)
+"""
+
+def seed_counters(db):
+    """Initialise maintained row counters once with a real COUNT(*)"""
+    existing = db.execute_query(
+        "SELECT 1 FROM table_counters WHERE name = 'historical_counts'",
+        fetch_one=True
+    )
+    if existing:
+        return
+
+    total = db.execute_query("SELECT COUNT(*) as count FROM historical_counts", fetch_one=True)
+    db.execute_query(COUNTER_UPSERT_QUERY, ('historical_counts', total['count'] if total else 0))
+
+def get_counter(db, name):
+    """Read a maintained row counter"""
+    row = db.execute_query(
+        "SELECT value FROM table_counters WHERE name = %s",
+        (name,),
+        fetch_one=True
+    )
+    return int(row['value']) if row else 0
+
+class RetentionManager:
+    def __init__(self, interval=3600, chunk_size=5000):
+        self.running = False
+        self.thread = None
+        self.interval = interval      # Seconds between pruning passes
+        self.chunk_size = chunk_size  # Rows per DELETE so locks stay short
+        self.last_run = None
+        self.last_deleted = {}
+
+    def start(self):
+        """Start the retention service"""
+        if not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self._retention_loop, daemon=True)
+            self.thread.start()
+            print(f"✅ Retention manager started (raw rows kept {RAW_RETENTION_DAYS:g} days)")
+
+    def stop(self):
+        """Stop the retention service"""
+        self.running = False
+        if self.thread:
+            self.thread.join()
+        print("⏹ Retention manager stopped")
+
+    def _retention_loop(self):
+        """Main pruning loop"""
+        while self.running:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"❌ Retention error: {e}")
+
+            time.sleep(self.interval)
+
+    def run_once(self):
+        """Prune everything past its retention age"""
+        db = get_db()
+        now = datetime.now()
+        deleted = {}
+
+        cutoff = now - timedelta(days=RAW_RETENTION_DAYS)
+        deleted['historical_counts'] = self._delete_counted_chunked(
+            db, 'historical_counts', "timestamp < %s", (cutoff,)
+        )
+
+        for tier, days in ROLLUP_RETENTION_DAYS.items():
+            cutoff = now - timedelta(days=days)
+            deleted[f'rollups_{tier}'] = self._delete_chunked(
+                db,
+                "DELETE FROM count_rollups WHERE tier = %s AND bucket_start < %s LIMIT %s",
+                (tier, cutoff)
+            )
+
+        self.last_run = now
+        self.last_deleted = deleted
+        if any(deleted.values()):
+            print(f"🧹 Retention pass deleted: {deleted}")
+        return deleted
+
+    def _delete_chunked(self, db, query, params):
+        """Repeat a LIMITed DELETE until nothing is left to delete"""
+        total = 0
+        while True:
+            deleted = db.execute_query(query, params + (self.chunk_size,))
+            if not deleted:
+                break
+            total += deleted
+            if deleted < self.chunk_size:
+                break
+        return total
+
+    def _delete_counted_chunked(self, db, table, where, params):
+        """
+        Delete matching rows of a table with a maintained row counter.
+
+        Each chunk is picked by id, then deleted in the same transaction as
+        its counter update, so the counter never drifts from the table.
+        """
+        total = 0
+        while True:
+            rows = db.execute_query(
+                f"SELECT id FROM {table} WHERE {where} ORDER BY id LIMIT %s",
+                params + (self.chunk_size,),
+                fetch=True
+            )
+            if not rows:
+                break
+
+            ids = tuple(row['id'] for row in rows)
+            placeholders = ', '.join(['%s'] * len(ids))
+            committed = db.execute_transaction([
+                (f"DELETE FROM {table} WHERE id IN ({placeholders})", [ids]),
+                (COUNTER_UPSERT_QUERY, [(table, -len(ids))])
+            ])
+            if not committed:
+                break
+            total += len(ids)
+            if len(ids) < self.chunk_size:
+                break
+        return total
+
+    def stats(self):
+        """Return the last pruning pass"""
+        return {
+            'raw_retention_days': RAW_RETENTION_DAYS,
+            'rollup_retention_days': ROLLUP_RETENTION_DAYS,
+            'last_run': self.last_run.isoformat() if self.last_run else None,
+            'last_deleted': self.last_deleted
+        }
+
+# Global retention manager instance
+retention_manager = RetentionManager()
+
+def get_retention_manager():
+    """Get the retention manager instance"""
+    return retention_manager
+
+def start_retention():
+    """Start the retention service"""
+    retention_manager.start()
@@ -0,0 +1,121 @@
+"""
+Count Rollup Service
+Maintains 1-minute, 1-hour and 1-day aggregates of historical_counts so
+analytics queries scan a bounded number of buckets instead of raw rows
+"""
+
+from datetime import timedelta
+
+# Tier name -> bucket width in seconds (finest first)
+TIERS = {
+    '1m': 60,
+    '1h': 3600,
+    '1d': 86400
+}
+
+# zone_id stored for the whole-area series (historical_counts uses NULL)
+OVERALL_ZONE = 0
+
+# last_count only moves forward in time: replayed or late samples written
+# into an existing bucket must not replace a newer last value. MySQL applies
+# the assignments in order, so last_count is compared against the old last_at.
+UPSERT_QUERY = """
+    INSERT INTO count_rollups
+    (tier, area_id, zone_id, bucket_start, records, sum_count, min_count, max_count, last_count, last_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        records = records + VALUES(records),
+        sum_count = sum_count + VALUES(sum_count),
+        min_count = LEAST(min_count, VALUES(min_count)),
+        max_count = GREATEST(max_count, VALUES(max_count)),
+        last_count = IF(last_at IS NULL OR VALUES(last_at) >= last_at, VALUES(last_count), last_count),
+        last_at = GREATEST(COALESCE(last_at, VALUES(last_at)), VALUES(last_at))
+"""
+
+# SQL expression truncating historical_counts.timestamp to each tier
+_BUCKET_SQL = {
+    '1m': "DATE_FORMAT(timestamp, '%Y-%m-%d %H:%i:00')",
+    '1h': "DATE_FORMAT(timestamp, '%Y-%m-%d %H:00:00')",
+    '1d': "DATE(timestamp)"
+}
+
+def bucket_start(timestamp, tier):
+    """Truncate a datetime to the start of its bucket in a tier"""
+    if tier == '1m':
+        return timestamp.replace(second=0, microsecond=0)
+    if tier == '1h':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def bucket_origin(since, bucket_seconds):
+    """
+    Start of the bucket containing since, counting buckets of
+    bucket_seconds from local midnight.
+
+    Stored timestamps and rollup bucket_start values are local wall-clock
+    times, so buckets aligned this way start on local minute, hour and day
+    boundaries, the same boundaries the rollup tiers use.
+    """
+    midnight = bucket_start(since, '1d')
+    elapsed = (since - midnight).total_seconds()
+    return midnight + timedelta(seconds=elapsed // bucket_seconds * bucket_seconds)
+
+def pick_tier(span_seconds, max_buckets=1500):
+    """Finest tier that covers span_seconds in at most max_buckets buckets"""
+    for tier, width in TIERS.items():
+        if span_seconds / width <= max_buckets:
+            return tier
+    return '1d'
+
+def window_start(now, span_seconds, tier):
+    """First bucket_start to include for a window ending at now"""
+    return bucket_start(now - timedelta(seconds=span_seconds), tier)
+
+def rollup_rows(history_rows):
+    """
+    Expand recorder rows into rollup upsert parameters for every tier.
+
+    Args:
+        history_rows: (area_id, zone_id, count, avg_count, min_count,
+            max_count, sample_count, timestamp) as written to historical_counts
+
+    Returns:
+        Parameter tuples for UPSERT_QUERY
+    """
+    params = []
+    for area_id, zone_id, count, avg_count, min_count, max_count, _, timestamp in history_rows:
+        zone_key = OVERALL_ZONE if zone_id is None else zone_id
+        for tier in TIERS:
+            params.append((tier, area_id, zone_key, bucket_start(timestamp, tier),
+                           1, avg_count, min_count, max_count, count, timestamp))
+    return params
+
+def backfill_rollups(db):
+    """Build rollups from existing historical_counts (only if none exist yet)"""
+    existing = db.execute_query("SELECT 1 FROM count_rollups LIMIT 1", fetch_one=True)
+    if existing:
+        return
+
+    raw = db.execute_query("SELECT 1 FROM historical_counts LIMIT 1", fetch_one=True)
+    if not raw:
+        return
+
+    for tier, bucket_sql in _BUCKET_SQL.items():
+        db.execute_query(
+            f"""
+            INSERT INTO count_rollups
+            (tier, area_id, zone_id, bucket_start, records, sum_count, min_count, max_count, last_count, last_at)
+            SELECT
+                %s, area_id, COALESCE(zone_id, {OVERALL_ZONE}), {bucket_sql},
+                COUNT(*),
+                SUM(COALESCE(avg_count, count)),
+                MIN(COALESCE(min_count, count)),
+                MAX(COALESCE(max_count, count)),
+                SUBSTRING_INDEX(GROUP_CONCAT(count ORDER BY timestamp DESC), ',', 1),
+                MAX(timestamp)
+            FROM historical_counts
+            GROUP BY area_id, COALESCE(zone_id, {OVERALL_ZONE}), {bucket_sql}
+            """,
+            (tier,)
+        )
+    print("✅ Count rollups backfilled from historical data")
@@ -0,0 +1,172 @@
+"""
+Threshold Rules Engine
+Compiles per-area and per-zone threshold rules into numpy arrays so each
+state update evaluates every rule for its area in one vectorized pass
+"""
+
+import threading
+import time
+import numpy as np
+
+# Slot 0 of an area's count vector holds the area total; zones follow
+AREA_SLOT = 0
+
+class AreaRules:
+    """All enabled rules of one area, compiled to arrays"""
+
+    def __init__(self, area_id, rules, previous=None):
+        self.area_id = area_id
+
+        # Zones referenced by any rule, in slot order after the area total
+        self.zone_keys = sorted({str(r['zone_id']) for r in rules if r['zone_id'] is not None})
+        zone_slots = {key: i + 1 for i, key in enumerate(self.zone_keys)}
+
+        self.rule_ids = np.array([r['rule_id'] for r in rules], dtype=np.int64)
+        self.zone_ids = [r['zone_id'] for r in rules]
+        self.slots = np.array(
+            [AREA_SLOT if r['zone_id'] is None else zone_slots[str(r['zone_id'])] for r in rules],
+            dtype=np.intp
+        )
+        self.thresholds = np.array([r['threshold'] for r in rules], dtype=np.float64)
+        self.clear_thresholds = np.array(
+            [r['threshold'] if r['clear_threshold'] is None else r['clear_threshold'] for r in rules],
+            dtype=np.float64
+        )
+        self.sustain = np.array([r['sustain_seconds'] for r in rules], dtype=np.float64)
+        self.has_area_rule = bool((self.slots == AREA_SLOT).any())
+
+        # Per-rule state: whether the rule's alert is raised, and since when
+        # the count has been over the rule's limit (NaN when it is not)
+        self.active = np.zeros(len(rules), dtype=bool)
+        self.over_since = np.full(len(rules), np.nan)
+
+        # Keep state of unchanged rules across a recompile
+        if previous is not None:
+            previous_index = {int(rule_id): j for j, rule_id in enumerate(previous.rule_ids)}
+            for i, rule_id in enumerate(self.rule_ids):
+                j = previous_index.get(int(rule_id))
+                if j is not None:
+                    self.active[i] = previous.active[j]
+                    self.over_since[i] = previous.over_since[j]
+
+    def evaluate(self, live_count, zone_counts, now):
+        """
+        Apply one state update to every rule of the area.
+
+        An inactive rule is over its limit above threshold; an active rule
+        stays over until the count drops to clear_threshold (hysteresis).
+        A rule fires once it has been over for sustain_seconds.
+
+        Returns:
+            (indices of rules that fired, count observed by each rule)
+        """
+        zone_counts = zone_counts or {}
+        counts = np.array(
+            [live_count] + [zone_counts.get(key, 0) for key in self.zone_keys],
+            dtype=np.float64
+        )
+        observed = counts[self.slots]
+
+        limit = np.where(self.active, self.clear_thresholds, self.thresholds)
+        over = observed > limit
+
+        self.over_since = np.where(
+            over, np.where(np.isnan(self.over_since), now, self.over_since), np.nan
+        )
+        fired = over & ~self.active & (now - self.over_since >= self.sustain)
+        self.active = over & (self.active | fired)
+
+        return np.flatnonzero(fired), observed
+
+    def rearm(self, rule_ids):
+        """
+        Undo the firing of rules whose alerts could not be stored.
+
+        They stay over their limit since the same time, so they fire again
+        on the next update that is still over.
+        """
+        self.active[np.isin(self.rule_ids, list(rule_ids))] = False
+
+class RulesEngine:
+    def __init__(self, cache_ttl=300):
+        self.cache_ttl = cache_ttl
+        self.areas = None  # area_name -> AreaRules
+        self.loaded_at = 0
+        self.lock = threading.Lock()
+
+    def invalidate(self):
+        """Recompile rules on the next evaluation"""
+        with self.lock:
+            self.loaded_at = 0
+
+    def _load(self, db):
+        """Compile enabled rules per area, reading the DB only when stale"""
+        if self.areas is not None and time.time() - self.loaded_at < self.cache_ttl:
+            return self.areas
+
+        rows = db.execute_query(
+            """
+            SELECT r.rule_id, r.area_id, a.area_name, r.zone_id,
+                   r.threshold, r.clear_threshold, r.sustain_seconds
+            FROM threshold_rules r
+            JOIN areas a ON r.area_id = a.area_id
+            WHERE r.enabled = TRUE
+            ORDER BY r.rule_id
+            """,
+            fetch=True
+        )
+        if rows is None:
+            return self.areas or {}
+
+        by_area = {}
+        for row in rows:
+            by_area.setdefault((row['area_name'], row['area_id']), []).append(row)
+
+        previous = self.areas or {}
+        self.areas = {
+            area_name: AreaRules(area_id, rules, previous.get(area_name))
+            for (area_name, area_id), rules in by_area.items()
+        }
+        self.loaded_at = time.time()
+        return self.areas
+
+    def has_area_rule(self, db, area_name):
+        """Whether an area-wide rule replaces the global threshold for area_name"""
+        with self.lock:
+            area_rules = self._load(db).get(area_name)
+            return area_rules is not None and area_rules.has_area_rule
+
+    def rearm(self, area_name, rule_ids):
+        """Let rules whose alerts were not persisted fire again"""
+        with self.lock:
+            area_rules = (self.areas or {}).get(area_name)
+            if area_rules is not None:
+                area_rules.rearm(rule_ids)
+
+    def evaluate(self, db, area_name, live_count, zone_counts, observed_at):
+        """
+        Evaluate every rule of an area against one state update.
+
+        Returns:
+            Pending alert dicts for the rules that fired
+        """
+        with self.lock:
+            area_rules = self._load(db).get(area_name)
+            if area_rules is None:
+                return []
+
+            fired, observed = area_rules.evaluate(live_count, zone_counts, observed_at.timestamp())
+            return [
+                {
+                    'area': area_name,
+                    'area_id': area_rules.area_id,
+                    'zone_id': area_rules.zone_ids[i],
+                    'rule_id': int(area_rules.rule_ids[i]),
+                    'count': int(observed[i]),
+                    'threshold': int(area_rules.thresholds[i]),
+                    'threshold_id': None,
+                    'zone_details': None,
+                    'observed_at': observed_at
+                }
+                for i in fired
+            ]
@@ -0,0 +1,42 @@
+"""
+Live Stream Tickets
+Short-lived, single-use tickets that stand in for the JWT in the SSE stream
+URL, since EventSource cannot send an Authorization header and query strings
+end up in access logs
+"""
+
+import secrets
+import threading
+import time
+
+class StreamTicketStore:
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self.tickets = {}  # ticket -> (decoded token payload, expires_at)
+        self.lock = threading.Lock()
+
+    def issue(self, user):
+        """Create a ticket for an authenticated user's decoded token"""
+        ticket = secrets.token_urlsafe(32)
+        now = time.time()
+        with self.lock:
+            # Drop tickets that were never redeemed
+            for key in [k for k, (_, expires_at) in self.tickets.items() if expires_at < now]:
+                del self.tickets[key]
+            self.tickets[ticket] = (user, now + self.ttl)
+        return ticket
+
+    def redeem(self, ticket):
+        """The ticket's user payload, or None if unknown, used or expired"""
+        with self.lock:
+            entry = self.tickets.pop(ticket, None)
+        if entry is None or entry[1] < time.time():
+            return None
+        return entry[0]
+
+# Global ticket store instance
+stream_tickets = StreamTicketStore()
+
+def get_stream_tickets():
+    """Get the stream ticket store instance"""
+    return stream_tickets
@@ -0,0 +1,93 @@
+"""
+Zone Catalog Service
+Caches parsed zone JSON files so live endpoints don't touch the filesystem
+"""
+
+import json
+import os
+import threading
+import time
+
+class ZoneCatalog:
+    def __init__(self, check_interval=2.0):
+        self.check_interval = check_interval  # Seconds between mtime checks
+        self.zone_files = {}  # area -> absolute zone file path
+        self.entries = {}     # area -> {'mtime', 'total_zones', 'zones_info'}
+        self.last_check = 0
+        self.lock = threading.Lock()
+
+    def register(self, area, zone_file):
+        """Track an area's zone file"""
+        with self.lock:
+            self.zone_files[area] = os.path.abspath(zone_file)
+            self.entries.pop(area, None)
+            self.last_check = 0
+
+    def invalidate(self, area=None):
+        """Force a re-read of one area (or all) on the next lookup"""
+        with self.lock:
+            if area is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(area, None)
+            self.last_check = 0
+
+    def get(self, area):
+        """Return {'total_zones', 'zones_info'} for an area"""
+        with self.lock:
+            self._refresh_if_due()
+            entry = self.entries.get(area)
+        if entry is None:
+            return {'total_zones': 0, 'zones_info': []}
+        return {'total_zones': entry['total_zones'], 'zones_info': entry['zones_info']}
+
+    def _refresh_if_due(self):
+        """Stat zone files at most every check_interval and re-parse changed ones"""
+        now = time.time()
+        if now - self.last_check < self.check_interval:
+            return
+        self.last_check = now
+
+        for area, path in self.zone_files.items():
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                mtime = None
+
+            entry = self.entries.get(area)
+            if entry is not None and entry['mtime'] == mtime:
+                continue
+
+            zones = self._load(path) if mtime is not None else []
+            self.entries[area] = {
+                'mtime': mtime,
+                'total_zones': len(zones),
+                'zones_info': [{
+                    'id': zone.get('id', i+1),
+                    'points_count': len(zone.get('points', [])),
+                    'color': zone.get('color', [0, 255, 0])
+                } for i, zone in enumerate(zones)]
+            }
+
+    def _load(self, path):
+        """Parse a zone file (list of zones or {'zones': [...]})"""
+        try:
+            with open(path, 'r') as f:
+                content = f.read().strip()
+            if content:
+                zones = json.loads(content)
+                if isinstance(zones, list):
+                    return zones
+                elif isinstance(zones, dict):
+                    return zones.get('zones', [])
+            return []
+        except Exception as e:
+            print(f"Error loading {path}: {e}")
+            return []
+
+# Global zone catalog instance
+zone_catalog = ZoneCatalog()
+
+def get_zone_catalog():
+    """Get the zone catalog instance"""
+    return zone_catalog
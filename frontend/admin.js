@@ -12,6 +12,9 @@ let token = null;
 let currentUser = null;
 let charts = {};
 let allUsers = [];
+let usersPage = 1;
+let usersPages = 1;
+let usersSearchTimer = null;
 let allCameras = [];
 let currentZoneArea = null;
 let globalThreshold = 50;
@@ -27,6 +30,14 @@ let zoneDataCache = {
 
 const ZONE_CACHE_TTL = 10000; // Cache for 10 seconds
 
+// Live area state: pushed over Server-Sent Events, polled as a fallback
+const LIVE_POLL_INTERVAL = 1500;
+let liveState = {};
+let liveStream = null;
+let livePollTimer = null;
+let liveStreamReopenTimer = null;
+const LIVE_STREAM_RETRY_INTERVAL = 5000;
+
 // Auth check
 function checkAuth() {
     token = localStorage.getItem('crowdcount_token');
@@ -144,8 +155,7 @@ function setupCharts() {
 
 // Data fetching
 function startDataFetching() {
-    fetchLiveData();
-    setInterval(fetchLiveData, 1500); // Smoother at 1.5s
+    startLiveUpdates();
     
     fetchHistoricalData();
     setInterval(fetchHistoricalData, 10000);
@@ -293,12 +303,109 @@ async function deleteZone(area, zoneId) {
 }
 
 
+// Live updates
+function startLiveUpdates() {
+    if (window.EventSource) {
+        openLiveStream();
+    } else {
+        startLivePolling();
+    }
+}
+
+async function openLiveStream() {
+    const ticket = await fetchStreamTicket();
+    if (!ticket) {
+        startLivePolling();
+        scheduleLiveStreamReopen();
+        return;
+    }
+    
+    liveStream = new EventSource(`${API_BASE}/api/live/stream?ticket=${encodeURIComponent(ticket)}`);
+    
+    liveStream.addEventListener('open', stopLivePolling);
+    
+    liveStream.addEventListener('state', (event) => {
+        const update = JSON.parse(event.data);
+        liveState[update.area] = { ...(liveState[update.area] || {}), ...update.data };
+        renderLiveData();
+    });
+    
+    liveStream.addEventListener('expired', () => {
+        liveStream.close();
+        liveStream = null;
+        startLivePolling();
+    });
+    
+    liveStream.onerror = () => {
+        // Tickets are single-use, so reconnect with a fresh one rather than
+        // letting EventSource retry the old URL; poll until the stream is back
+        startLivePolling();
+        if (liveStream) {
+            liveStream.close();
+            liveStream = null;
+        }
+        scheduleLiveStreamReopen();
+    };
+}
+
+async function fetchStreamTicket() {
+    try {
+        const response = await fetch(`${API_BASE}/api/live/stream/ticket`, {
+            method: 'POST',
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+        if (!response.ok) return null;
+        const data = await response.json();
+        return data.ticket;
+    } catch (error) {
+        console.error('Error fetching stream ticket:', error);
+        return null;
+    }
+}
+
+function scheduleLiveStreamReopen() {
+    if (liveStreamReopenTimer) return;
+    liveStreamReopenTimer = setTimeout(() => {
+        liveStreamReopenTimer = null;
+        openLiveStream();
+    }, LIVE_STREAM_RETRY_INTERVAL);
+}
+
+function isLiveStreamOpen() {
+    return liveStream !== null && liveStream.readyState === EventSource.OPEN;
+}
+
+function startLivePolling() {
+    if (livePollTimer) return;
+    fetchLiveData();
+    livePollTimer = setInterval(fetchLiveData, LIVE_POLL_INTERVAL);
+}
+
+function stopLivePolling() {
+    if (!livePollTimer) return;
+    clearInterval(livePollTimer);
+    livePollTimer = null;
+}
+
 async function fetchLiveData() {
     try {
         const areas = ['entrance', 'retail', 'foodcourt'];
         const responses = await Promise.all(
             areas.map(area => fetch(`${API_BASE}/live/${area}`).then(r => r.json()))
         );
+        responses.forEach((data, i) => { liveState[areas[i]] = data; });
+        renderLiveData();
+    } catch (error) {
+        console.error('Fetch error:', error);
+        document.getElementById('api-status').textContent = 'Error';
+        document.getElementById('api-status').style.color = 'var(--danger)';
+    }
+}
+
+function renderLiveData() {
+    try {
+        const areas = ['entrance', 'retail', 'foodcourt'];
+        const responses = areas.map(area => liveState[area] || {});
         
         // Check for threshold violations
         const exceededAreas = [];
@@ -332,9 +439,7 @@ async function fetchLiveData() {
         document.getElementById('api-status').textContent = 'Connected';
         document.getElementById('api-status').style.color = 'var(--success)';
     } catch (error) {
-        console.error('Fetch error:', error);
-        document.getElementById('api-status').textContent = 'Error';
-        document.getElementById('api-status').style.color = 'var(--danger)';
+        console.error('Render error:', error);
     }
 }
 
@@ -393,7 +498,7 @@ async function fetchHistoricalData() {
         const areas = ['entrance', 'retail', 'foodcourt'];
         const responses = await Promise.all(
             areas.map(area => 
-                fetch(`${API_BASE}/api/history/${area}?limit=50&hours=1`, {
+                fetch(`${API_BASE}/api/history/${area}?points=60&hours=1`, {
                     headers: { 'Authorization': `Bearer ${token}` }
                 })
                 .then(r => r.json())
@@ -456,19 +561,43 @@ async function fetchHistoricalData() {
 }
 
 // User Management
-async function loadUsers() {
+async function loadUsers(page = usersPage) {
     try {
-        const response = await fetch(`${API_BASE}/api/admin/users`, {
+        const params = new URLSearchParams({ page, per_page: 50 });
+        const search = document.getElementById('users-search')?.value.trim();
+        if (search) params.set('q', search);
+        
+        const response = await fetch(`${API_BASE}/api/admin/users?${params}`, {
             headers: { 'Authorization': `Bearer ${token}` }
         });
         const data = await response.json();
         allUsers = data.users || [];
+        usersPage = data.page || 1;
+        usersPages = Math.max(data.pages || 1, 1);
         renderUsersTable();
+        renderUsersPager(data.total || 0);
     } catch (error) {
         console.error('Load users error:', error);
     }
 }
 
+function searchUsers() {
+    // Debounce so typing doesn't fire a request per keystroke
+    clearTimeout(usersSearchTimer);
+    usersSearchTimer = setTimeout(() => loadUsers(1), 300);
+}
+
+function renderUsersPager(total) {
+    const pager = document.getElementById('users-pager');
+    if (!pager) return;
+    
+    pager.innerHTML = `
+        <button onclick="loadUsers(${usersPage - 1})" class="btn-outline" style="padding: 0.5rem 1rem;" ${usersPage <= 1 ? 'disabled' : ''}>Previous</button>
+        <span style="color: var(--text-secondary);">Page ${usersPage} of ${usersPages} (${total} users)</span>
+        <button onclick="loadUsers(${usersPage + 1})" class="btn-outline" style="padding: 0.5rem 1rem;" ${usersPage >= usersPages ? 'disabled' : ''}>Next</button>
+    `;
+}
+
 function renderUsersTable() {
     const tbody = document.getElementById('users-table-body');
     if (!allUsers.length) {
@@ -1544,8 +1673,11 @@ async function updateVideoFrame() {
     if (!videoCanvas || !videoCtx) return;
     
     try {
-        const response = await fetch(`${API_BASE}/live/${currentVideoArea}`);
-        const data = await response.json();
+        let data = liveState[currentVideoArea] || {};
+        if (!isLiveStreamOpen()) {
+            const response = await fetch(`${API_BASE}/live/${currentVideoArea}`);
+            data = await response.json();
+        }
         
         // Update info display
         const peopleEl = document.getElementById('people-display');
@@ -1635,8 +1767,11 @@ async function updateHeatmaps() {
     
     for (const area of areas) {
         try {
-            const response = await fetch(`${API_BASE}/live/${area}`);
-            const data = await response.json();
+            let data = liveState[area] || {};
+            if (!isLiveStreamOpen()) {
+                const response = await fetch(`${API_BASE}/live/${area}`);
+                data = await response.json();
+            }
             heatmapData[area] = data.zone_counts || {};
             await renderHeatmap(area);
         } catch (error) {
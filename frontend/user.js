@@ -16,6 +16,14 @@ let charts = {};
 let globalThreshold = 50;
 let alertedAreas = new Set();
 
+// Live area state: pushed over Server-Sent Events, polled as a fallback
+const LIVE_POLL_INTERVAL = 2000;
+let liveState = {};
+let liveStream = null;
+let livePollTimer = null;
+let liveStreamReopenTimer = null;
+const LIVE_STREAM_RETRY_INTERVAL = 5000;
+
 // Auth check
 function checkAuth() {
     token = localStorage.getItem('crowdcount_token');
@@ -231,13 +239,93 @@ function setupCharts() {
 function startDataFetching() {
     if (visibleAreas.length === 0) return;
     
-    fetchLiveData();
-    setInterval(fetchLiveData, 2000);
+    startLiveUpdates();
     
     fetchHistoricalData();
     setInterval(fetchHistoricalData, 10000);
 }
 
+// Live updates
+function startLiveUpdates() {
+    if (window.EventSource) {
+        openLiveStream();
+    } else {
+        startLivePolling();
+    }
+}
+
+async function openLiveStream() {
+    const ticket = await fetchStreamTicket();
+    if (!ticket) {
+        startLivePolling();
+        scheduleLiveStreamReopen();
+        return;
+    }
+    
+    const areas = encodeURIComponent(visibleAreas.join(','));
+    liveStream = new EventSource(`${API_BASE}/api/live/stream?ticket=${encodeURIComponent(ticket)}&areas=${areas}`);
+    
+    liveStream.addEventListener('open', stopLivePolling);
+    
+    liveStream.addEventListener('state', (event) => {
+        const update = JSON.parse(event.data);
+        liveState[update.area] = { ...(liveState[update.area] || {}), ...update.data };
+        renderLiveData();
+    });
+    
+    liveStream.addEventListener('expired', () => {
+        liveStream.close();
+        liveStream = null;
+        startLivePolling();
+    });
+    
+    liveStream.onerror = () => {
+        // Tickets are single-use, so reconnect with a fresh one rather than
+        // letting EventSource retry the old URL; poll until the stream is back
+        startLivePolling();
+        if (liveStream) {
+            liveStream.close();
+            liveStream = null;
+        }
+        scheduleLiveStreamReopen();
+    };
+}
+
+async function fetchStreamTicket() {
+    try {
+        const response = await fetch(`${API_BASE}/api/live/stream/ticket`, {
+            method: 'POST',
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+        if (!response.ok) return null;
+        const data = await response.json();
+        return data.ticket;
+    } catch (error) {
+        console.error('Error fetching stream ticket:', error);
+        return null;
+    }
+}
+
+function scheduleLiveStreamReopen() {
+    if (liveStreamReopenTimer) return;
+    liveStreamReopenTimer = setTimeout(() => {
+        liveStreamReopenTimer = null;
+        openLiveStream();
+    }, LIVE_STREAM_RETRY_INTERVAL);
+}
+
+function startLivePolling() {
+    if (livePollTimer) return;
+    fetchLiveData();
+    livePollTimer = setInterval(fetchLiveData, LIVE_POLL_INTERVAL);
+}
+
+function stopLivePolling() {
+    if (!livePollTimer) return;
+    clearInterval(livePollTimer);
+    livePollTimer = null;
+}
+
 async function fetchLiveData() {
     try {
         const responses = await Promise.all(
@@ -247,6 +335,18 @@ async function fetchLiveData() {
                     .catch(err => ({ live_people: 0, zone_counts: {} }))
             )
         );
+        responses.forEach((data, i) => { liveState[visibleAreas[i]] = data; });
+        renderLiveData();
+    } catch (error) {
+        console.error('Fetch error:', error);
+        document.getElementById('api-status').textContent = 'Error';
+        document.getElementById('api-status').style.color = 'var(--danger)';
+    }
+}
+
+function renderLiveData() {
+    try {
+        const responses = visibleAreas.map(area => liveState[area] || { live_people: 0, zone_counts: {} });
         
         const counts = [];
         const exceededAreas = [];
@@ -287,9 +387,7 @@ async function fetchLiveData() {
         document.getElementById('last-update').textContent = new Date().toLocaleTimeString();
         
     } catch (error) {
-        console.error('Fetch error:', error);
-        document.getElementById('api-status').textContent = 'Error';
-        document.getElementById('api-status').style.color = 'var(--danger)';
+        console.error('Render error:', error);
     }
 }
 
@@ -13,21 +13,42 @@ import datetime
 import threading
 import time
 import numpy as np
-from utils.camera_feed import open_camera, get_camera_frame, release_camera
+from utils.camera_feed import FrameSource
 import utils.zones as zone_mod
-from utils.yolomodule import week2_process_frame, week2_set_zone_file, week2_reload_zones
+from utils.frame_result import annotate_frame
+from utils.inference_engine import BatchInferenceEngine
+from utils.detection_workers import DetectionWorkerPool
+from utils.ingest_client import IngestClient
 import subprocess
 import requests
 import json
 import os
+import argparse
 
 # Backend integration
 BACKEND_URL = "http://127.0.0.1:5000"
-BACKEND_AVAILABLE = True
-BACKEND_RETRY_TIME = 0  # Timestamp to retry backend after errors
+BACKEND_FLUSH_INTERVAL = 1.0  # Seconds between batched POST /ingest sends
+BACKEND_SPOOL_FILE = "spool/ingest_spool.jsonl"  # Samples kept while backend is down
+ingest_client = IngestClient(BACKEND_URL, flush_interval=BACKEND_FLUSH_INTERVAL,
+                             spool_file=BACKEND_SPOOL_FILE)
+
+# Shared batched YOLO inference (one forward pass for all areas' latest frames)
+BATCH_MAX_WAIT = 0.02  # Seconds to wait for other areas to join a batch
+inference_engine = None  # Created in main() for in-process detection
+
+# utils.yolomodule loads the YOLO model on import, so it is imported in main()
+# only for in-process detection; in process mode the model lives in the
+# workers and never in this coordinator
+yolomodule = None
+
+# Detection mode:
+#   "batched" - area threads share one in-process batched YOLO engine
+#   "process" - each group of areas runs detection + tracking in its own
+#               worker process (frames via shared memory), one core per group
+DETECTION_MODE = os.getenv("CROWDCOUNT_DETECTION_MODE", "batched")
+PROCESS_AREA_GROUPS = [["entrance"], ["retail"], ["foodcourt"]]
+worker_pool = None  # Created in main() when DETECTION_MODE == "process"
 
-# Thread lock for YOLO processing (prevents race conditions)
-yolo_lock = threading.Lock()
 
 # Zone sync tracking
 zone_file_timestamps = {}
@@ -71,36 +92,8 @@ def sync_zones_from_backend(area_id):
         return False
 
 def update_backend(area, live_people, zone_counts):
-    """Update backend with current metrics"""
-    global BACKEND_AVAILABLE, BACKEND_RETRY_TIME
-    
-    current_time = time.time()
-    
-    # If backend was unavailable, retry after 10 seconds
-    if not BACKEND_AVAILABLE:
-        if current_time - BACKEND_RETRY_TIME > 10:
-            BACKEND_AVAILABLE = True
-            print(f"🔄 Retrying backend connection...")
-        else:
-            return
-    
-    try:
-        response = requests.post(
-            f"{BACKEND_URL}/update/{area}", 
-            json={
-                'live_people': live_people,
-                'zone_counts': zone_counts
-            },
-            timeout=3  # Increased from 1 to 3 seconds
-        )
-        if response.status_code == 200:
-            print(f"✅ {area}: {live_people} people | zones: {zone_counts}")
-        else:
-            print(f"⚠️ Backend returned status {response.status_code} for {area}")
-    except Exception as e:
-        print(f"❌ Backend error for {area}: {e}")
-        BACKEND_AVAILABLE = False
-        BACKEND_RETRY_TIME = current_time
+    """Publish current metrics (coalesced per area, sent or spooled off-thread)"""
+    ingest_client.submit(area, live_people, zone_counts)
 
 # Area configurations
 AREAS_CONFIG = {
@@ -130,13 +123,17 @@ AREAS_CONFIG = {
 DISPLAY_WIDTH = 800
 DISPLAY_HEIGHT = 600
 
+# Set by main() to stop every area loop (Ctrl+C, --duration)
+stop_event = threading.Event()
+
 
 class AreaEditor:
     """Independent zone editor for each area"""
     
-    def __init__(self, area_id, config):
+    def __init__(self, area_id, config, headless=False):
         self.area_id = area_id
         self.config = config
+        self.headless = headless  # No windows, overlays or key handling
         self.name = config["name"]
         self.zone_file = config["zone_file"]
         
@@ -149,12 +146,19 @@ class AreaEditor:
         self.paused = False
         
         # Data
+        self._overlay = None  # Cached zone/HUD layer, see draw_ui
         self.zones = zone_mod.load_zones(self.zone_file)
         self.current_frame = None
         self.live_count = 0
         self.zone_counts = {}
         self.last_zone_check = time.time()
         
+        # Throughput
+        self.frames_processed = 0
+        self.frames_failed = 0  # Frames skipped after a detector timeout/error
+        self.started_at = None
+        self.stopped_at = None
+        
         # Initialize zone file timestamp
         if os.path.exists(self.zone_file):
             with zone_sync_lock:
@@ -162,6 +166,13 @@ class AreaEditor:
         
         print(f"✅ Initialized {self.name} - {len(self.zones)} zones loaded")
     
+    def _reload_detection_zones(self):
+        """Reload zones wherever detection for this area runs"""
+        if worker_pool is not None:
+            worker_pool.reload(self.area_id)
+        else:
+            yolomodule.week2_reload_zones(self.zone_file)
+    
     def mouse_callback(self, event, x, y, flags, param):
         """Handle mouse events for zone drawing"""
         self.mouse_pos = (x, y)
@@ -205,8 +216,7 @@ class AreaEditor:
             zone_mod.save_zones(self.zone_file, self.zones)
             
             # Reload zones for YOLO processing
-            week2_set_zone_file(self.zone_file)
-            week2_reload_zones()
+            self._reload_detection_zones()
             self.zones = zone_mod.load_zones(self.zone_file)
             
             print(f"✅ Rectangle zone added to {self.name} | Total: {len(self.zones)}")
@@ -236,8 +246,7 @@ class AreaEditor:
             zone_mod.save_zones(self.zone_file, self.zones)
             
             # Reload zones for YOLO processing
-            week2_set_zone_file(self.zone_file)
-            week2_reload_zones()
+            self._reload_detection_zones()
             self.zones = zone_mod.load_zones(self.zone_file)
             
             print(f"✅ Polygon zone added to {self.name} | Total: {len(self.zones)}")
@@ -245,43 +254,107 @@ class AreaEditor:
         self.drawing_points = []
         self.mode = 'normal'
     
-    def draw_ui(self, frame):
-        """Draw UI overlay with zones and controls"""
-        display = cv2.resize(frame, (DISPLAY_WIDTH, DISPLAY_HEIGHT))
-        
-        # Calculate scaling
-        orig_h, orig_w = frame.shape[:2]
+    @property
+    def zones(self):
+        return self._zones
+    
+    @zones.setter
+    def zones(self, zones):
+        # Any zone change invalidates the cached overlay layer
+        self._zones = zones
+        self._overlay = None
+    
+    def _build_overlay(self, orig_w, orig_h):
+        """Pre-render zone fills, borders and static HUD into a cached layer.
+
+        Returns (key, color, weights_frame, weights_layer, labels): the layer's
+        BGR color, per-pixel blend weights for the frame and the layer (the
+        layer's alpha channel), and the display-space label anchor per zone.
+        """
         scale_x = DISPLAY_WIDTH / orig_w
         scale_y = DISPLAY_HEIGHT / orig_h
-        
-        # Draw saved zones
+        color = np.zeros((DISPLAY_HEIGHT, DISPLAY_WIDTH, 3), np.uint8)
+        alpha = np.zeros((DISPLAY_HEIGHT, DISPLAY_WIDTH), np.float32)
+        zone_color = self.config["color"]
+        
+        # Zone fills: each zone blends 20% of its color, overlaps compound
+        coverage = np.zeros((DISPLAY_HEIGHT, DISPLAY_WIDTH), np.uint8)
+        scratch = np.zeros_like(coverage)
+        polygons = []
+        labels = []
         for zone in self.zones:
             scaled_points = [
                 [int(p[0] * scale_x), int(p[1] * scale_y)] 
                 for p in zone["points"]
             ]
             pts = np.array(scaled_points, np.int32).reshape((-1, 1, 2))
+            polygons.append(pts)
             
-            # Zone fill (semi-transparent)
-            overlay = display.copy()
-            cv2.fillPoly(overlay, [pts], self.config["color"])
-            cv2.addWeighted(overlay, 0.2, display, 0.8, 0, display)
-            
-            # Zone border
-            cv2.polylines(display, [pts], True, self.config["color"], 3)
-            
-            # Zone label with count
-            zone_id = zone.get("id", "?")
-            count = self.zone_counts.get(zone_id, 0)
+            scratch[:] = 0
+            cv2.fillPoly(scratch, [pts], 1)
+            coverage += scratch
             
             M = cv2.moments(pts)
             if M["m00"] != 0:
-                cx = int(M["m10"] / M["m00"])
-                cy = int(M["m01"] / M["m00"])
-                cv2.putText(display, f"Zone {zone_id}: {count}", 
-                           (cx - 50, cy),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, 
-                           self.config["color"], 2)
+                labels.append((zone.get("id", "?"),
+                               (int(M["m10"] / M["m00"]) - 50, int(M["m01"] / M["m00"]))))
+        
+        filled = coverage > 0
+        color[filled] = zone_color
+        alpha[filled] = 1.0 - np.power(0.8, coverage[filled])
+        
+        # Opaque elements: borders, HUD bars and static text. Each is drawn
+        # on the color layer and, in white, on the opacity mask.
+        opaque = np.zeros((DISPLAY_HEIGHT, DISPLAY_WIDTH), np.uint8)
+        
+        for pts in polygons:
+            cv2.polylines(color, [pts], True, zone_color, 3)
+            cv2.polylines(opaque, [pts], True, 255, 3)
+        
+        # HUD - Top bar
+        cv2.rectangle(color, (0, 0), (DISPLAY_WIDTH, 110), (40, 40, 40), -1)
+        cv2.rectangle(opaque, (0, 0), (DISPLAY_WIDTH, 110), 255, -1)
+        
+        static_text = [(self.name, (10, 30), 0.9, (255, 255, 255), 2)]
+        
+        # Instructions - Bottom bar
+        instructions = [
+            "R-Rectangle | N-Polygon | F-Finish | S-Save | D-Delete | SPACE-Pause | Q-Quit"
+        ]
+        
+        y_start = DISPLAY_HEIGHT - 30
+        for text in instructions:
+            static_text.append((text, (10, y_start), 0.5, (255, 255, 255), 1))
+            y_start += 20
+        
+        for text, org, scale, text_color, thickness in static_text:
+            cv2.putText(color, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale, text_color, thickness)
+            cv2.putText(opaque, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale, 255, thickness)
+        
+        alpha[opaque > 0] = 1.0
+        
+        key = (orig_w, orig_h, DISPLAY_WIDTH, DISPLAY_HEIGHT)
+        return key, color, 1.0 - alpha, alpha, labels
+    
+    def draw_ui(self, frame):
+        """Draw UI overlay with zones and controls"""
+        display = cv2.resize(frame, (DISPLAY_WIDTH, DISPLAY_HEIGHT))
+        
+        # Composite the cached zone/HUD layer in one pass; it is rebuilt only
+        # when zones or the frame/window size change
+        orig_h, orig_w = frame.shape[:2]
+        key = (orig_w, orig_h, DISPLAY_WIDTH, DISPLAY_HEIGHT)
+        if self._overlay is None or self._overlay[0] != key:
+            self._overlay = self._build_overlay(orig_w, orig_h)
+        _, layer_color, weights_frame, weights_layer, labels = self._overlay
+        display = cv2.blendLinear(display, layer_color, weights_frame, weights_layer)
+        
+        # Zone labels with live counts
+        for zone_id, anchor in labels:
+            count = self.zone_counts.get(zone_id, 0)
+            cv2.putText(display, f"Zone {zone_id}: {count}", anchor,
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, 
+                       self.config["color"], 2)
         
         # Draw current drawing
         if self.mode == "draw_rect" and self.rect_dragging and self.rect_start:
@@ -305,12 +378,8 @@ class AreaEditor:
                         self.mouse_pos, 
                         (0, 255, 255), 2)
         
-        # HUD - Top bar
+        # HUD - dynamic values (bar and title come from the cached layer)
         ts = datetime.datetime.now().strftime('%H:%M:%S')
-        cv2.rectangle(display, (0, 0), (DISPLAY_WIDTH, 110), (40, 40, 40), -1)
-        
-        cv2.putText(display, self.name, (10, 30), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 255), 2)
         cv2.putText(display, ts, (10, 60), 
                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 1)
         
@@ -330,17 +399,6 @@ class AreaEditor:
             cv2.putText(display, mode_text, (DISPLAY_WIDTH - 300, 30), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
         
-        # Instructions - Bottom bar
-        instructions = [
-            "R-Rectangle | N-Polygon | F-Finish | S-Save | D-Delete | SPACE-Pause | Q-Quit"
-        ]
-        
-        y_start = DISPLAY_HEIGHT - 30
-        for text in instructions:
-            cv2.putText(display, text, (10, y_start), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-            y_start += 20
-        
         return display
     
     def handle_key(self, key):
@@ -381,8 +439,7 @@ class AreaEditor:
                     zone_mod.save_zones(self.zone_file, self.zones)
                     
                     # Reload zones for YOLO processing
-                    week2_set_zone_file(self.zone_file)
-                    week2_reload_zones()
+                    self._reload_detection_zones()
                     self.zones = zone_mod.load_zones(self.zone_file)
                     
                     print(f"✅ {self.name}: Deleted zone {zone_id}")
@@ -392,20 +449,8 @@ class AreaEditor:
         
         return True  # Continue running
     
-    def run(self):
-        """Main processing loop for this area"""
-        print(f"🎬 Starting {self.name}...")
-        
-        # Set zone file for YOLO processing
-        week2_set_zone_file(self.zone_file)
-        
-        # Open local video file
-        video_path = self.config["video"]
-        cap = open_camera(video_path)
-        if cap is None:
-            print(f"❌ Failed to open {self.name} stream")
-            return
-        
+    def _open_window(self):
+        """Create and position this area's OpenCV window"""
         # Create window (use simple name without emojis for OpenCV)
         window_name = self.config["name"].split()[-1]  # Extract: "Entrance", "Area", "Court"
         if "Entrance" in self.config["name"]:
@@ -425,12 +470,46 @@ class AreaEditor:
         # Set mouse callback
         cv2.setMouseCallback(window_name, self.mouse_callback)
         
+        return window_name
+    
+    def throughput(self):
+        """Frames processed and average FPS for this area"""
+        end = self.stopped_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0
+        return {
+            'frames': self.frames_processed,
+            'failed': self.frames_failed,
+            'seconds': round(elapsed, 1),
+            'fps': round(self.frames_processed / elapsed, 2) if elapsed > 0 else 0
+        }
+    
+    def run(self):
+        """Main processing loop for this area"""
+        print(f"🎬 Starting {self.name}...")
+        
+        # Set zone file for YOLO processing
+        if worker_pool is None:
+            yolomodule.week2_set_zone_file(self.zone_file)
+        
+        # Open local video file
+        video_path = self.config["video"]
+        source = FrameSource(video_path)
+        if not source.start():
+            print(f"❌ Failed to open {self.name} stream")
+            return
+        
+        if worker_pool is None:
+            inference_engine.register(self.area_id)
+        
+        window_name = None if self.headless else self._open_window()
+        
         last_backend_update = 0
         BACKEND_UPDATE_INTERVAL = 2.0
         
         print(f"✅ {self.name} ready!")
+        self.started_at = time.time()
         
-        while True:
+        while not stop_event.is_set():
             # Pause handling
             if self.paused:
                 key = cv2.waitKey(50) & 0xFF
@@ -438,12 +517,13 @@ class AreaEditor:
                     break
                 continue
             
-            # Get frame
-            ret, frame = get_camera_frame(cap)
+            # Get frame (decoded ahead on the source's reader thread;
+            # looping files are rewound there too)
+            ret, frame = source.read(timeout=1.0)
             if not ret or frame is None:
-                # Video ended - loop it
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                time.sleep(0.1)
+                if source.finished:
+                    print(f"⏹ {self.name}: stream ended")
+                    break
                 continue
             
             self.current_frame = frame
@@ -453,25 +533,46 @@ class AreaEditor:
             if current_time - self.last_zone_check >= 5.0:
                 if check_zone_file_updates(self.area_id, self.zone_file):
                     # Zones have been updated - reload them
-                    with yolo_lock:
-                        self.zones = zone_mod.load_zones(self.zone_file)
-                        week2_set_zone_file(self.zone_file)
-                        week2_reload_zones()
+                    self.zones = zone_mod.load_zones(self.zone_file)
+                    self._reload_detection_zones()
                     print(f"🔄 {self.name}: Zones reloaded from file ({len(self.zones)} zones)")
                 self.last_zone_check = current_time
             
-            # Process with YOLO (thread-safe)
-            with yolo_lock:
-                week2_set_zone_file(self.zone_file)
-                processed_frame, self.zone_counts, self.live_count = week2_process_frame(frame.copy())
+            try:
+                if worker_pool is not None:
+                    # Detect + track in this area's worker process
+                    result = worker_pool.process(self.area_id, frame)
+                else:
+                    # Detect via the shared batched engine (or skip on tracker-only
+                    # frames), then track/count for this area
+                    detections = None
+                    detect_seconds = None
+                    if yolomodule.week2_should_detect(self.zone_file):
+                        start = time.time()
+                        detections = inference_engine.infer(self.area_id, frame)
+                        detect_seconds = time.time() - start
+                    result = yolomodule.week2_count_frame(self.zone_file, detections, detect_seconds)
+            except Exception as e:
+                # One slow or failed frame must not end this area's thread
+                self.frames_failed += 1
+                print(f"⚠️ {self.name}: skipped frame ({e})")
+                continue
+            self.zone_counts = result.zone_counts
+            self.live_count = result.live_count
+            self.frames_processed += 1
             
             # Update backend periodically
             if current_time - last_backend_update >= BACKEND_UPDATE_INTERVAL:
                 update_backend(self.area_id, self.live_count, self.zone_counts)
                 last_backend_update = current_time
             
-            # Draw UI
-            display = self.draw_ui(processed_frame)
+            if self.headless:
+                continue
+            
+            # Render only when someone is viewing; the frame is ours (the
+            # source hands out a fresh buffer each read), so draw in place
+            annotate_frame(frame, result)
+            display = self.draw_ui(frame)
             
             # Show
             cv2.imshow(window_name, display)
@@ -489,11 +590,16 @@ class AreaEditor:
                 break
         
         # Cleanup
-        release_camera(cap)
-        try:
-            cv2.destroyWindow(window_name)
-        except:
-            pass
+        self.stopped_at = time.time()
+        if worker_pool is None:
+            inference_engine.unregister(self.area_id)
+        print(f"📈 {self.name} source: {source.stats()}")
+        source.release()
+        if window_name is not None:
+            try:
+                cv2.destroyWindow(window_name)
+            except:
+                pass
         print(f"👋 {self.name} stopped")
 
 
@@ -511,12 +617,54 @@ def zone_sync_worker():
             # Silent fail - don't spam console
             pass
 
+def parse_args():
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="CrowdCount multi-area detection engine")
+    parser.add_argument("--headless", action="store_true",
+                        help="No windows or overlays: capture -> detect -> track -> count -> publish")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="Stop after this many seconds and print the throughput report")
+    parser.add_argument("--adaptive-cadence", action="store_true",
+                        help="Skip detection on low-motion frames and track with Kalman prediction only")
+    parser.add_argument("--detect-every", type=int, default=None, metavar="N",
+                        help="Run YOLO every N frames and Kalman-predict in between "
+                             "(the starting interval with --adaptive-cadence; default 1)")
+    return parser.parse_args()
+
+def cadence_overrides(args):
+    """Cadence options passed on the command line (defaults: yolomodule.CADENCE_CONFIG)"""
+    # Only explicit options, so process mode never imports yolomodule here
+    overrides = {}
+    if args.detect_every is not None:
+        overrides["detect_every"] = max(1, args.detect_every)
+    if args.adaptive_cadence:
+        overrides["adaptive"] = True
+    return overrides
+
+def print_throughput_report(editors, wall_seconds):
+    """Print per-area and aggregate throughput for hardware sizing"""
+    print("\n" + "="*60)
+    print("📈 THROUGHPUT REPORT")
+    print("="*60)
+    total_frames = 0
+    for editor in editors:
+        stats = editor.throughput()
+        total_frames += stats['frames']
+        print(f"   {editor.area_id:<10} {stats['frames']:>7} frames  {stats['seconds']:>7}s  {stats['fps']:>7} FPS")
+    aggregate_fps = total_frames / wall_seconds if wall_seconds > 0 else 0
+    print(f"   {'TOTAL':<10} {total_frames:>7} frames  {round(wall_seconds, 1):>7}s  {round(aggregate_fps, 2):>7} FPS")
+    print("="*60)
+
 def main():
     """Start all area editors"""
+    global worker_pool, inference_engine, yolomodule
+    
+    args = parse_args()
+    
     print("="*60)
-    print("🎯 CROWDCOUNT MULTI-AREA SYSTEM")
+    print("🎯 CROWDCOUNT MULTI-AREA SYSTEM" + (" (HEADLESS)" if args.headless else ""))
     print("="*60)
-    print("\n🎨 Starting 3 independent zone editors:")
+    print(f"\n🎨 Starting {len(AREAS_CONFIG)} independent {'processors' if args.headless else 'zone editors'}:")
     print("   • Mall Entrance")
     print("   • Retail Area")
     print("   • Food Court")
@@ -531,12 +679,30 @@ def main():
     )
     sync_thread.start()
     
+    # Start background publisher for backend metrics
+    ingest_client.start()
+    
+    # Start detection backend
+    cadence_config = cadence_overrides(args)
+    if DETECTION_MODE == "process":
+        worker_pool = DetectionWorkerPool(
+            PROCESS_AREA_GROUPS,
+            {area_id: config["zone_file"] for area_id, config in AREAS_CONFIG.items()},
+            cadence_config=cadence_config
+        )
+        worker_pool.start()
+    else:
+        import utils.yolomodule as yolomodule
+        yolomodule.week2_configure_cadence(**cadence_config)
+        inference_engine = BatchInferenceEngine(yolomodule.detect_people_batch, max_wait=BATCH_MAX_WAIT)
+        inference_engine.start()
+    
     # Create editors (using local video files)
     editors = []
     threads = []
     
     for area_id, config in AREAS_CONFIG.items():
-        editor = AreaEditor(area_id, config)
+        editor = AreaEditor(area_id, config, headless=args.headless)
         editors.append(editor)
         
         # Start in thread
@@ -549,20 +715,28 @@ def main():
         thread.start()
         
         print(f"✅ Started {config['name']}")
-        time.sleep(0.5)  # Stagger window creation
+        if not args.headless:
+            time.sleep(0.5)  # Stagger window creation
     
-    print("\n" + "="*60)
-    print("🎨 ALL EDITORS RUNNING!")
-    print("="*60)
-    print("\n🖱️  CONTROLS (same for all windows):")
-    print("   R  - Draw Rectangle Zone")
-    print("   N  - Draw Polygon Zone")
-    print("   F  - Finish Polygon")
-    print("   S  - Save Zones")
-    print("   D  - Delete Zone (then press 1-9)")
-    print("   SPACE - Pause/Resume")
-    print("   Q  - Close Window")
-    print("\n" + "="*60 + "\n")
+    started_at = time.time()
+    
+    if args.headless:
+        print("\n" + "="*60)
+        print("🖥️  ALL AREAS RUNNING HEADLESS - Ctrl+C to stop")
+        print("="*60 + "\n")
+    else:
+        print("\n" + "="*60)
+        print("🎨 ALL EDITORS RUNNING!")
+        print("="*60)
+        print("\n🖱️  CONTROLS (same for all windows):")
+        print("   R  - Draw Rectangle Zone")
+        print("   N  - Draw Polygon Zone")
+        print("   F  - Finish Polygon")
+        print("   S  - Save Zones")
+        print("   D  - Delete Zone (then press 1-9)")
+        print("   SPACE - Pause/Resume")
+        print("   Q  - Close Window")
+        print("\n" + "="*60 + "\n")
     
     # Keep main thread alive
     try:
@@ -570,9 +744,34 @@ def main():
             time.sleep(1)
             if not any(t.is_alive() for t in threads):
                 break
+            if args.duration and time.time() - started_at >= args.duration:
+                print(f"\n⏱ Duration of {args.duration}s reached")
+                break
     except KeyboardInterrupt:
         print("\n⏹ Shutting down...")
     
+    # Let area loops finish their current frame before tearing down detection
+    stop_event.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    wall_seconds = time.time() - started_at
+    
+    if worker_pool is not None:
+        print(f"📈 Worker stats: {worker_pool.stats()}")
+        worker_pool.stop()
+        cadence_stats = worker_pool.cadence_stats()
+    else:
+        inference_engine.stop()
+        print(f"📈 Inference stats: {inference_engine.stats()}")
+        cadence_stats = {area_id: yolomodule.week2_cadence_stats(config['zone_file'])
+                         for area_id, config in AREAS_CONFIG.items()}
+    for area_id, stats in cadence_stats.items():
+        print(f"📈 Cadence {area_id}: {stats}")
+    
+    ingest_client.stop()
+    print(f"📈 Ingest stats: {ingest_client.stats()}")
+    
+    print_throughput_report(editors, wall_seconds)
     print("👋 System stopped")
 
 
@@ -0,0 +1,17 @@
+"""
+pytest configuration for the targeted checks in testing/
+
+The other scripts in this folder are manual diagnostics that need a running
+backend or MySQL server, so pytest must not collect them.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+collect_ignore = [
+    "test_api.py",
+    "test_mysql_connection.py",
+    "test_sync_endpoint.py",
+]
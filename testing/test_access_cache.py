@@ -0,0 +1,48 @@
+"""
+Access cache loads racing an invalidation are not stored
+
+Run with: python -m pytest testing/test_access_cache.py
+"""
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+acl = pytest.importorskip("backend.services.acl")
+
+
+class FakeDB:
+    def __init__(self, areas, during_query=None):
+        self.areas = areas
+        self.during_query = during_query
+        self.queries = 0
+
+    def execute_query(self, query, params=None, fetch=False, fetch_one=False):
+        self.queries += 1
+        rows = [{'area_name': name} for name in self.areas]
+        if self.during_query:
+            self.during_query()
+        return rows
+
+
+def test_load_is_cached(monkeypatch):
+    db = FakeDB({"entrance"})
+    monkeypatch.setattr(acl, "get_db", lambda: db)
+    cache = acl.AccessCache()
+
+    assert cache.allowed_areas(3) == {"entrance"}
+    assert cache.allowed_areas(3) == {"entrance"}
+    assert db.queries == 1
+
+
+def test_invalidate_during_load_discards_result(monkeypatch):
+    cache = acl.AccessCache()
+    # The admin edit commits and invalidates after the read saw old rows
+    db = FakeDB({"entrance", "retail"}, during_query=lambda: cache.invalidate(3))
+    monkeypatch.setattr(acl, "get_db", lambda: db)
+
+    assert cache.allowed_areas(3) == {"entrance", "retail"}
+    assert 3 not in cache.entries
+
+    db.areas, db.during_query = {"entrance"}, None
+    assert cache.allowed_areas(3) == {"entrance"}
+    assert db.queries == 2
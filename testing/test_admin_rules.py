@@ -0,0 +1,63 @@
+"""
+Threshold rule payload validation and unknown rule ids
+
+Run with: python -m pytest testing/test_admin_rules.py
+"""
+
+import pytest
+
+pytest.importorskip("flask")
+backend_app = pytest.importorskip("backend.app")
+
+from backend.auth.jwt_utils import generate_token
+from backend.routes import admin as admin_routes
+
+
+class FakeDB:
+    def __init__(self, rule_exists=True):
+        self.rule_exists = rule_exists
+        self.writes = []
+
+    def execute_query(self, query, params=None, fetch=False, fetch_one=False):
+        if query.startswith("SELECT 1 FROM threshold_rules"):
+            return {'1': 1} if self.rule_exists else None
+        if "FROM areas" in query:
+            return {'area_id': 1}
+        if "FROM zones" in query:
+            return {'1': 1}
+        self.writes.append(query)
+        return 1 if self.rule_exists else 0
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(admin_routes, "get_db", lambda: fake)
+    return fake
+
+
+def send(method, path, body=None):
+    token = generate_token(1, "admin@crowdcount.com", "admin", "Admin")
+    return backend_app.app.test_client().open(
+        path, method=method, json=body, headers={"Authorization": f"Bearer {token}"})
+
+
+@pytest.mark.parametrize("field", ["threshold", "clear_threshold", "sustain_seconds", "zone_id"])
+def test_booleans_are_not_integers(db, field):
+    body = {"area": "entrance", "threshold": 10, field: True}
+    response = send("POST", "/api/admin/rules", body)
+    assert response.status_code == 400
+    assert db.writes == []
+
+
+def test_valid_rule_is_created(db):
+    body = {"area": "entrance", "threshold": 10, "clear_threshold": 8, "sustain_seconds": 5}
+    assert send("POST", "/api/admin/rules", body).status_code == 201
+
+
+def test_unknown_rule_is_404(db):
+    db.rule_exists = False
+    body = {"area": "entrance", "threshold": 10}
+    assert send("PUT", "/api/admin/rules/999", body).status_code == 404
+    assert send("DELETE", "/api/admin/rules/999").status_code == 404
+    assert db.writes == ["DELETE FROM threshold_rules WHERE rule_id = %s"]
@@ -0,0 +1,55 @@
+"""
+Admin user listing: literal search and area names containing the old separator
+
+Run with: python -m pytest testing/test_admin_users.py
+"""
+
+import pytest
+
+pytest.importorskip("flask")
+backend_app = pytest.importorskip("backend.app")
+
+from backend.auth.jwt_utils import generate_token
+from backend.routes import admin as admin_routes
+
+
+class FakeDB:
+    def __init__(self):
+        self.queries = []
+
+    def execute_query(self, query, params=None, fetch=False, fetch_one=False):
+        self.queries.append((query, params))
+        if "COUNT(*)" in query:
+            return {'count': 1}
+        if "FROM areas" in query:
+            return [{'area_id': 1, 'area_name': 'Food Court, North'},
+                    {'area_id': 2, 'area_name': 'entrance'}]
+        return [{'user_id': 5, 'name': 'Ann', 'email': 'ann@x.com', 'role': 'user',
+                 'created_at': None, 'area_ids': '2,1'}]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(admin_routes, "get_db", lambda: fake)
+    return fake
+
+
+def get_users(query):
+    token = generate_token(1, "admin@crowdcount.com", "admin", "Admin")
+    return backend_app.app.test_client().get(
+        f"/api/admin/users?{query}", headers={"Authorization": f"Bearer {token}"})
+
+
+def test_search_escapes_like_wildcards(db):
+    response = get_users("q=50%25_off!")
+    assert response.status_code == 200
+
+    count_query, params = db.queries[0]
+    assert "ESCAPE '!'" in count_query
+    assert params == ("%50!%!_off!!%", "%50!%!_off!!%")
+
+
+def test_area_names_with_commas_survive(db):
+    response = get_users("")
+    assert response.get_json()['users'][0]['areas'] == ['entrance', 'Food Court, North']
@@ -0,0 +1,114 @@
+"""
+The alert manager's threshold cache never caches a DB error, and alerts
+that fail to persist re-fire instead of being swallowed
+
+Run with: python -m pytest testing/test_alert_cache.py
+"""
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+from backend.services.alerts import AlertManager
+
+
+class FlakyDB:
+    def __init__(self):
+        self.up = True
+        self.reads = 0
+
+    def execute_query(self, query, params=None, fetch=False, fetch_one=False):
+        self.reads += 1
+        if not self.up:
+            return None
+        if "FROM thresholds" in query:
+            return [{'id': 7, 'global_threshold': 50}]
+        return [{'area_id': 1, 'area_name': 'entrance'}]
+
+
+def test_db_error_is_not_cached_as_no_threshold():
+    manager = AlertManager()
+    db = FlakyDB()
+
+    db.up = False
+    assert manager._load_cache(db) == ((), {})
+    db.up = True
+    assert manager._load_cache(db) == ((50, 7), {'entrance': 1})
+
+
+def test_db_error_keeps_last_good_threshold():
+    manager = AlertManager()
+    db = FlakyDB()
+    manager._load_cache(db)
+
+    manager.cache_loaded_at = 0  # stale
+    db.up = False
+    assert manager._load_cache(db) == ((50, 7), {'entrance': 1})
+
+    reads = db.reads
+    manager._load_cache(db)
+    assert db.reads > reads  # still stale, so it retries
+
+
+class AlertDB(FlakyDB):
+    """Threshold 50 for 'entrance'; transactions fail for the listed area ids"""
+
+    def __init__(self, failing_area_ids=()):
+        super().__init__()
+        self.failing_area_ids = set(failing_area_ids)
+        self.written = []
+
+    def execute_query(self, query, params=None, fetch=False, fetch_one=False):
+        if "threshold_rules" in query:
+            return [{'rule_id': 9, 'area_id': 2, 'area_name': 'retail', 'zone_id': None,
+                     'threshold': 10, 'clear_threshold': None, 'sustain_seconds': 0}]
+        if "FROM areas" in query:
+            return [{'area_id': 1, 'area_name': 'entrance'}, {'area_id': 2, 'area_name': 'retail'}]
+        return super().execute_query(query, params, fetch, fetch_one)
+
+    def execute_transaction(self, statements):
+        rows = statements[0][1]
+        if any(row[0] in self.failing_area_ids for row in rows):
+            return False
+        self.written.extend(rows)
+        return True
+
+
+@pytest.fixture
+def alert_db(monkeypatch):
+    from backend.services import alerts
+
+    db = AlertDB()
+    monkeypatch.setattr(alerts, "get_db", lambda: db)
+    return db
+
+
+def test_failed_write_rearms_cooldown_and_rules(alert_db):
+    from datetime import datetime
+
+    manager = AlertManager()
+    alert_db.failing_area_ids = {1, 2}
+    at = datetime(2026, 3, 14, 12, 0, 0)
+    pending = manager.evaluate('entrance', 60, {}, at) + manager.evaluate('retail', 20, {}, at)
+    assert len(pending) == 2
+    assert manager.persist_alerts(pending) == []
+
+    # Neither the cooldown nor the raised rule swallow the next update
+    alert_db.failing_area_ids = set()
+    at = datetime(2026, 3, 14, 12, 0, 1)
+    pending = manager.evaluate('entrance', 60, {}, at) + manager.evaluate('retail', 20, {}, at)
+    assert len(manager.persist_alerts(pending)) == 2
+
+
+def test_one_bad_alert_does_not_roll_back_the_batch(alert_db):
+    from datetime import datetime
+
+    manager = AlertManager()
+    alert_db.failing_area_ids = {2}
+    at = datetime(2026, 3, 14, 12, 0, 0)
+    pending = manager.evaluate('entrance', 60, {}, at) + manager.evaluate('retail', 20, {}, at)
+
+    written = manager.persist_alerts(pending)
+    assert [p['area'] for p in written] == ['entrance']
+    assert [row[0] for row in alert_db.written] == [1]
+    # The stored alert keeps its cooldown
+    assert manager.evaluate('entrance', 60, {}, datetime(2026, 3, 14, 12, 0, 5)) == []
@@ -0,0 +1,51 @@
+"""
+Detection cadence: audit frames keep the schedule, and the live count
+means the same thing on detection and tracker-only frames
+
+Run with: python -m pytest testing/test_detection_cadence.py
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("ultralytics")
+yolomodule = pytest.importorskip("utils.yolomodule")
+
+
+def test_audit_keeps_schedule():
+    cadence = yolomodule.DetectionCadence(detect_every=4, audit_every=2)
+
+    pattern = []
+    for _ in range(12):
+        detect = cadence.should_detect()
+        audit = cadence.auditing
+        pattern.append("A" if audit else "D" if detect else "-")
+        if detect:
+            cadence.on_detection(0.0)
+        else:
+            cadence.on_skip()
+
+    # Regular detections stay every 4th frame despite the audits in between
+    assert [i for i, p in enumerate(pattern) if p == "D"] == [0, 4, 8]
+    assert "A" in pattern
+
+
+def test_live_count_matches_on_both_paths(tmp_path):
+    zone_file = tmp_path / "zones_cadence.json"
+    zone_file.write_text(json.dumps({"zones": [
+        {"id": 1, "points": [[0, 0], [320, 0], [320, 480], [0, 480]]}
+    ]}))
+    zone_file = str(zone_file)
+
+    # One confident and one low-score person: only the first starts a track
+    detections = np.array([[10, 10, 60, 120, 0.9],
+                           [200, 10, 250, 120, 0.2]], dtype=np.float32)
+    for _ in range(3):
+        detected = yolomodule.week2_count_frame(zone_file, detections)
+    skipped = yolomodule.week2_count_frame(zone_file, None)
+
+    assert detected.live_count == len(detected.track_ids)
+    assert skipped.live_count == len(skipped.track_ids)
+    assert detected.live_count == skipped.live_count
@@ -0,0 +1,91 @@
+"""
+Downsampled history buckets align to local time and reject bad windows
+
+Run with: python -m pytest testing/test_history_buckets.py
+"""
+
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("flask")
+backend_app = pytest.importorskip("backend.app")
+
+from backend.auth.jwt_utils import generate_token
+from backend.services.rollups import bucket_origin, bucket_start
+
+
+@pytest.mark.parametrize("bucket_seconds, expected", [
+    (60, datetime(2026, 3, 14, 17, 42)),
+    (300, datetime(2026, 3, 14, 17, 40)),
+    (3600, datetime(2026, 3, 14, 17, 0)),
+    (6 * 3600, datetime(2026, 3, 14, 12, 0)),
+    (7 * 3600, datetime(2026, 3, 14, 14, 0)),
+    (86400, datetime(2026, 3, 14, 0, 0)),
+])
+def test_bucket_origin_counts_from_local_midnight(bucket_seconds, expected):
+    assert bucket_origin(datetime(2026, 3, 14, 17, 42, 31, 5000), bucket_seconds) == expected
+
+
+@pytest.mark.parametrize("tier, width", [('1m', 60), ('1h', 3600), ('1d', 86400)])
+def test_bucket_origin_matches_rollup_tiers(tier, width):
+    since = datetime(2026, 11, 2, 23, 59, 59)
+    assert bucket_origin(since, width) == bucket_start(since, tier)
+
+
+@pytest.mark.parametrize("query", [
+    "hours=0&points=100",
+    "hours=-3&points=100",
+    "hours=0",
+    "hours=1&points=0",
+    "hours=1&bucket=-60",
+])
+def test_invalid_window_is_400(query):
+    token = generate_token(1, "admin@crowdcount.com", "admin", "Admin")
+    response = backend_app.app.test_client().get(
+        f"/api/history/entrance?{query}", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 400
+
+
+class FakeDB:
+    """Returns one overall and one zone bucket for the bucketed queries"""
+
+    def __init__(self, bucket_value):
+        self.bucket_value = bucket_value
+        self.queries = []
+
+    def execute_query(self, query, params=None, fetch=False, fetch_one=False):
+        self.queries.append((query, params))
+        if "FROM areas" in query:
+            return {'area_id': 1}
+        return [
+            {'bucket': self.bucket_value, 'zone_key': 0, 'avg_count': 4.5, 'max_count': 6, 'min_count': 3},
+            {'bucket': self.bucket_value, 'zone_key': 2, 'avg_count': 1, 'max_count': 1, 'min_count': 1},
+        ]
+
+
+@pytest.mark.parametrize("query, table", [
+    ("hours=1&bucket=30", "FROM historical_counts"),
+    ("hours=1&points=60", "FROM count_rollups"),
+    ("hours=48&points=48", "FROM count_rollups"),
+])
+@pytest.mark.parametrize("bucket_value", [datetime(2026, 3, 14, 17, 0), "2026-03-14 17:00:00"])
+def test_bucketed_history_formats_rows(monkeypatch, query, table, bucket_value):
+    from backend.routes import history as history_routes
+
+    db = FakeDB(bucket_value)
+    monkeypatch.setattr(history_routes, "get_db", lambda: db)
+    token = generate_token(1, "admin@crowdcount.com", "admin", "Admin")
+    response = backend_app.app.test_client().get(
+        f"/api/history/entrance?{query}&zones=1", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['history'] == [{'recorded_at': '2026-03-14T17:00:00', 'avg_count': 4.5,
+                                'total_count': 4.5, 'max_count': 6, 'min_count': 3}]
+    assert list(data['zones']) == ['2']
+
+    bucket_query, params = db.queries[-1]
+    assert table in bucket_query
+    assert "DATE_ADD(CAST(%s AS DATETIME)" in bucket_query
+    assert params[0] == params[1] and params[0].microsecond == 0
@@ -0,0 +1,178 @@
+"""
+Validation of the batched POST /ingest endpoint
+
+Run with: python -m pytest testing/test_ingest.py
+"""
+
+import gzip
+import json
+import time
+
+import pytest
+
+pytest.importorskip("flask")
+backend_app = pytest.importorskip("backend.app")
+
+
+@pytest.fixture
+def applied(monkeypatch):
+    """Capture accepted samples instead of touching live state"""
+    calls = []
+    monkeypatch.setattr(backend_app, "update_area_state",
+                        lambda area, live, zones, timestamp=None: calls.append((area, live, zones)))
+    return calls
+
+
+NOW = time.time() + 60
+
+
+@pytest.fixture
+def historical(monkeypatch):
+    """Capture samples filed as history"""
+    calls = []
+    monkeypatch.setattr(backend_app, "MILESTONE4_ENABLED", True)
+    monkeypatch.setattr(backend_app, "record_historical", calls.extend, raising=False)
+    return calls
+
+
+@pytest.fixture
+def client():
+    return backend_app.app.test_client()
+
+
+@pytest.mark.parametrize("body", [
+    [["entrance", 1.0, 3, {}]],
+    {"samples": "entrance"},
+    {"data": []},
+])
+def test_malformed_body_is_400(client, applied, body):
+    response = client.post("/ingest", json=body)
+    assert response.status_code == 400
+    assert applied == []
+
+
+def test_invalid_json_and_gzip_are_400(client, applied):
+    assert client.post("/ingest", data=b"{not json").status_code == 400
+    assert client.post("/ingest", data=b"plain",
+                       headers={"Content-Encoding": "gzip"}).status_code == 400
+
+
+def test_bad_samples_are_skipped_and_reported(client, applied, historical):
+    samples = [
+        ["entrance", NOW, 4, {"1": 3}],
+        ["entrance", NOW, 4, [1, 2]],
+        ["nowhere", NOW, 4, {}],
+        ["retail", "yesterday", 4, {}],
+        ["retail", NOW, -1, {}],
+        ["retail", NOW, 4, {"1": "3"}],
+        ["retail", NOW],
+        "retail",
+        ["foodcourt", NOW + 1, 0, None],
+    ]
+    response = client.post("/ingest", json={"samples": samples})
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["accepted"] == 2
+    assert data["rejected"] == 7
+    assert [e["index"] for e in data["errors"]] == [1, 2, 3, 4, 5, 6, 7]
+    assert applied == [("entrance", 4, {"1": 3}), ("foodcourt", 0, {})]
+
+
+def test_gzip_body(client, applied, historical):
+    body = gzip.compress(json.dumps({"samples": [["retail", NOW, 7, {"2": 7}]]}).encode())
+    response = client.post("/ingest", data=body, headers={"Content-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert applied == [("retail", 7, {"2": 7})]
+
+
+def test_replayed_and_stale_samples_bypass_live_state(client, applied, historical):
+    response = client.post("/ingest", json={"replay": True, "samples": [
+        ["entrance", NOW, 5, {"1": 5}],
+    ]})
+    assert response.get_json()["historical"] == 1
+
+    stale = NOW - 3600 * 24 * 365
+    response = client.post("/ingest", json={"samples": [
+        ["retail", stale, 9, {}],
+        ["retail", NOW, 2, {}],
+    ]})
+    assert response.get_json()["historical"] == 1
+
+    assert applied == [("retail", 2, {})]
+    assert [(area, live) for area, _, live, _ in historical] == [("entrance", 5), ("retail", 9)]
+    assert historical[1][1].timestamp() == pytest.approx(stale)
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+
+    def json(self):
+        return self.body
+
+
+@pytest.mark.parametrize("status, spooled", [(400, 0), (422, 0), (429, 1), (503, 1)])
+def test_client_drops_rejected_batches(tmp_path, monkeypatch, status, spooled):
+    from utils.ingest_client import IngestClient
+
+    ingest_client = IngestClient("http://backend", spool_file=str(tmp_path / "spool.jsonl"))
+    monkeypatch.setattr(ingest_client._session, "post",
+                        lambda *args, **kwargs: FakeResponse(status))
+    ingest_client.submit("entrance", 3, {1: 3})
+    ingest_client._flush()
+
+    assert ingest_client.samples_spooled == spooled
+    assert ingest_client.samples_dropped == 1 - spooled
+
+
+def spooled_client(tmp_path, monkeypatch, status):
+    from utils.ingest_client import IngestClient
+
+    spool_file = tmp_path / "spool.jsonl"
+    spool_file.write_text('["entrance",1.0,3,{}]\n["retail",2.0,4,{}]\n')
+    ingest_client = IngestClient("http://backend", spool_file=str(spool_file))
+    monkeypatch.setattr(ingest_client._session, "post",
+                        lambda *args, **kwargs: FakeResponse(status))
+    return ingest_client
+
+
+def test_replay_counts_only_accepted_samples(tmp_path, monkeypatch):
+    rejected = spooled_client(tmp_path, monkeypatch, 400)
+    assert rejected._replay_spool()
+    assert rejected.samples_replayed == 0 and rejected.samples_dropped == 2
+
+    accepted = spooled_client(tmp_path, monkeypatch, 200)
+    assert accepted._replay_spool()
+    assert accepted.samples_replayed == 2
+
+
+def test_spool_remove_error_does_not_escape(tmp_path, monkeypatch):
+    ingest_client = spooled_client(tmp_path, monkeypatch, 200)
+
+    def fail(path):
+        raise PermissionError(path)
+    monkeypatch.setattr("utils.ingest_client.os.remove", fail)
+
+    assert ingest_client._replay_spool()
+
+
+def test_stop_skips_flush_while_sender_is_busy(monkeypatch):
+    from utils.ingest_client import IngestClient
+
+    class BusyThread:
+        def join(self, timeout=None):
+            pass
+
+        def is_alive(self):
+            return True
+
+    ingest_client = IngestClient("http://backend")
+    ingest_client._thread = BusyThread()
+    flushes = []
+    monkeypatch.setattr(ingest_client, "_flush", lambda: flushes.append(1))
+
+    ingest_client.stop()
+    assert flushes == []
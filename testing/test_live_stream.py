@@ -0,0 +1,101 @@
+"""
+Live stream authentication tickets and per-event area access checks
+
+Run with: python -m pytest testing/test_live_stream.py
+"""
+
+import time
+
+import pytest
+
+pytest.importorskip("flask")
+backend_app = pytest.importorskip("backend.app")
+
+from backend.routes import live as live_routes
+from backend.services.acl import get_access_cache
+from backend.services.broadcaster import get_broadcaster
+from backend.services.stream_tickets import StreamTicketStore, get_stream_tickets
+
+USER = {'user_id': 41, 'role': 'user', 'exp': time.time() + 3600}
+
+
+def test_ticket_is_single_use():
+    tickets = StreamTicketStore(ttl=30)
+    ticket = tickets.issue(USER)
+
+    assert tickets.redeem(ticket) == USER
+    assert tickets.redeem(ticket) is None
+    assert tickets.redeem("made-up") is None
+
+
+def test_ticket_expires():
+    tickets = StreamTicketStore(ttl=-1)
+    assert tickets.redeem(tickets.issue(USER)) is None
+
+
+def test_stream_rejects_missing_or_used_ticket():
+    client = backend_app.app.test_client()
+    assert client.get("/api/live/stream").status_code == 401
+    assert client.get("/api/live/stream?ticket=made-up").status_code == 401
+    assert client.get("/api/live/stream?token=whatever").status_code == 401
+
+
+def read_until(chunks, marker):
+    """Stream chunks up to and including the first one containing marker"""
+    seen = []
+    for chunk in chunks:
+        seen.append(chunk)
+        if marker in chunk:
+            return b"".join(seen)
+    raise AssertionError("stream ended")
+
+
+def test_revoked_area_stops_streaming(monkeypatch):
+    access_cache = get_access_cache()
+    broadcaster = get_broadcaster()
+    monkeypatch.setattr(access_cache, "entries",
+                        {USER['user_id']: (frozenset({"entrance", "retail"}), time.time())})
+    monkeypatch.setattr(broadcaster, "latest", {"foodcourt": {"live_people": 1},
+                                                "retail": {"live_people": 2}})
+    monkeypatch.setattr(live_routes, "STREAM_KEEPALIVE_SECONDS", 0.01)
+
+    client = backend_app.app.test_client()
+    ticket = get_stream_tickets().issue(USER)
+    response = client.get(f"/api/live/stream?ticket={ticket}")
+    assert response.status_code == 200
+    chunks = response.response
+
+    # Snapshot on connect only includes assigned areas
+    seen = read_until(chunks, b"keepalive")
+    assert b'"retail"' in seen and b'"foodcourt"' not in seen
+
+    # Admin unassigns retail: the cache entry is replaced without reconnecting
+    access_cache.entries[USER['user_id']] = (frozenset({"entrance"}), time.time())
+    broadcaster.publish("retail", {"live_people": 3})
+    broadcaster.publish("entrance", {"live_people": 4})
+    seen = read_until(chunks, b'"entrance"')
+    assert b'"retail"' not in seen
+
+    response.close()
+
+
+def test_busy_stream_closes_after_expiry(monkeypatch):
+    user = dict(USER, role='admin', exp=time.time() + 3600)
+    broadcaster = get_broadcaster()
+    monkeypatch.setattr(broadcaster, "latest", {})
+
+    client = backend_app.app.test_client()
+    response = client.get(f"/api/live/stream?ticket={get_stream_tickets().issue(user)}")
+    chunks = response.response
+    assert next(chunks).startswith(b"retry:")
+
+    broadcaster.publish("entrance", {"live_people": 1})
+    assert b'"entrance"' in next(chunks)
+
+    # The token expires while updates keep arriving faster than the keepalive
+    user['exp'] = time.time() - 1
+    broadcaster.publish("entrance", {"live_people": 2})
+    assert next(chunks).startswith(b"event: expired")
+    assert list(chunks) == []
+
+    response.close()
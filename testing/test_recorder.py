@@ -0,0 +1,73 @@
+"""
+Recorder flushes keep an interval's aggregates when the DB is unavailable
+
+Run with: python -m pytest testing/test_recorder.py
+"""
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+recorder_module = pytest.importorskip("backend.services.recorder")
+
+
+class FakeDB:
+    def __init__(self):
+        self.reachable = True
+        self.commit = True
+        self.inserted = []
+
+    def execute_query(self, query, params=None, fetch=False, fetch_one=False):
+        if not self.reachable:
+            return None
+        if "FROM areas" in query:
+            return [{'area_id': 1, 'area_name': 'entrance'}]
+        return [{'area_id': 1, 'zone_id': 7}]
+
+    def execute_transaction(self, statements):
+        if self.commit:
+            self.inserted.extend(statements[0][1])
+        return self.commit
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(recorder_module, "get_db", lambda: fake)
+    return fake
+
+
+@pytest.fixture
+def recorder():
+    state = {'entrance': {'live_people': 0, 'zone_counts': {}}}
+    return recorder_module.HistoricalRecorder(lambda: state, interval=5)
+
+
+def area_row(db):
+    (row,) = [r for r in db.inserted if r[1] is None]
+    return row
+
+
+def test_unreachable_db_keeps_aggregates(db, recorder):
+    recorder.observe('entrance', 4, {7: 1})
+    db.reachable = False
+    recorder._record_snapshot()
+
+    db.reachable = True
+    recorder.observe('entrance', 8, {7: 3})
+    recorder._record_snapshot()
+
+    # area_id, zone_id, last, avg, min, max, samples
+    assert area_row(db)[:7] == (1, None, 8, 6.0, 4, 8, 2)
+
+
+def test_rolled_back_flush_is_merged_into_next(db, recorder):
+    recorder.observe('entrance', 10, {})
+    db.commit = False
+    recorder._record_snapshot()
+
+    db.commit = True
+    recorder.observe('entrance', 2, {})
+    recorder.observe('entrance', 3, {})
+    recorder._record_snapshot()
+
+    assert area_row(db)[:7] == (1, None, 3, 5.0, 2, 10, 3)
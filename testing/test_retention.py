@@ -0,0 +1,55 @@
+"""
+Retention deletes raw rows and their counter update in one transaction
+
+Run with: python -m pytest testing/test_retention.py
+"""
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+retention = pytest.importorskip("backend.services.retention")
+
+
+class FakeDB:
+    def __init__(self, ids, fail_at=None):
+        self.ids = list(ids)
+        self.counter = len(self.ids)
+        self.transactions = 0
+        self.fail_at = fail_at
+
+    def execute_query(self, query, params=None, fetch=False, fetch_one=False):
+        if query.startswith("SELECT id"):
+            return [{'id': i} for i in self.ids[:params[-1]]]
+        return 0  # rollup deletes
+
+    def execute_transaction(self, statements):
+        self.transactions += 1
+        if self.transactions == self.fail_at:
+            return False
+        (delete, [ids]), (counter_query, [(name, delta)]) = statements
+        assert delete.startswith("DELETE FROM historical_counts WHERE id IN")
+        assert name == 'historical_counts'
+        self.ids = [i for i in self.ids if i not in ids]
+        self.counter += delta
+        return True
+
+
+def test_chunks_keep_counter_in_sync(monkeypatch):
+    db = FakeDB(range(12))
+    monkeypatch.setattr(retention, "get_db", lambda: db)
+
+    deleted = retention.RetentionManager(chunk_size=5).run_once()
+
+    assert deleted['historical_counts'] == 12
+    assert db.transactions == 3
+    assert db.ids == [] and db.counter == 0
+
+
+def test_failed_chunk_leaves_counter_untouched(monkeypatch):
+    db = FakeDB(range(12), fail_at=2)
+    monkeypatch.setattr(retention, "get_db", lambda: db)
+
+    deleted = retention.RetentionManager(chunk_size=5).run_once()
+
+    assert deleted['historical_counts'] == 5
+    assert db.counter == len(db.ids) == 7
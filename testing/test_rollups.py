@@ -0,0 +1,25 @@
+"""
+Rollup upsert rows carry the sample time that guards last_count
+
+Run with: python -m pytest testing/test_rollups.py
+"""
+
+from datetime import datetime
+
+from backend.services.rollups import UPSERT_QUERY, rollup_rows
+
+
+def test_rollup_rows_carry_sample_time():
+    observed_at = datetime(2026, 3, 14, 17, 42, 31)
+    params = rollup_rows([(1, None, 8, 6.0, 4, 8, 2, observed_at)])
+
+    assert [p[0] for p in params] == ['1m', '1h', '1d']
+    assert all(p[8] == 8 and p[9] == observed_at for p in params)
+    assert all(len(p) == UPSERT_QUERY.count('%s') for p in params)
+
+
+def test_last_count_is_guarded_by_last_at():
+    update = UPSERT_QUERY.split("ON DUPLICATE KEY UPDATE")[1]
+    assert "VALUES(last_at) >= last_at" in update
+    # last_count must be assigned before last_at moves forward
+    assert update.index("last_count =") < update.index("last_at =")
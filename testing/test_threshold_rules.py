@@ -0,0 +1,56 @@
+"""
+Threshold rule hysteresis, sustain and zone slots in the compiled rules
+
+Run with: python -m pytest testing/test_threshold_rules.py
+"""
+
+from backend.services.rules import AreaRules
+
+
+def rule(rule_id, threshold, clear_threshold=None, sustain_seconds=0, zone_id=None):
+    return {'rule_id': rule_id, 'zone_id': zone_id, 'threshold': threshold,
+            'clear_threshold': clear_threshold, 'sustain_seconds': sustain_seconds}
+
+
+def fired_ids(area_rules, live_count, now, zone_counts=None):
+    fired, _ = area_rules.evaluate(live_count, zone_counts, now)
+    return [int(area_rules.rule_ids[i]) for i in fired]
+
+
+def test_hysteresis_rearms_only_below_clear_threshold():
+    area_rules = AreaRules(1, [rule(10, threshold=50, clear_threshold=40)])
+
+    assert fired_ids(area_rules, 51, 0) == [10]
+    assert fired_ids(area_rules, 55, 1) == []       # already raised
+    assert fired_ids(area_rules, 45, 2) == []       # between clear and threshold: still raised
+    assert fired_ids(area_rules, 51, 3) == []
+    assert fired_ids(area_rules, 40, 4) == []       # cleared
+    assert fired_ids(area_rules, 51, 5) == [10]
+
+
+def test_sustain_requires_continuous_breach():
+    area_rules = AreaRules(1, [rule(11, threshold=10, sustain_seconds=30)])
+
+    assert fired_ids(area_rules, 12, 0) == []
+    assert fired_ids(area_rules, 12, 20) == []
+    assert fired_ids(area_rules, 9, 25) == []       # dip resets the timer
+    assert fired_ids(area_rules, 12, 30) == []
+    assert fired_ids(area_rules, 12, 59) == []
+    assert fired_ids(area_rules, 12, 60) == [11]
+
+
+def test_zone_rules_read_their_zone_count():
+    area_rules = AreaRules(1, [rule(12, threshold=5, zone_id=3), rule(13, threshold=100)])
+
+    assert fired_ids(area_rules, 20, 0, {"3": 4}) == []
+    assert fired_ids(area_rules, 20, 1, {"3": 6}) == [12]
+
+
+def test_recompile_keeps_state_of_unchanged_rules():
+    previous = AreaRules(1, [rule(14, threshold=10, clear_threshold=5)])
+    fired_ids(previous, 11, 0)
+
+    area_rules = AreaRules(1, [rule(14, threshold=10, clear_threshold=5), rule(15, threshold=10)],
+                           previous)
+
+    assert fired_ids(area_rules, 11, 1) == [15]
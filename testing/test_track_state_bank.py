@@ -0,0 +1,157 @@
+"""
+Parity checks for the batched TrackStateBank against a per-track Kalman filter
+
+Run with: python -m pytest testing/test_track_state_bank.py
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("ultralytics")
+yolomodule = pytest.importorskip("utils.yolomodule")
+
+
+class ReferenceKalmanFilter:
+    """Per-track Kalman filter ByteTrack used before TrackStateBank"""
+    def __init__(self):
+        self.mean = np.zeros(7)
+        self.covariance = np.eye(7)
+
+        self.motion_mat = np.eye(7)
+        self.motion_mat[0, 4] = 1
+        self.motion_mat[1, 5] = 1
+        self.motion_mat[2, 6] = 1
+
+        self.update_mat = np.eye(4, 7)
+
+        self.std_weight_position = 1. / 20
+        self.std_weight_velocity = 1. / 160
+
+    def initiate(self, bbox):
+        x1, y1, x2, y2 = bbox
+        cx = (x1 + x2) / 2
+        cy = (y1 + y2) / 2
+        w = x2 - x1
+        h = y2 - y1
+        s = w * h
+        r = w / max(h, 1e-6)
+
+        self.mean = np.array([cx, cy, s, r, 0, 0, 0])
+
+        std = [
+            2 * self.std_weight_position * s ** 0.5,
+            2 * self.std_weight_position * s ** 0.5,
+            1e-2,
+            2 * self.std_weight_position * s ** 0.5,
+            10 * self.std_weight_velocity * s ** 0.5,
+            10 * self.std_weight_velocity * s ** 0.5,
+            1e-5
+        ]
+        self.covariance = np.diag(np.square(std))
+
+    def predict(self):
+        std_pos = [
+            self.std_weight_position * self.mean[2] ** 0.5,
+            self.std_weight_position * self.mean[2] ** 0.5,
+            1e-2,
+            self.std_weight_position * self.mean[2] ** 0.5
+        ]
+        std_vel = [
+            self.std_weight_velocity * self.mean[2] ** 0.5,
+            self.std_weight_velocity * self.mean[2] ** 0.5,
+            1e-5
+        ]
+        motion_cov = np.diag(np.square(np.r_[std_pos, std_vel]))
+
+        self.mean = np.dot(self.motion_mat, self.mean)
+        self.covariance = np.linalg.multi_dot((
+            self.motion_mat, self.covariance, self.motion_mat.T)) + motion_cov
+
+    def update(self, bbox):
+        x1, y1, x2, y2 = bbox
+        cx = (x1 + x2) / 2
+        cy = (y1 + y2) / 2
+        w = x2 - x1
+        h = y2 - y1
+        s = w * h
+        r = w / max(h, 1e-6)
+
+        measurement = np.array([cx, cy, s, r])
+
+        std = [
+            self.std_weight_position * self.mean[2] ** 0.5,
+            self.std_weight_position * self.mean[2] ** 0.5,
+            1e-1,
+            self.std_weight_position * self.mean[2] ** 0.5
+        ]
+        innovation_cov = np.diag(np.square(std))
+
+        projected_mean = np.dot(self.update_mat, self.mean)
+        projected_cov = np.linalg.multi_dot((
+            self.update_mat, self.covariance, self.update_mat.T)) + innovation_cov
+
+        kalman_gain = np.linalg.multi_dot((
+            self.covariance, self.update_mat.T, np.linalg.inv(projected_cov)))
+
+        innovation = measurement - projected_mean
+        self.mean = self.mean + np.dot(kalman_gain, innovation)
+        self.covariance = self.covariance - np.linalg.multi_dot((
+            kalman_gain, self.update_mat, self.covariance))
+
+    def get_bbox(self):
+        cx, cy, s, r = self.mean[:4]
+        w = (s * r) ** 0.5
+        h = s / max(w, 1e-6)
+        x1 = cx - w / 2
+        y1 = cy - h / 2
+        x2 = cx + w / 2
+        y2 = cy + h / 2
+        return [int(x1), int(y1), int(x2), int(y2)]
+
+
+def random_boxes(rng, n):
+    xy = rng.uniform(0, 600, (n, 2))
+    wh = rng.uniform(20, 120, (n, 2))
+    return np.hstack([xy, xy + wh])
+
+
+def test_bank_matches_per_track_filters():
+    rng = np.random.default_rng(0)
+    boxes = random_boxes(rng, 8)
+
+    bank = yolomodule.TrackStateBank()
+    bank.add(boxes)
+    filters = []
+    for box in boxes:
+        kf = ReferenceKalmanFilter()
+        kf.initiate(box)
+        filters.append(kf)
+
+    for step in range(20):
+        bank.predict()
+        for kf in filters:
+            kf.predict()
+
+        # Correct a random subset of tracks with drifted boxes
+        indices = sorted(rng.choice(len(filters), size=5, replace=False))
+        measured = [filters[i].get_bbox() for i in indices]
+        measured = np.asarray(measured, dtype=np.float64) + rng.uniform(-4, 4, (5, 4))
+        bank.update(indices, measured)
+        for i, box in zip(indices, measured):
+            filters[i].update(box)
+
+        for i, kf in enumerate(filters):
+            np.testing.assert_allclose(bank.means[i], kf.mean, rtol=1e-7, atol=1e-6)
+            np.testing.assert_allclose(bank.covariances[i], kf.covariance, rtol=1e-6, atol=1e-6)
+
+
+def test_keep_drops_rows_in_track_order():
+    rng = np.random.default_rng(1)
+    boxes = random_boxes(rng, 4)
+    bank = yolomodule.TrackStateBank()
+    bank.add(boxes)
+
+    bank.keep([True, False, True, False])
+
+    assert len(bank.means) == 2
+    np.testing.assert_allclose(bank.get_bboxes(), boxes[[0, 2]], atol=1e-6)
@@ -0,0 +1,94 @@
+"""
+Parity checks for the vectorized IoU and LAP assignment in ByteTrack
+
+Run with: python -m pytest testing/test_tracker_matching.py
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("ultralytics")
+yolomodule = pytest.importorskip("utils.yolomodule")
+
+
+def reference_iou(bbox1, bbox2):
+    """Scalar IoU as ByteTrack computed it before bbox_iou_matrix"""
+    x1_1, y1_1, x2_1, y2_1 = bbox1
+    x1_2, y1_2, x2_2, y2_2 = bbox2
+
+    x1_i = max(x1_1, x1_2)
+    y1_i = max(y1_1, y1_2)
+    x2_i = min(x2_1, x2_2)
+    y2_i = min(y2_1, y2_2)
+
+    if x2_i < x1_i or y2_i < y1_i:
+        return 0.0
+
+    intersection = (x2_i - x1_i) * (y2_i - y1_i)
+    area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
+    area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
+    union = area1 + area2 - intersection
+
+    return intersection / max(union, 1e-6)
+
+
+def random_boxes(rng, n, size=640):
+    xy = rng.uniform(0, size, (n, 2))
+    wh = rng.uniform(10, 120, (n, 2))
+    return np.hstack([xy, xy + wh])
+
+
+def test_iou_matrix_matches_scalar_iou():
+    rng = np.random.default_rng(0)
+    tracks, dets = random_boxes(rng, 40), random_boxes(rng, 35)
+
+    matrix = yolomodule.bbox_iou_matrix(tracks, dets)
+    expected = np.array([[reference_iou(t, d) for d in dets] for t in tracks])
+
+    np.testing.assert_allclose(matrix, expected, atol=1e-9)
+
+
+def jittered_scene(rng, n):
+    """Tracks and detections that are small shifts of each other (unambiguous)"""
+    xy = np.stack([np.arange(n) * 150.0, np.zeros(n)], axis=1)
+    tracks = np.hstack([xy, xy + 100])
+    dets = tracks + rng.uniform(-5, 5, tracks.shape)
+    order = rng.permutation(n)
+    return tracks, dets[order], order
+
+
+@pytest.mark.skipif(not yolomodule.LAP_AVAILABLE, reason="lap is not installed")
+def test_lap_and_greedy_agree_on_unambiguous_scene():
+    rng = np.random.default_rng(1)
+    tracks, dets, order = jittered_scene(rng, 20)
+    tracker = yolomodule.ByteTrack(match_thresh=0.7)
+    iou = yolomodule.bbox_iou_matrix(tracks, dets)
+
+    lap_matches, lap_tracks, lap_dets = tracker._assign_lap(iou)
+    greedy_matches, greedy_tracks, greedy_dets = tracker._assign_greedy(iou)
+
+    assert sorted(lap_matches) == sorted(greedy_matches)
+    assert lap_tracks == greedy_tracks == []
+    assert lap_dets == greedy_dets == []
+    # Detection d was generated from track order[d]
+    assert sorted(lap_matches) == sorted((int(t), d) for d, t in enumerate(order))
+
+
+@pytest.mark.skipif(not yolomodule.LAP_AVAILABLE, reason="lap is not installed")
+def test_lap_total_iou_never_below_greedy():
+    rng = np.random.default_rng(2)
+    tracker = yolomodule.ByteTrack(match_thresh=0.3)
+
+    for _ in range(50):
+        tracks = random_boxes(rng, 15, size=300)
+        dets = random_boxes(rng, 12, size=300)
+        iou = yolomodule.bbox_iou_matrix(tracks, dets)
+
+        lap_matches, _, _ = tracker._assign_lap(iou)
+        greedy_matches, _, _ = tracker._assign_greedy(iou)
+
+        for t, d in lap_matches:
+            assert iou[t, d] >= tracker.match_thresh
+        assert len({d for _, d in lap_matches}) == len(lap_matches)
+        assert (sum(iou[t, d] for t, d in lap_matches)
+                >= sum(iou[t, d] for t, d in greedy_matches) - 1e-9)
@@ -0,0 +1,88 @@
+"""
+Membership parity between the zone raster and per-point pointPolygonTest
+
+Run with: python -m pytest testing/test_zone_raster.py
+"""
+
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("ultralytics")
+yolomodule = pytest.importorskip("utils.yolomodule")
+
+
+def reference_point_in_zone(point, zone):
+    """Per-point test the raster replaces"""
+    pts = np.array(zone["points"], dtype=np.int32)
+    return cv2.pointPolygonTest(pts, (int(point[0]), int(point[1])), False) >= 0
+
+
+def make_tracker(tmp_path, zones):
+    zone_file = tmp_path / "zones_test.json"
+    zone_file.write_text(json.dumps({"zones": zones}))
+    return yolomodule.AreaTracker(str(zone_file))
+
+
+def reference_counts(zones, points):
+    return np.array([sum(reference_point_in_zone(p, z) for p in points) for z in zones])
+
+
+SLANTED_ZONES = [
+    {"id": 1, "points": [[13, 7], [411, 58], [377, 333], [29, 281]]},
+    {"id": 2, "points": [[200, 150], [590, 173], [541, 470], [180, 402], [251, 300]]},
+    {"id": 3, "points": [[60, 300], [140, 220], [333, 479], [99, 455]]},
+]
+
+
+def test_raster_matches_point_polygon_test(tmp_path):
+    rng = np.random.default_rng(0)
+    tracker = make_tracker(tmp_path, SLANTED_ZONES)
+    points = rng.uniform(-10, 620, (20000, 2))
+
+    for zone, total in zip(SLANTED_ZONES, tracker.count_zones_array(points)):
+        inside = [p for p in points if reference_point_in_zone(p, zone)]
+        assert total == len(inside)
+
+
+def test_raster_boundary_pixels_count_as_inside(tmp_path):
+    tracker = make_tracker(tmp_path, SLANTED_ZONES)
+    # Every vertex and every integer point along each edge
+    points = []
+    for zone in SLANTED_ZONES:
+        pts = np.array(zone["points"], dtype=np.float64)
+        for a, b in zip(pts, np.roll(pts, -1, axis=0)):
+            for t in np.linspace(0, 1, 200):
+                points.append(a + (b - a) * t)
+    points = np.array(points)
+
+    expected = reference_counts(SLANTED_ZONES, points)
+    np.testing.assert_array_equal(tracker.count_zones_array(points), expected)
+
+
+def test_many_overlapping_zones_use_wider_words(tmp_path):
+    rng = np.random.default_rng(1)
+    zones = []
+    for k in range(70):
+        x, y = (int(v) for v in rng.integers(0, 300, 2))
+        w, h = (int(v) for v in rng.integers(20, 200, 2))
+        zones.append({"id": k, "points": [[x, y], [x + w, y + 10], [x + w - 5, y + h], [x, y + h - 7]]})
+    tracker = make_tracker(tmp_path, zones)
+    points = rng.uniform(0, 520, (3000, 2))
+
+    assert tracker.zone_raster.shape[2] == 2  # 70 zones -> two uint64 words
+    np.testing.assert_array_equal(tracker.count_zones_array(points),
+                                  reference_counts(zones, points))
+
+
+def test_downsampled_raster_uses_top_left_pixel_of_each_cell(tmp_path):
+    rng = np.random.default_rng(2)
+    tracker = make_tracker(tmp_path, SLANTED_ZONES)
+    tracker.build_zone_raster(downsample=2)
+    points = rng.uniform(0, 600, (5000, 2))
+
+    snapped = np.floor(points / 2) * 2
+    np.testing.assert_array_equal(tracker.count_zones_array(points),
+                                  reference_counts(SLANTED_ZONES, snapped))
@@ -6,9 +6,15 @@ Contains camera-related helpers:
 - open_camera(source)
 - get_camera_frame(cap)
 - release_camera(cap)
+- FrameSource: background decode thread + bounded ring buffer
 - simple helper to probe available indices
 """
 
+import os
+import threading
+import time
+from collections import deque
+
 import cv2
 
 
@@ -52,6 +58,151 @@ def release_camera(cap):
         pass
 
 
+class FrameSource:
+    """Video source decoded on a background thread into a bounded buffer.
+
+    Decoding overlaps with inference instead of adding to it. Two policies:
+    - "drop_oldest": live sources; when the buffer is full the oldest frame
+      is discarded so consumers always see recent frames.
+    - "lossless": file replay; the reader waits for space, so every frame
+      is delivered in order.
+
+    Files loop by default; rewinding happens on the reader thread.
+    """
+
+    DROP_OLDEST = "drop_oldest"
+    LOSSLESS = "lossless"
+
+    def __init__(self, source=0, policy=None, buffer_size=4, loop=None,
+                 width=None, height=None):
+        """
+        Args:
+            source: camera index, URL or video file path
+            policy: DROP_OLDEST or LOSSLESS (default: lossless for files)
+            buffer_size: max decoded frames held in the ring buffer
+            loop: rewind files at end of stream (default: True for files)
+            width/height: optional capture size hints
+        """
+        is_file = isinstance(source, str) and os.path.isfile(source)
+        self.source = source
+        self.policy = policy or (self.LOSSLESS if is_file else self.DROP_OLDEST)
+        self.loop = is_file if loop is None else loop
+        self.buffer_size = max(1, int(buffer_size))
+        self.width = width
+        self.height = height
+
+        self.cap = None
+        self._buffer = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self.running = False
+        self.finished = False
+
+        # Stats
+        self.frames_decoded = 0
+        self.frames_dropped = 0
+        self._decode_times = deque(maxlen=30)
+
+    def start(self):
+        """Open the source and start the reader thread. Returns True if opened."""
+        self.cap = open_camera(self.source, self.width, self.height)
+        if self.cap is None or not self.cap.isOpened():
+            release_camera(self.cap)
+            self.cap = None
+            return False
+
+        self.running = True
+        self.finished = False
+        self._thread = threading.Thread(
+            target=self._reader_loop,
+            daemon=True,
+            name=f"FrameSource-{self.source}"
+        )
+        self._thread.start()
+        return True
+
+    def _reader_loop(self):
+        """Decode frames into the buffer until stopped or the stream ends"""
+        failures = 0
+        while self.running:
+            ret, frame = get_camera_frame(self.cap)
+            if not ret or frame is None:
+                if not self.loop:
+                    break
+                # End of file - rewind here so the consumer never stalls
+                failures += 1
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                if failures > 3:
+                    time.sleep(0.1)  # Source is failing, not just ending
+                continue
+            failures = 0
+
+            with self._cond:
+                if self.policy == self.LOSSLESS:
+                    while self.running and len(self._buffer) >= self.buffer_size:
+                        self._cond.wait(0.5)
+                    if not self.running:
+                        break
+                elif len(self._buffer) >= self.buffer_size:
+                    self._buffer.popleft()
+                    self.frames_dropped += 1
+
+                self._buffer.append(frame)
+                self.frames_decoded += 1
+                self._decode_times.append(time.time())
+                self._cond.notify_all()
+
+        with self._cond:
+            self.finished = True
+            self._cond.notify_all()
+
+    def read(self, timeout=1.0):
+        """Return (ret, frame) for the next buffered frame.
+
+        Returns (False, None) on timeout or once the stream has ended and
+        the buffer is drained.
+        """
+        with self._cond:
+            deadline = time.time() + timeout if timeout is not None else None
+            while not self._buffer and self.running and not self.finished:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False, None
+                self._cond.wait(remaining)
+
+            if not self._buffer:
+                return False, None
+            frame = self._buffer.popleft()
+            self._cond.notify_all()
+            return True, frame
+
+    def stats(self):
+        """Per-source decode FPS, queue depth and drop count"""
+        with self._cond:
+            times = list(self._decode_times)
+            depth = len(self._buffer)
+        decode_fps = 0.0
+        if len(times) > 1 and times[-1] > times[0]:
+            decode_fps = (len(times) - 1) / (times[-1] - times[0])
+        return {
+            'decode_fps': round(decode_fps, 1),
+            'queue_depth': depth,
+            'frames_decoded': self.frames_decoded,
+            'frames_dropped': self.frames_dropped,
+            'policy': self.policy
+        }
+
+    def release(self):
+        """Stop the reader thread and release the capture"""
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=2)
+        release_camera(self.cap)
+        self.cap = None
+
+
 def probe_camera_indices(max_index=5):
     """Quick helper to test which local camera indices open.
 
@@ -0,0 +1,315 @@
+"""
+detection_workers.py
+
+Process-pool detection so areas scale across CPU cores.
+
+Each worker process owns one group of areas and runs detect_people,
+ByteTrack.update and zone counting for them with its own YOLO model.
+The coordinator (main.py) copies each frame into one of two per-area shared
+memory slots and only the small FrameResult (track / count arrays) travels
+back over a queue. A slot is reused only after the worker has answered for
+the frame in it, so a frame that timed out is never overwritten while the
+worker may still be reading it.
+
+Usage:
+    pool = DetectionWorkerPool([["entrance"], ["retail", "foodcourt"]],
+                               {"entrance": "zones/zones_entrance.json", ...})
+    pool.start()
+    result = pool.process("entrance", frame)
+"""
+
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Shared memory frame buffers per area
+FRAME_SLOTS = 2
+
+
+def _worker_main(worker_index, zone_files, request_queue, response_queues, control_queue,
+                 cadence_config=None):
+    """Worker process entry point.
+
+    Imports the YOLO module lazily so the model is loaded once per worker
+    and never in the coordinator on behalf of a worker, then reports
+    'ready' on control_queue so start() can wait for the model load.
+    """
+    try:
+        from utils.yolomodule import (detect_people, week2_count_frame, week2_reload_zones,
+                                      week2_should_detect, week2_configure_cadence,
+                                      week2_cadence_stats)
+
+        if cadence_config:
+            week2_configure_cadence(**cadence_config)
+    except Exception as e:
+        control_queue.put(('failed', worker_index, str(e)))
+        return
+
+    control_queue.put(('ready', worker_index, None))
+
+    attached = {}  # (area_id, slot) -> SharedMemory currently mapped there
+
+    try:
+        while True:
+            msg = request_queue.get()
+            if msg is None:
+                break
+
+            kind, area_id = msg[0], msg[1]
+            zone_file = zone_files[area_id]
+
+            if kind == 'reload':
+                week2_reload_zones(zone_file)
+                continue
+
+            _, _, seq, slot, shm_name, shape, dtype = msg
+            try:
+                shm = attached.get((area_id, slot))
+                if shm is None or shm.name != shm_name:
+                    # The coordinator reallocated this slot's buffer
+                    if shm is not None:
+                        shm.close()
+                    shm = shared_memory.SharedMemory(name=shm_name)
+                    attached[(area_id, slot)] = shm
+                frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+                detections = None
+                detect_seconds = None
+                if week2_should_detect(zone_file):
+                    start = time.time()
+                    detections = detect_people(frame)
+                    detect_seconds = time.time() - start
+                result = week2_count_frame(zone_file, detections, detect_seconds)
+                response_queues[area_id].put((seq, 'ok', result))
+            except Exception as e:
+                response_queues[area_id].put((seq, 'error', str(e)))
+    finally:
+        # Hand cadence stats to the coordinator for its report
+        control_queue.put(('stats', worker_index, {
+            area_id: week2_cadence_stats(zone_file)
+            for area_id, zone_file in zone_files.items()
+        }))
+        for shm in attached.values():
+            shm.close()
+
+
+class DetectionWorkerPool:
+    """Runs detection + tracking for groups of areas in worker processes"""
+
+    def __init__(self, area_groups, zone_files, timeout=10.0, cadence_config=None,
+                 startup_timeout=180.0):
+        """
+        Args:
+            area_groups: list of lists of area ids; one worker per group
+            zone_files: dict area_id -> zone file path
+            timeout: seconds to wait for a worker result
+            cadence_config: optional detection cadence settings for workers
+            startup_timeout: seconds to wait for workers to load the model
+        """
+        self.area_groups = [list(group) for group in area_groups]
+        self.zone_files = dict(zone_files)
+        self.timeout = timeout
+        self.cadence_config = cadence_config
+        self.startup_timeout = startup_timeout
+
+        self._ctx = mp.get_context('spawn')
+        self._processes = []
+        self._control_queue = None  # worker -> coordinator status messages
+        self._request_queues = {}   # area_id -> worker request queue
+        self._response_queues = {}  # area_id -> result queue
+        self._shm = {}              # (area_id, slot) -> SharedMemory
+        self._in_flight = {}        # area_id -> per slot, seq of the unanswered frame in it (or None)
+        self._seq = {}              # area_id -> id of the last frame sent
+        self._stats = {}            # area_id -> [frames, seconds]
+        self._cadence_stats = {}    # area_id -> cadence stats sent by its worker on stop
+        self.running = False
+
+    def start(self):
+        """Spawn one worker process per area group and wait until all are ready"""
+        if self.running:
+            return
+
+        self._control_queue = self._ctx.Queue()
+        for group in self.area_groups:
+            for area_id in group:
+                self._response_queues[area_id] = self._ctx.Queue()
+
+        for i, group in enumerate(self.area_groups):
+            request_queue = self._ctx.Queue()
+            zone_files = {area_id: self.zone_files[area_id] for area_id in group}
+            responses = {area_id: self._response_queues[area_id] for area_id in group}
+
+            process = self._ctx.Process(
+                target=_worker_main,
+                args=(i, zone_files, request_queue, responses, self._control_queue,
+                      self.cadence_config),
+                daemon=True,
+                name=f"DetectionWorker-{i}"
+            )
+            process.start()
+            self._processes.append((process, request_queue))
+
+            for area_id in group:
+                self._request_queues[area_id] = request_queue
+                self._seq[area_id] = 0
+                self._in_flight[area_id] = [None] * FRAME_SLOTS
+                self._stats[area_id] = [0, 0.0]
+
+        self.running = True
+        self._wait_ready()
+        print(f"✅ Started {len(self._processes)} detection worker process(es): {self.area_groups}")
+
+    def _wait_ready(self):
+        """Block until every worker has imported YOLO and loaded the model"""
+        pending = set(range(len(self._processes)))
+        deadline = time.time() + self.startup_timeout
+        while pending:
+            try:
+                status, index, error = self._control_queue.get(
+                    timeout=max(deadline - time.time(), 0.1))
+            except queue.Empty:
+                self.stop()
+                raise TimeoutError(f"Detection workers {sorted(pending)} did not start "
+                                   f"within {self.startup_timeout:g}s")
+            if status == 'failed':
+                self.stop()
+                raise RuntimeError(f"Detection worker {index} failed to start: {error}")
+            pending.discard(index)
+
+    def stop(self):
+        """Stop workers and free shared memory"""
+        if not self.running:
+            return
+        self.running = False
+
+        for process, request_queue in self._processes:
+            request_queue.put(None)
+        self._collect_cadence_stats(len(self._processes))
+        for process, _ in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+        for shm in self._shm.values():
+            try:
+                shm.close()
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = {}
+
+    def _collect_cadence_stats(self, workers, timeout=5.0):
+        """Gather the cadence stats each stopping worker sends back"""
+        deadline = time.time() + timeout
+        received = 0
+        while received < workers:
+            try:
+                status, _, payload = self._control_queue.get(
+                    timeout=max(deadline - time.time(), 0.1))
+            except queue.Empty:
+                break
+            if status == 'stats':
+                self._cadence_stats.update(payload)
+                received += 1
+
+    def cadence_stats(self):
+        """Per-area cadence stats reported by the workers (available after stop)"""
+        return dict(self._cadence_stats)
+
+    def _frame_buffer(self, area_id, slot, frame):
+        """Return a shared memory block large enough for frame"""
+        shm = self._shm.get((area_id, slot))
+        if shm is None or shm.size < frame.nbytes:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            shm = shared_memory.SharedMemory(create=True, size=frame.nbytes)
+            self._shm[(area_id, slot)] = shm
+        return shm
+
+    def _free_slot(self, area_id):
+        """Index of a slot the worker is not reading, or None"""
+        in_flight = self._in_flight[area_id]
+        if None not in in_flight:
+            # Collect late answers to timed-out frames without waiting
+            while True:
+                try:
+                    reply_seq, _, _ = self._response_queues[area_id].get_nowait()
+                except queue.Empty:
+                    break
+                self._release(area_id, reply_seq)
+        return in_flight.index(None) if None in in_flight else None
+
+    def _release(self, area_id, seq):
+        """Mark the slot holding frame seq as answered"""
+        in_flight = self._in_flight[area_id]
+        if seq in in_flight:
+            in_flight[in_flight.index(seq)] = None
+
+    def process(self, area_id, frame):
+        """Run detection + tracking for one area frame in its worker.
+
+        Blocks until the worker answers. Each area must be driven by a
+        single thread, since the shared buffers are reused across frames.
+
+        Returns:
+            FrameResult with the area's tracks, zone counts and live count
+        """
+        if not self.running:
+            raise RuntimeError("Detection worker pool is not running")
+
+        start = time.time()
+        slot = self._free_slot(area_id)
+        if slot is None:
+            raise TimeoutError(f"Detection worker for {area_id} is still busy with earlier frames")
+
+        frame = np.ascontiguousarray(frame)
+        shm = self._frame_buffer(area_id, slot, frame)
+        np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)[...] = frame
+
+        self._seq[area_id] += 1
+        seq = self._seq[area_id]
+        self._in_flight[area_id][slot] = seq
+        self._request_queues[area_id].put(
+            ('frame', area_id, seq, slot, shm.name, frame.shape, frame.dtype.str))
+
+        # Late answers to earlier timed-out frames carry an older seq; skip them
+        responses = self._response_queues[area_id]
+        deadline = start + self.timeout
+        while True:
+            try:
+                reply_seq, status, payload = responses.get(
+                    timeout=max(deadline - time.time(), 0))
+            except queue.Empty:
+                # The slot stays in flight until the worker answers
+                raise TimeoutError(f"Detection worker timed out for {area_id}")
+            self._release(area_id, reply_seq)
+            if reply_seq == seq:
+                break
+
+        if status != 'ok':
+            raise RuntimeError(f"Detection worker error for {area_id}: {payload}")
+
+        stats = self._stats[area_id]
+        stats[0] += 1
+        stats[1] += time.time() - start
+        return payload
+
+    def reload(self, area_id):
+        """Ask the owning worker to reload an area's zones"""
+        if self.running and area_id in self._request_queues:
+            self._request_queues[area_id].put(('reload', area_id))
+
+    def stats(self):
+        """Return per-area frame counts and average round-trip latency"""
+        return {
+            area_id: {
+                'frames': frames,
+                'avg_latency_ms': round(seconds / frames * 1000, 1) if frames else 0
+            }
+            for area_id, (frames, seconds) in self._stats.items()
+        }
@@ -0,0 +1,45 @@
+"""
+frame_result.py
+
+Per-frame counting result shared by the detection paths and the display.
+
+Kept free of the YOLO model so a process that only receives results from
+detection workers (and draws them) never has to load it.
+"""
+
+from collections import namedtuple
+
+import cv2
+
+
+class FrameResult(namedtuple('FrameResult', [
+        'track_ids', 'boxes', 'centroids', 'scores', 'zone_ids', 'zone_totals', 'live_count'])):
+    """Structured counting result for one frame (no pixels touched)
+
+    track_ids (N,), boxes (N,4) x1,y1,x2,y2, centroids (N,2), scores (N,)
+    for the visible tracks; zone_ids (K,) and zone_totals (K,) occupancy
+    per zone; live_count is the number of visible tracks.
+    """
+    __slots__ = ()
+
+    @property
+    def zone_counts(self):
+        """Zone occupancy as {zone_id: count} (the backend payload format)"""
+        return {int(zid): int(c) for zid, c in zip(self.zone_ids, self.zone_totals)}
+
+
+def annotate_frame(frame, result):
+    """Draw bounding boxes, IDs and centroids from a FrameResult onto frame"""
+    for tid, box, centroid in zip(result.track_ids, result.boxes, result.centroids):
+        # Draw bounding boxes and IDs
+        x1, y1, x2, y2 = (int(v) for v in box)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 255), 2)
+        cv2.putText(frame, f"ID {tid}", (x1, y1 - 5),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+
+        # Draw centroid
+        cx_int, cy_int = int(centroid[0]), int(centroid[1])
+        cv2.circle(frame, (cx_int, cy_int), 5, (0, 0, 255), -1)
+        cv2.circle(frame, (cx_int, cy_int), 8, (255, 255, 255), 2)
+
+    return frame
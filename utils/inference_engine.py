@@ -0,0 +1,173 @@
+"""
+inference_engine.py
+
+Batched multi-camera YOLO inference.
+
+Every area thread hands its latest frame to a shared BatchInferenceEngine
+instead of taking turns on a global lock. A single worker thread gathers the
+pending frames from all registered areas, runs them through the detector as
+one batch and hands each area back its own detections.
+
+Usage:
+    engine = BatchInferenceEngine(detect_people_batch)
+    engine.start()
+    engine.register("entrance")
+    detections = engine.infer("entrance", frame)
+"""
+
+import threading
+import time
+
+
+class BatchInferenceEngine:
+    """Collects the latest frame per area and runs them as one batch."""
+
+    def __init__(self, detect_batch_fn, max_wait=0.02, max_batch_size=None):
+        """
+        Args:
+            detect_batch_fn: callable(list_of_frames) -> list_of_detections
+            max_wait: seconds to wait for the remaining areas to submit a
+                frame once the first one arrives
+            max_batch_size: optional cap on frames per forward pass
+        """
+        self.detect_batch_fn = detect_batch_fn
+        self.max_wait = max_wait
+        self.max_batch_size = max_batch_size
+
+        self._cond = threading.Condition()
+        self._areas = set()
+        self._pending = {}   # area_id -> latest frame waiting for inference
+        self._results = {}   # area_id -> detections for the last batch
+        self._errors = {}    # area_id -> exception raised by the detector
+        self._running = False
+        self._thread = None
+
+        # Stats
+        self.batches = 0
+        self.frames = 0
+        self.busy_time = 0.0
+
+    def start(self):
+        """Start the batching worker thread"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._loop,
+            daemon=True,
+            name="BatchInferenceEngine"
+        )
+        self._thread.start()
+        print("✅ Batched inference engine started")
+
+    def stop(self):
+        """Stop the worker and release any waiting areas"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def register(self, area_id):
+        """Declare an area that will submit frames"""
+        with self._cond:
+            self._areas.add(area_id)
+
+    def unregister(self, area_id):
+        """Remove an area so batches stop waiting for it"""
+        with self._cond:
+            self._areas.discard(area_id)
+            self._pending.pop(area_id, None)
+            self._cond.notify_all()
+
+    def infer(self, area_id, frame, timeout=None):
+        """Submit a frame for an area and block until its detections are ready.
+
+        If the area already has a frame waiting, it is replaced so only the
+        latest frame per area is ever inferred.
+        """
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("Inference engine is not running")
+            self._areas.add(area_id)
+            self._results.pop(area_id, None)
+            self._errors.pop(area_id, None)
+            self._pending[area_id] = frame
+            self._cond.notify_all()
+
+            deadline = None if timeout is None else time.time() + timeout
+            while area_id not in self._results and area_id not in self._errors:
+                if not self._running:
+                    raise RuntimeError("Inference engine stopped")
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    self._pending.pop(area_id, None)
+                    raise TimeoutError(f"Inference timed out for {area_id}")
+                self._cond.wait(remaining)
+
+            if area_id in self._errors:
+                raise self._errors.pop(area_id)
+            return self._results.pop(area_id)
+
+    def stats(self):
+        """Return aggregate throughput statistics"""
+        with self._cond:
+            return {
+                'batches': self.batches,
+                'frames': self.frames,
+                'avg_batch_size': round(self.frames / self.batches, 2) if self.batches else 0,
+                'busy_seconds': round(self.busy_time, 3),
+                'frames_per_busy_second': round(self.frames / self.busy_time, 2) if self.busy_time else 0
+            }
+
+    def _take_batch(self):
+        """Wait for frames and return [(area_id, frame), ...] to infer"""
+        with self._cond:
+            while self._running and not self._pending:
+                self._cond.wait(0.5)
+            if not self._running:
+                return []
+
+            # Give the other areas a short window to join this batch
+            deadline = time.time() + self.max_wait
+            while self._running and len(self._pending) < len(self._areas):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            area_ids = list(self._pending.keys())
+            if self.max_batch_size:
+                area_ids = area_ids[:self.max_batch_size]
+            return [(area_id, self._pending.pop(area_id)) for area_id in area_ids]
+
+    def _loop(self):
+        """Main batching loop"""
+        while self._running:
+            batch = self._take_batch()
+            if not batch:
+                continue
+
+            area_ids = [area_id for area_id, _ in batch]
+            frames = [frame for _, frame in batch]
+
+            start = time.time()
+            try:
+                detections = self.detect_batch_fn(frames)
+                error = None
+            except Exception as e:
+                print(f"❌ Batched inference error: {e}")
+                detections = None
+                error = e
+            elapsed = time.time() - start
+
+            with self._cond:
+                for i, area_id in enumerate(area_ids):
+                    if error is not None:
+                        self._errors[area_id] = error
+                    else:
+                        self._results[area_id] = detections[i]
+                self.batches += 1
+                self.frames += len(frames)
+                self.busy_time += elapsed
+                self._cond.notify_all()
@@ -0,0 +1,301 @@
+"""
+ingest_client.py
+
+Background publisher for the backend's batched POST /ingest endpoint.
+
+Area loops call submit(), which only records the sample in memory. A sender
+thread flushes the buffered samples as one request over a pooled keep-alive
+requests.Session, so detection never waits on the backend and one HTTP round
+trip carries samples from every camera.
+
+Backpressure: the in-memory buffer holds at most one pending sample per area.
+A newer sample for an area replaces the unsent one (the backend only needs the
+latest state), so memory stays bounded however slow the backend is.
+
+Offline spooling: while the backend is unreachable, flushed samples are
+appended to a local JSONL spool file instead of being dropped. On reconnect
+the spool is replayed in order, oldest first, before live samples. Replayed
+batches are flagged so the backend files them as history instead of
+applying them as live state.
+
+Usage:
+    client = IngestClient("http://127.0.0.1:5000", spool_file="spool/ingest.jsonl")
+    client.start()
+    client.submit("entrance", 12, {1: 4, 2: 8})
+"""
+
+import gzip
+import json
+import os
+import threading
+import time
+
+import requests
+
+# 4xx statuses that mean "try again later" rather than "bad batch"
+RETRYABLE_STATUS = (408, 429)
+
+
+class IngestClient:
+    """Coalesces area samples and ships them to /ingest in batches."""
+
+    def __init__(self, backend_url, flush_interval=1.0, timeout=3.0,
+                 retry_after=10.0, compress_min_bytes=1024,
+                 spool_file=None, max_spool_bytes=50 * 1024 * 1024,
+                 replay_batch_size=500):
+        """
+        Args:
+            backend_url: base URL of the CrowdCount backend
+            flush_interval: seconds between batched sends
+            timeout: HTTP timeout for one batch
+            retry_after: seconds to wait before retrying an unreachable backend
+            compress_min_bytes: gzip bodies at least this large
+            spool_file: JSONL file for samples produced while offline
+                (None disables spooling; offline samples are dropped)
+            max_spool_bytes: stop spooling once the file reaches this size
+            replay_batch_size: samples per request when replaying the spool
+        """
+        self.url = f"{backend_url.rstrip('/')}/ingest"
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.compress_min_bytes = compress_min_bytes
+        self.spool_file = spool_file
+        self.max_spool_bytes = max_spool_bytes
+        self.replay_batch_size = replay_batch_size
+
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        self._latest = {}       # area -> [area, unix_ts, live_people, zone_counts]
+        self._stop = threading.Event()
+        self._thread = None
+        self._retry_at = 0
+        self.backend_available = True
+
+        # Stats
+        self.batches_sent = 0
+        self.samples_sent = 0
+        self.samples_coalesced = 0
+        self.samples_spooled = 0
+        self.samples_replayed = 0
+        self.samples_dropped = 0
+
+    def start(self):
+        """Start the background sender thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop,
+            daemon=True,
+            name="IngestClient"
+        )
+        self._thread.start()
+        print(f"✅ Ingest client started ({self.url})")
+
+    def stop(self):
+        """Flush (or spool) what is buffered and stop the sender"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.timeout + 1)
+            if self._thread.is_alive():
+                # Still mid-send: flushing here too would race it on the
+                # buffer and the spool, so leave the rest to that flush
+                print("⚠️ Ingest sender still busy at shutdown; skipping final flush")
+                return
+        self._flush()
+        self._session.close()
+
+    def submit(self, area, live_people, zone_counts):
+        """Record the latest sample for an area; never blocks on the network"""
+        sample = [area, time.time(), int(live_people),
+                  {str(k): int(v) for k, v in zone_counts.items()}]
+        with self._lock:
+            if area in self._latest:
+                self.samples_coalesced += 1
+            self._latest[area] = sample
+
+    def stats(self):
+        """Return publisher counters"""
+        with self._lock:
+            pending = len(self._latest)
+        return {
+            'backend_available': self.backend_available,
+            'batches_sent': self.batches_sent,
+            'samples_sent': self.samples_sent,
+            'samples_coalesced': self.samples_coalesced,
+            'samples_spooled': self.samples_spooled,
+            'samples_replayed': self.samples_replayed,
+            'samples_dropped': self.samples_dropped,
+            'spool_bytes': self._spool_size(),
+            'pending': pending
+        }
+
+    def _loop(self):
+        """Flush the buffer every flush_interval"""
+        while not self._stop.wait(self.flush_interval):
+            self._flush()
+
+    def _flush(self):
+        """Send buffered samples, replaying any spool first"""
+        with self._lock:
+            samples = list(self._latest.values())
+            self._latest = {}
+
+        # Backend recently unreachable: spool instead of hammering it
+        if time.time() < self._retry_at:
+            self._spool(samples)
+            return
+
+        if not self._replay_spool():
+            self._spool(samples)
+            return
+
+        if samples and not self._send(samples):
+            self._spool(samples)
+
+    def _send(self, samples, replay=False):
+        """POST one batch (replay=True for samples from the spool).
+
+        Returns:
+            True if the batch is finished with (accepted, or rejected as
+            invalid), False if the backend is unreachable and it should be
+            kept for later
+        """
+        payload = {'samples': samples}
+        if replay:
+            payload['replay'] = True
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if len(body) >= self.compress_min_bytes:
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+
+        try:
+            response = self._session.post(self.url, data=body, headers=headers,
+                                          timeout=self.timeout)
+        except requests.RequestException as e:
+            self._mark_unavailable(f"❌ Backend ingest error: {e}")
+            return False
+
+        # Server errors and throttling are transient: keep the batch for later
+        if response.status_code >= 500 or response.status_code in RETRYABLE_STATUS:
+            self._mark_unavailable(f"⚠️ Backend returned status {response.status_code} for ingest batch")
+            return False
+
+        if not self.backend_available:
+            self.backend_available = True
+            print("✅ Backend connection restored")
+
+        if response.status_code == 200:
+            rejected = self._rejected_count(response)
+            self.batches_sent += 1
+            self.samples_sent += len(samples) - rejected
+            self.samples_dropped += rejected
+        else:
+            # Any other 4xx means the batch itself is invalid; resending it
+            # would fail forever and block the spool behind it
+            print(f"⚠️ Backend rejected ingest batch with status {response.status_code}, "
+                  f"dropping {len(samples)} sample(s)")
+            self.samples_dropped += len(samples)
+        return True
+
+    @staticmethod
+    def _rejected_count(response):
+        """Samples the backend skipped as malformed in an accepted batch"""
+        try:
+            rejected = int(response.json().get('rejected', 0))
+        except (ValueError, AttributeError, TypeError):
+            return 0
+        if rejected:
+            print(f"⚠️ Backend rejected {rejected} ingest sample(s)")
+        return rejected
+
+    def _mark_unavailable(self, message):
+        """Back off after a failed send"""
+        if self.backend_available:
+            print(message)
+            print(f"🔄 Retrying backend in {self.retry_after:.0f}s"
+                  + (f", spooling to {self.spool_file}" if self.spool_file else ""))
+        self.backend_available = False
+        self._retry_at = time.time() + self.retry_after
+
+    def _spool_size(self):
+        """Current spool file size in bytes"""
+        if not self.spool_file:
+            return 0
+        try:
+            return os.path.getsize(self.spool_file)
+        except OSError:
+            return 0
+
+    def _spool(self, samples):
+        """Append samples to the spool file (or drop them if disabled/full)"""
+        if not samples:
+            return
+        if not self.spool_file or self._spool_size() >= self.max_spool_bytes:
+            self.samples_dropped += len(samples)
+            return
+
+        try:
+            spool_dir = os.path.dirname(self.spool_file)
+            if spool_dir:
+                os.makedirs(spool_dir, exist_ok=True)
+            with open(self.spool_file, 'a') as f:
+                for sample in samples:
+                    f.write(json.dumps(sample, separators=(',', ':')) + '\n')
+            self.samples_spooled += len(samples)
+        except OSError as e:
+            print(f"❌ Spool write error: {e}")
+            self.samples_dropped += len(samples)
+
+    def _replay_spool(self):
+        """Send spooled samples oldest first.
+
+        Returns:
+            True once the spool is empty, False if the backend went away
+            mid-replay (the unsent remainder is kept in the spool)
+        """
+        if not self._spool_size():
+            return True
+
+        samples = []
+        try:
+            with open(self.spool_file) as f:
+                for line in f:
+                    try:
+                        samples.append(json.loads(line))
+                    except ValueError:
+                        continue  # Torn line from an interrupted write
+        except OSError as e:
+            print(f"❌ Spool read error: {e}")
+            return True
+
+        sent = 0
+        while sent < len(samples):
+            batch = samples[sent:sent + self.replay_batch_size]
+            accepted_before = self.samples_sent
+            if not self._send(batch, replay=True):
+                self._rewrite_spool(samples[sent:])
+                return False
+            sent += len(batch)
+            # Only what the backend accepted counts as replayed
+            self.samples_replayed += self.samples_sent - accepted_before
+
+        try:
+            os.remove(self.spool_file)
+        except OSError as e:
+            print(f"❌ Spool remove error: {e}")
+        print(f"📤 Replayed {sent} spooled samples")
+        return True
+
+    def _rewrite_spool(self, samples):
+        """Replace the spool with the samples still to be sent"""
+        tmp_file = f"{self.spool_file}.tmp"
+        try:
+            with open(tmp_file, 'w') as f:
+                for sample in samples:
+                    f.write(json.dumps(sample, separators=(',', ':')) + '\n')
+            os.replace(tmp_file, self.spool_file)
+        except OSError as e:
+            print(f"❌ Spool write error: {e}")
@@ -10,9 +10,17 @@ import json
 import time
 import math
 import datetime
+import threading
 from ultralytics import YOLO
 import numpy as np
 from collections import defaultdict
+from utils.frame_result import FrameResult, annotate_frame as week2_annotate_frame
+
+try:
+    import lap
+    LAP_AVAILABLE = True
+except ImportError:
+    LAP_AVAILABLE = False
 
 # ================================
 # CONFIG
@@ -22,6 +30,28 @@ IMAGE_FOLDER = "images"
 VIDEO_PATH = "demo_video.mp4"
 MODEL_PATH = "models/yolov8n.pt"
 
+# Detector keeps low-confidence boxes so ByteTrack's second association pass
+# can recover occluded people; only boxes >= TRACK_THRESH start tracks.
+# The live total counts visible tracks.
+DETECTION_CONF = 0.1
+TRACK_THRESH = 0.5
+
+# Zone membership is looked up in a rasterized bitmask instead of running
+# pointPolygonTest per track x zone. 1 = full resolution (exact), 2 = half
+# resolution (each cell takes the membership of its top-left pixel), ...
+ZONE_RASTER_DOWNSAMPLE = 1
+
+# Detection cadence: run YOLO every N frames and only Kalman-predict tracks
+# in between. detect_every=1 with adaptive=False means detect every frame.
+CADENCE_CONFIG = {
+    "detect_every": 1,      # Fixed interval (starting interval when adaptive)
+    "adaptive": False,      # Adapt the interval to scene motion and CPU headroom
+    "max_interval": 5,      # Never skip more than this many frames
+    "target_fps": 15.0,     # Per-area frame rate the CPU budget is sized for
+    "max_drift": 0.5,       # Max predicted drift per interval, in box sizes
+    "audit_every": 50       # Skipped frames between full-rate accuracy audits
+}
+
 # ================================
 # MULTI-AREA STATE MANAGEMENT
 # ================================
@@ -30,9 +60,93 @@ class AreaTracker:
     def __init__(self, zone_file):
         self.zone_file = zone_file
         self.zones = self.load_zones(zone_file)
-        self.tracker = ByteTrack(track_thresh=0.5, track_buffer=30, match_thresh=0.7)
+        self.tracker = ByteTrack(track_thresh=TRACK_THRESH, track_buffer=30, match_thresh=0.7)
         self.zone_counts = {z["id"]: 0 for z in self.zones}
         self.track_zone_memory = {}
+        self.cadence = DetectionCadence(**CADENCE_CONFIG)
+        self.build_zone_raster()
+        
+    def build_zone_raster(self, downsample=ZONE_RASTER_DOWNSAMPLE):
+        """Rasterize zones once into a per-pixel bitmask (bit k = zone k).
+
+        Cell (x, y) holds the zones that contain pixel (x*ds, y*ds) by the
+        same test the per-point lookup used: cv2.pointPolygonTest >= 0 on
+        the int32 vertices, boundary included. fillPoly fills the interior
+        and the cells near an edge, where fill rules differ, are re-checked
+        with pointPolygonTest. The raster only covers the zones' extent;
+        anything outside it is in no zone.
+        """
+        self.raster_downsample = max(1, int(downsample))
+        self.zone_ids = [z["id"] for z in self.zones]
+        
+        polygons = [np.asarray(z.get("points", []), dtype=np.int32).reshape(-1, 2)
+                    for z in self.zones]
+        if not polygons or all(len(p) == 0 for p in polygons):
+            self.zone_raster = None
+            return
+        
+        ds = self.raster_downsample
+        max_x = max(p[:, 0].max() for p in polygons if len(p))
+        max_y = max(p[:, 1].max() for p in polygons if len(p))
+        width = max(1, int(max_x // ds) + 1)
+        height = max(1, int(max_y // ds) + 1)
+        
+        # Smallest unsigned word that holds all zone bits (uint64 words beyond 64)
+        word_bits = next((b for b in (8, 16, 32) if len(self.zones) <= b), 64)
+        word_dtype = np.dtype(f"uint{word_bits}")
+        num_words = (len(self.zones) + word_bits - 1) // word_bits
+        raster = np.zeros((height, width, num_words), dtype=word_dtype)
+        scratch = np.zeros((height, width), dtype=np.uint8)
+        edges = np.zeros((height, width), dtype=np.uint8)
+        
+        # Sub-pixel vertex positions (shift=4) so downsampled cells line up
+        # with their top-left pixel
+        shift = 4
+        for k, pts in enumerate(polygons):
+            if len(pts) < 3:
+                continue
+            scaled = np.round(pts * (1 << shift) / ds).astype(np.int32).reshape((-1, 1, 2))
+            scratch[:] = 0
+            edges[:] = 0
+            cv2.fillPoly(scratch, [scaled], 1, shift=shift)
+            cv2.polylines(edges, [scaled], True, 1, thickness=3, shift=shift)
+            
+            contour = pts.reshape((-1, 1, 2))
+            ys, xs = np.nonzero(edges)
+            for x, y in zip(xs, ys):
+                inside = cv2.pointPolygonTest(contour, (float(x * ds), float(y * ds)), False) >= 0
+                scratch[y, x] = 1 if inside else 0
+            
+            raster[scratch > 0, k // word_bits] |= word_dtype.type(1 << (k % word_bits))
+        
+        self.zone_raster = raster
+        self._zone_word = np.arange(len(self.zones)) // word_bits
+        self._zone_shift = (np.arange(len(self.zones)) % word_bits).astype(word_dtype)
+    
+    def count_zones_array(self, centroids):
+        """Count (N,2) centroids per zone with one fancy-indexing lookup -> (K,)"""
+        totals = np.zeros(len(self.zone_ids), dtype=np.int64)
+        pts = np.asarray(centroids, dtype=np.float64).reshape(-1, 2)
+        if self.zone_raster is None or len(pts) == 0:
+            return totals
+        
+        # Points are truncated to pixels like int() in the per-point test
+        height, width = self.zone_raster.shape[:2]
+        pixels = np.trunc(pts).astype(np.intp)
+        xs = pixels[:, 0] // self.raster_downsample
+        ys = pixels[:, 1] // self.raster_downsample
+        inside = (pixels[:, 0] >= 0) & (xs < width) & (pixels[:, 1] >= 0) & (ys < height)
+        if not inside.any():
+            return totals
+        
+        bits = self.zone_raster[ys[inside], xs[inside]]                 # (N, words)
+        members = (bits[:, self._zone_word] >> self._zone_shift) & 1    # (N, K)
+        return members.sum(axis=0).astype(np.int64)
+    
+    def count_zones(self, centroids):
+        """Count (N,2) centroids per zone -> {zone_id: count}"""
+        totals = self.count_zones_array(centroids)
+        return {zid: int(c) for zid, c in zip(self.zone_ids, totals)}
         
     def load_zones(self, path):
         """Load zones from file"""
@@ -66,35 +180,155 @@ class AreaTracker:
         self.zones = self.load_zones(self.zone_file)
         self.zone_counts = {z["id"]: 0 for z in self.zones}
         self.track_zone_memory = {}
+        self.build_zone_raster()
         print(f"✅ Reloaded {len(self.zones)} zones from {self.zone_file}")
 
 # Global registry of area trackers
 area_trackers = {}
+area_trackers_lock = threading.Lock()
 current_area = None
 
 def get_area_tracker(zone_file):
     """Get or create tracker for specific area"""
     global area_trackers
-    if zone_file not in area_trackers:
-        area_trackers[zone_file] = AreaTracker(zone_file)
-        print(f"🎯 Created new tracker for {zone_file}")
-    return area_trackers[zone_file]
+    with area_trackers_lock:
+        if zone_file not in area_trackers:
+            area_trackers[zone_file] = AreaTracker(zone_file)
+            print(f"🎯 Created new tracker for {zone_file}")
+        return area_trackers[zone_file]
 
 # ================================
-# POINT IN POLYGON
+# DETECTION CADENCE
 # ================================
-def point_in_zone(point, zone):
-    pts = np.array(zone["points"], dtype=np.int32)
-    return cv2.pointPolygonTest(pts, (int(point[0]), int(point[1])), False) >= 0
+class DetectionCadence:
+    """Decides which frames get full detection and which are tracker-only.
+
+    The interval adapts to scene motion (how far tracks move per frame
+    relative to their size) and to CPU headroom (how long detection takes
+    versus the per-frame budget). Every `audit_every` skipped frames one
+    frame that would have been interpolated is detected anyway, and the
+    interpolated counts are compared against it to measure the error.
+    """
+    def __init__(self, detect_every=1, adaptive=False, max_interval=5,
+                 target_fps=15.0, max_drift=0.5, audit_every=50):
+        self.min_interval = max(1, int(detect_every)) if not adaptive else 1
+        self.max_interval = max(self.min_interval, int(max_interval))
+        self.interval = max(1, int(detect_every))
+        self.adaptive = adaptive
+        self.target_fps = target_fps
+        self.max_drift = max_drift
+        self.audit_every = audit_every
+        
+        self.frames_since_detect = self.interval  # Detect the first frame
+        self.skipped_since_audit = 0
+        self.auditing = False
+        
+        # Stats
+        self.frames = 0
+        self.detections = 0
+        self.audits = 0
+        self.count_error_sum = 0.0
+        self.zone_error_sum = 0.0
+    
+    def should_detect(self):
+        """Whether the next frame needs a full detection pass"""
+        if self.frames_since_detect >= self.interval:
+            self.auditing = False
+            return True
+        if self.audit_every and self.skipped_since_audit >= self.audit_every:
+            self.auditing = True
+            return True
+        return False
+    
+    def on_skip(self):
+        """Record a tracker-only frame"""
+        self.frames += 1
+        self.frames_since_detect += 1
+        self.skipped_since_audit += 1
+    
+    def on_audit(self, predicted_live, live, predicted_zones, zones):
+        """Record interpolated vs detected counts for an audited frame"""
+        self.audits += 1
+        self.skipped_since_audit = 0
+        self.count_error_sum += abs(predicted_live - live)
+        if zones:
+            self.zone_error_sum += sum(
+                abs(predicted_zones.get(zid, 0) - c) for zid, c in zones.items()) / len(zones)
+    
+    def on_detection(self, motion, detect_seconds=None):
+        """Record a detection frame and adapt the interval"""
+        self.frames += 1
+        self.detections += 1
+        if self.auditing:
+            # An audit replaces the skipped frame; keep the current schedule
+            self.auditing = False
+            self.frames_since_detect += 1
+            return
+        
+        self.frames_since_detect = 1
+        
+        if not self.adaptive:
+            return
+        
+        if motion <= 1e-6:
+            motion_interval = self.max_interval
+        else:
+            motion_interval = int(self.max_drift / motion)
+        
+        cpu_interval = 1
+        if detect_seconds and self.target_fps:
+            cpu_interval = math.ceil(detect_seconds * self.target_fps)
+        
+        interval = max(cpu_interval, min(motion_interval, self.max_interval))
+        self.interval = int(np.clip(interval, self.min_interval, self.max_interval))
+    
+    def stats(self):
+        """Inference savings and measured error against full-rate detection"""
+        return {
+            'frames': self.frames,
+            'detections': self.detections,
+            'interval': self.interval,
+            'inference_reduction': round(self.frames / self.detections, 2) if self.detections else 0,
+            'audits': self.audits,
+            'mean_abs_count_error': round(self.count_error_sum / self.audits, 3) if self.audits else None,
+            'mean_abs_zone_error': round(self.zone_error_sum / self.audits, 3) if self.audits else None
+        }
+
+# ================================
+# VECTORIZED IOU
+# ================================
+def bbox_iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU between (T,4) and (D,4) x1,y1,x2,y2 boxes -> (T,D)"""
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    
+    return intersection / np.maximum(union, 1e-6)
 
 # ================================
 # BYTETRACK TRACKER
 # ================================
-class KalmanFilter:
-    """Simple Kalman filter for tracking bounding box center and scale."""
+class TrackStateBank:
+    """Kalman state for every track stored as stacked arrays.
+
+    Constant-velocity model over (cx, cy, s, r) plus velocities. Means live
+    in one (N,7) array and covariances in one (N,7,7) array, so predict/update
+    run for all tracks in a single batched matmul/solve. Row i belongs to the
+    i-th track.
+    """
     def __init__(self):
-        self.mean = np.zeros(7)
-        self.covariance = np.eye(7)
+        self.means = np.zeros((0, 7))
+        self.covariances = np.zeros((0, 7, 7))
         
         self.motion_mat = np.eye(7)
         self.motion_mat[0, 4] = 1
@@ -106,94 +340,118 @@ class KalmanFilter:
         self.std_weight_position = 1. / 20
         self.std_weight_velocity = 1. / 160
         
-    def initiate(self, bbox):
-        x1, y1, x2, y2 = bbox
-        cx = (x1 + x2) / 2
-        cy = (y1 + y2) / 2
-        w = x2 - x1
-        h = y2 - y1
-        s = w * h
-        r = w / max(h, 1e-6)
-        
-        self.mean = np.array([cx, cy, s, r, 0, 0, 0])
-        
-        std = [
-            2 * self.std_weight_position * s ** 0.5,
-            2 * self.std_weight_position * s ** 0.5,
-            1e-2,
-            2 * self.std_weight_position * s ** 0.5,
-            10 * self.std_weight_velocity * s ** 0.5,
-            10 * self.std_weight_velocity * s ** 0.5,
-            1e-5
-        ]
-        self.covariance = np.diag(np.square(std))
-        
+        self._diag = np.arange(7)
+        self._diag4 = np.arange(4)
+    
+    def __len__(self):
+        return len(self.means)
+    
+    @staticmethod
+    def _to_measurements(bboxes):
+        """(N,4) x1,y1,x2,y2 boxes -> (N,4) cx,cy,s,r measurements"""
+        b = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        w = b[:, 2] - b[:, 0]
+        h = b[:, 3] - b[:, 1]
+        return np.stack([
+            (b[:, 0] + b[:, 2]) / 2,
+            (b[:, 1] + b[:, 3]) / 2,
+            w * h,
+            w / np.maximum(h, 1e-6)
+        ], axis=1)
+    
+    def add(self, bboxes):
+        """Initiate new tracks from (N,4) boxes, appended as new rows"""
+        z = self._to_measurements(bboxes)
+        if len(z) == 0:
+            return
+        
+        means = np.zeros((len(z), 7))
+        means[:, :4] = z
+        
+        sqrt_s = np.sqrt(np.maximum(z[:, 2], 0))
+        std = np.stack([
+            2 * self.std_weight_position * sqrt_s,
+            2 * self.std_weight_position * sqrt_s,
+            np.full_like(sqrt_s, 1e-2),
+            2 * self.std_weight_position * sqrt_s,
+            10 * self.std_weight_velocity * sqrt_s,
+            10 * self.std_weight_velocity * sqrt_s,
+            np.full_like(sqrt_s, 1e-5)
+        ], axis=1)
+        covariances = np.zeros((len(z), 7, 7))
+        covariances[:, self._diag, self._diag] = np.square(std)
+        
+        self.means = np.concatenate([self.means, means])
+        self.covariances = np.concatenate([self.covariances, covariances])
+    
+    def keep(self, mask):
+        """Drop rows where mask is False (mirrors filtering the track list)"""
+        mask = np.asarray(mask, dtype=bool)
+        self.means = self.means[mask]
+        self.covariances = self.covariances[mask]
+    
     def predict(self):
-        std_pos = [
-            self.std_weight_position * self.mean[2] ** 0.5,
-            self.std_weight_position * self.mean[2] ** 0.5,
-            1e-2,
-            self.std_weight_position * self.mean[2] ** 0.5
-        ]
-        std_vel = [
-            self.std_weight_velocity * self.mean[2] ** 0.5,
-            self.std_weight_velocity * self.mean[2] ** 0.5,
-            1e-5
-        ]
-        motion_cov = np.diag(np.square(np.r_[std_pos, std_vel]))
-        
-        self.mean = np.dot(self.motion_mat, self.mean)
-        self.covariance = np.linalg.multi_dot((
-            self.motion_mat, self.covariance, self.motion_mat.T)) + motion_cov
-            
-    def update(self, bbox):
-        x1, y1, x2, y2 = bbox
-        cx = (x1 + x2) / 2
-        cy = (y1 + y2) / 2
-        w = x2 - x1
-        h = y2 - y1
-        s = w * h
-        r = w / max(h, 1e-6)
-        
-        measurement = np.array([cx, cy, s, r])
-        
-        std = [
-            self.std_weight_position * self.mean[2] ** 0.5,
-            self.std_weight_position * self.mean[2] ** 0.5,
-            1e-1,
-            self.std_weight_position * self.mean[2] ** 0.5
-        ]
-        innovation_cov = np.diag(np.square(std))
-        
-        projected_mean = np.dot(self.update_mat, self.mean)
-        projected_cov = np.linalg.multi_dot((
-            self.update_mat, self.covariance, self.update_mat.T)) + innovation_cov
-            
-        kalman_gain = np.linalg.multi_dot((
-            self.covariance, self.update_mat.T, np.linalg.inv(projected_cov)))
-            
-        innovation = measurement - projected_mean
-        self.mean = self.mean + np.dot(kalman_gain, innovation)
-        self.covariance = self.covariance - np.linalg.multi_dot((
-            kalman_gain, self.update_mat, self.covariance))
-    
-    def get_bbox(self):
-        cx, cy, s, r = self.mean[:4]
-        w = (s * r) ** 0.5
-        h = s / max(w, 1e-6)
-        x1 = cx - w / 2
-        y1 = cy - h / 2
-        x2 = cx + w / 2
-        y2 = cy + h / 2
-        return [int(x1), int(y1), int(x2), int(y2)]
+        """Advance every track by one frame"""
+        if len(self.means) == 0:
+            return
+        
+        sqrt_s = np.sqrt(np.maximum(self.means[:, 2], 0))
+        pos = self.std_weight_position * sqrt_s
+        vel = self.std_weight_velocity * sqrt_s
+        std = np.stack([
+            pos, pos, np.full_like(pos, 1e-2), pos,
+            vel, vel, np.full_like(vel, 1e-5)
+        ], axis=1)
+        
+        self.means = self.means @ self.motion_mat.T
+        self.covariances = np.einsum(
+            'ij,njk,lk->nil', self.motion_mat, self.covariances, self.motion_mat)
+        self.covariances[:, self._diag, self._diag] += np.square(std)
+    
+    def update(self, indices, bboxes):
+        """Correct the tracks at indices with their matched (K,4) boxes"""
+        indices = np.asarray(indices, dtype=np.intp)
+        if len(indices) == 0:
+            return
+        
+        measurements = self._to_measurements(bboxes)
+        mean = self.means[indices]
+        cov = self.covariances[indices]
+        
+        pos = self.std_weight_position * np.sqrt(np.maximum(mean[:, 2], 0))
+        std = np.stack([pos, pos, np.full_like(pos, 1e-1), pos], axis=1)
+        
+        projected_mean = mean @ self.update_mat.T
+        cov_ht = cov @ self.update_mat.T                      # (K,7,4)
+        projected_cov = self.update_mat @ cov_ht              # (K,4,4)
+        projected_cov[:, self._diag4, self._diag4] += np.square(std)
+        
+        # K = P H^T S^-1  ->  solve S K^T = H P  (S is symmetric)
+        kalman_gain = np.linalg.solve(
+            projected_cov, np.swapaxes(cov_ht, 1, 2)).swapaxes(1, 2)  # (K,7,4)
+        
+        innovation = measurements - projected_mean
+        self.means[indices] = mean + np.einsum('nij,nj->ni', kalman_gain, innovation)
+        self.covariances[indices] = cov - kalman_gain @ (self.update_mat @ cov)
+    
+    def get_bboxes(self):
+        """Current (N,4) x1,y1,x2,y2 boxes for every track"""
+        cx, cy, s, r = self.means[:, 0], self.means[:, 1], self.means[:, 2], self.means[:, 3]
+        w = np.sqrt(np.maximum(s * r, 0))
+        h = s / np.maximum(w, 1e-6)
+        return np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
 
 
 class ByteTrack:
     """ByteTrack tracking algorithm."""
-    def __init__(self, track_thresh=0.5, track_buffer=30, match_thresh=0.8):
+    def __init__(self, track_thresh=0.5, track_buffer=30, match_thresh=0.8, use_lap=True):
         self.track_thresh = track_thresh
         self.track_buffer = track_buffer
         self.match_thresh = match_thresh
+        # Linear assignment (LAPJV) when `lap` is installed; the greedy
+        # matcher is kept as a fallback and for parity testing.
+        self.use_lap = use_lap and LAP_AVAILABLE
+        self.state_bank = TrackStateBank()
         self.frame_id = 0
         self.tracks = []
         self.lost_tracks = []
@@ -201,57 +459,73 @@ class ByteTrack:
         self.next_id = 1
         
     def update(self, detections, scores=None):
+        """Advance tracks with one frame of detections.
+
+        detections is an (N,5) x1,y1,x2,y2,score array (as returned by
+        detect_people), or (N,4) boxes with scores passed separately.
+        """
         self.frame_id += 1
         
-        if scores is None:
-            scores = [1.0] * len(detections)
-        
-        high_dets = []
-        low_dets = []
-        for det, score in zip(detections, scores):
-            if score >= self.track_thresh:
-                high_dets.append((det, score))
-            else:
-                low_dets.append((det, score))
-        
-        for track in self.tracks:
-            track['kalman'].predict()
+        dets = np.asarray(detections, dtype=np.float64)
+        if dets.size == 0:
+            dets = np.empty((0, 5))
+        boxes = dets[:, :4]
+        if scores is not None:
+            scores = np.asarray(scores, dtype=np.float64)
+        elif dets.shape[1] >= 5:
+            scores = dets[:, 4]
+        else:
+            scores = np.ones(len(dets))
+        
+        high_mask = scores >= self.track_thresh
+        high_boxes, high_scores = boxes[high_mask], scores[high_mask]
+        low_boxes, low_scores = boxes[~high_mask], scores[~high_mask]
+        
+        # Predict all tracks in one batched step
+        self.state_bank.predict()
+        predicted_boxes = self.state_bank.get_bboxes()
         
         matched, unmatched_tracks, unmatched_dets = self._match(
-            self.tracks, high_dets)
+            predicted_boxes, high_boxes)
+        
+        update_indices = []
+        update_boxes = []
         
         for track_idx, det_idx in matched:
-            det, score = high_dets[det_idx]
-            self.tracks[track_idx]['kalman'].update(det)
+            det, score = high_boxes[det_idx], float(high_scores[det_idx])
+            update_indices.append(track_idx)
+            update_boxes.append(det)
             self.tracks[track_idx]['bbox'] = det
             self.tracks[track_idx]['score'] = score
             self.tracks[track_idx]['age'] += 1
             self.tracks[track_idx]['missed'] = 0
         
-        unmatched_tracks_obj = [self.tracks[i] for i in unmatched_tracks]
         matched2, unmatched_tracks2, unmatched_low = self._match(
-            unmatched_tracks_obj, low_dets)
+            predicted_boxes[unmatched_tracks], low_boxes)
         
         for i, det_idx in matched2:
             track_idx = unmatched_tracks[i]
-            det, score = low_dets[det_idx]
-            self.tracks[track_idx]['kalman'].update(det)
+            det, score = low_boxes[det_idx], float(low_scores[det_idx])
+            update_indices.append(track_idx)
+            update_boxes.append(det)
             self.tracks[track_idx]['bbox'] = det
             self.tracks[track_idx]['score'] = score
             self.tracks[track_idx]['age'] += 1
             self.tracks[track_idx]['missed'] = 0
         
+        # Correct all matched tracks in one batched step
+        self.state_bank.update(update_indices, update_boxes)
+        
         for i in unmatched_tracks2:
             track_idx = unmatched_tracks[i]
             self.tracks[track_idx]['missed'] += 1
         
+        new_boxes = []
         for det_idx in unmatched_dets:
-            det, score = high_dets[det_idx]
-            kf = KalmanFilter()
-            kf.initiate(det)
+            det, score = high_boxes[det_idx], float(high_scores[det_idx])
+            new_boxes.append(det)
             track = {
                 'id': self.next_id,
-                'kalman': kf,
                 'bbox': det,
                 'score': score,
                 'age': 1,
@@ -259,8 +533,11 @@ class ByteTrack:
             }
             self.tracks.append(track)
             self.next_id += 1
+        self.state_bank.add(new_boxes)
         
-        self.tracks = [t for t in self.tracks if t['missed'] < self.track_buffer]
+        keep = [t['missed'] < self.track_buffer for t in self.tracks]
+        self.tracks = [t for t, k in zip(self.tracks, keep) if k]
+        self.state_bank.keep(keep)
         
         output = []
         for track in self.tracks:
@@ -277,21 +554,82 @@ class ByteTrack:
         
         return output
     
-    def _match(self, tracks, detections):
-        if len(tracks) == 0 or len(detections) == 0:
-            return [], list(range(len(tracks))), list(range(len(detections)))
+    def predict_only(self):
+        """Advance tracks one frame without detections (interpolation frame)"""
+        self.frame_id += 1
+        self.state_bank.predict()
+        predicted_boxes = self.state_bank.get_bboxes()
+        
+        output = []
+        for i, track in enumerate(self.tracks):
+            if track['missed'] == 0:
+                bbox = predicted_boxes[i]
+                track['bbox'] = bbox
+                output.append({
+                    'id': track['id'],
+                    'bbox': bbox,
+                    'centroid': ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2),
+                    'score': track['score']
+                })
+        
+        return output
+    
+    def peek_visible_centroids(self):
+        """(N,2) next-frame centroids of visible tracks, without advancing state"""
+        visible = [i for i, t in enumerate(self.tracks) if t['missed'] == 0]
+        means = self.state_bank.means[visible] @ self.state_bank.motion_mat.T
+        return means[:, :2]
+    
+    def motion_level(self):
+        """90th percentile per-frame displacement of visible tracks, in box sizes"""
+        visible = [i for i, t in enumerate(self.tracks) if t['missed'] == 0]
+        if not visible:
+            return 0.0
+        means = self.state_bank.means[visible]
+        speed = np.hypot(means[:, 4], means[:, 5])
+        size = np.sqrt(np.maximum(means[:, 2], 1.0))
+        return float(np.percentile(speed / size, 90))
+    
+    def _match(self, track_boxes, det_boxes):
+        """Match predicted (T,4) track boxes against (D,4) detection boxes"""
+        if len(track_boxes) == 0 or len(det_boxes) == 0:
+            return [], list(range(len(track_boxes))), list(range(len(det_boxes)))
+        
+        iou_matrix = bbox_iou_matrix(track_boxes, det_boxes)
         
-        iou_matrix = np.zeros((len(tracks), len(detections)))
-        for i, track in enumerate(tracks):
-            track_bbox = track['kalman'].get_bbox()
-            for j, (det_bbox, _) in enumerate(detections):
-                iou_matrix[i, j] = self._iou(track_bbox, det_bbox)
+        if self.use_lap:
+            return self._assign_lap(iou_matrix)
+        return self._assign_greedy(iou_matrix)
+    
+    def _assign_lap(self, iou_matrix):
+        """Optimal one-to-one assignment maximizing IoU (LAPJV)"""
+        num_tracks, num_dets = iou_matrix.shape
+        cost_matrix = 1.0 - iou_matrix
+        _, track_to_det, _ = lap.lapjv(
+            cost_matrix, extend_cost=True, cost_limit=1.0 - self.match_thresh)
+        
+        matched_indices = []
+        matched_dets = set()
+        for t, d in enumerate(track_to_det):
+            if d >= 0 and iou_matrix[t, d] >= self.match_thresh:
+                matched_indices.append((t, int(d)))
+                matched_dets.add(int(d))
+        
+        matched_tracks = {t for t, _ in matched_indices}
+        unmatched_tracks = [t for t in range(num_tracks) if t not in matched_tracks]
+        unmatched_dets = [d for d in range(num_dets) if d not in matched_dets]
+        
+        return matched_indices, unmatched_tracks, unmatched_dets
+    
+    def _assign_greedy(self, iou_matrix):
+        """Greedy highest-IoU-first assignment (reference implementation)"""
+        num_tracks, num_dets = iou_matrix.shape
         
         matched_indices = []
         unmatched_tracks = []
-        unmatched_dets = list(range(len(detections)))
+        unmatched_dets = list(range(num_dets))
         
-        track_indices = list(range(len(tracks)))
+        track_indices = list(range(num_tracks))
         while len(track_indices) > 0 and len(unmatched_dets) > 0:
             max_iou = 0
             best_t, best_d = -1, -1
@@ -312,40 +650,38 @@ class ByteTrack:
         
         return matched_indices, unmatched_tracks, unmatched_dets
     
-    def _iou(self, bbox1, bbox2):
-        x1_1, y1_1, x2_1, y2_1 = bbox1
-        x1_2, y1_2, x2_2, y2_2 = bbox2
-        
-        x1_i = max(x1_1, x1_2)
-        y1_i = max(y1_1, y1_2)
-        x2_i = min(x2_1, x2_2)
-        y2_i = min(y2_1, y2_2)
-        
-        if x2_i < x1_i or y2_i < y1_i:
-            return 0.0
-        
-        intersection = (x2_i - x1_i) * (y2_i - y1_i)
-        
-        area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-        area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
-        union = area1 + area2 - intersection
-        
-        return intersection / max(union, 1e-6)
-
 
 # ================================
 # YOLO DETECTOR
 # ================================
 model = YOLO(MODEL_PATH)
 
+def _result_to_detections(r):
+    """Convert one YOLO result to an (N,5) x1,y1,x2,y2,score float array"""
+    boxes = r.boxes
+    if len(boxes) == 0:
+        return np.empty((0, 5), dtype=np.float32)
+    xyxy = boxes.xyxy.cpu().numpy()
+    conf = boxes.conf.cpu().numpy()
+    return np.hstack([xyxy, conf[:, None]]).astype(np.float32, copy=False)
+
 def detect_people(frame):
-    results = model.predict(frame, classes=[0], conf=0.5, imgsz=480, verbose=False)
-    detections = []
-    for r in results:
-        for b in r.boxes:
-            x1, y1, x2, y2 = map(int, b.xyxy[0])
-            detections.append((x1, y1, x2, y2))
-    return detections
+    """Detect people in one frame -> (N,5) array of boxes and scores"""
+    results = model.predict(frame, classes=[0], conf=DETECTION_CONF, imgsz=480, verbose=False)
+    detections = [_result_to_detections(r) for r in results]
+    if not detections:
+        return np.empty((0, 5), dtype=np.float32)
+    return np.concatenate(detections)
+
+def detect_people_batch(frames):
+    """Run one batched forward pass over several frames.
+
+    Returns one (N,5) detection array per input frame, in the same order.
+    """
+    if not frames:
+        return []
+    results = model.predict(list(frames), classes=[0], conf=DETECTION_CONF, imgsz=480, verbose=False)
+    return [_result_to_detections(r) for r in results]
 
 # ================================
 # EXPORTABLE API FOR main.py
@@ -365,54 +701,114 @@ def week2_get_zones():
     tracker = get_area_tracker(current_area)
     return tracker.zones
 
-def week2_reload_zones():
-    """Reload zones from file for current area"""
-    if current_area is None:
+def week2_reload_zones(zone_file=None):
+    """Reload zones from file for current area (or the given zone file)"""
+    zone_file = zone_file or current_area
+    if zone_file is None:
         return
-    tracker = get_area_tracker(current_area)
+    tracker = get_area_tracker(zone_file)
     tracker.reload_zones()
 
-def week2_process_frame(frame):
-    """Process frame with area-specific tracking and counting"""
-    if current_area is None:
-        print("⚠️ No area set! Call week2_set_zone_file() first")
-        return frame, {}, 0
+def week2_configure_cadence(**config):
+    """Update the detection cadence for all current and future areas"""
+    CADENCE_CONFIG.update(config)
+    with area_trackers_lock:
+        for tracker in area_trackers.values():
+            tracker.cadence = DetectionCadence(**CADENCE_CONFIG)
+
+def week2_should_detect(zone_file=None):
+    """Whether the next frame for this area needs a full detection pass"""
+    zone_file = zone_file or current_area
+    if zone_file is None:
+        return True
+    return get_area_tracker(zone_file).cadence.should_detect()
+
+def week2_cadence_stats(zone_file=None):
+    """Inference savings and measured count error for this area"""
+    zone_file = zone_file or current_area
+    if zone_file is None:
+        return {}
+    return get_area_tracker(zone_file).cadence.stats()
+
+def _frame_result(tracker, tracks, live_count):
+    """Pack ByteTrack output into a FrameResult and update zone counts"""
+    n = len(tracks)
+    track_ids = np.fromiter((t['id'] for t in tracks), dtype=np.int64, count=n)
+    boxes = np.array([t['bbox'] for t in tracks], dtype=np.float32).reshape(n, 4)
+    scores = np.fromiter((t['score'] for t in tracks), dtype=np.float32, count=n)
+    centroids = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2,
+                          (boxes[:, 1] + boxes[:, 3]) / 2], axis=1)
     
-    tracker = get_area_tracker(current_area)
+    # Count people currently in each zone (current occupancy)
+    zone_totals = tracker.count_zones_array(centroids)
+    result = FrameResult(track_ids, boxes, centroids, scores,
+                         np.asarray(tracker.zone_ids, dtype=np.int64), zone_totals, live_count)
+    tracker.zone_counts = result.zone_counts
+    return result
+
+def week2_count_frame(zone_file, detections, detect_seconds=None):
+    """Update an area's tracker with detections and count zone occupancy
+
+    Pass detections=None on frames the cadence skipped; tracks are then
+    only moved forward by the Kalman prediction.
+    Returns a FrameResult without touching any frame, so it can run
+    wherever the detections were produced; rendering is a separate stage
+    (week2_annotate_frame) for consumers that actually display frames.
+    """
+    tracker = get_area_tracker(zone_file)
+    cadence = tracker.cadence
+    
+    # The live count is the number of visible tracks (missed == 0) on both
+    # detection and tracker-only frames, so it means the same thing at any
+    # cadence. Tracks only start from confident detections; low-score boxes
+    # just keep existing tracks visible.
+    if detections is None:
+        # Interpolation frame: predicted tracks stand in for detections
+        tracks = tracker.tracker.predict_only()
+        cadence.on_skip()
+        return _frame_result(tracker, tracks, len(tracks))
     
-    # Detect people
-    detections = detect_people(frame)
+    if cadence.auditing:
+        predicted_centroids = tracker.tracker.peek_visible_centroids()
+        predicted_zones = tracker.count_zones(predicted_centroids)
     
     # Update tracker
     tracks = tracker.tracker.update(detections)
+    live_people_count = len(tracks)
     
-    live_people_count = len(detections)
+    result = _frame_result(tracker, tracks, live_people_count)
     
-    # Reset zone counts (current occupancy)
-    tracker.zone_counts = {z["id"]: 0 for z in tracker.zones}
+    if cadence.auditing:
+        cadence.on_audit(len(predicted_centroids), live_people_count,
+                         predicted_zones, tracker.zone_counts)
+    cadence.on_detection(tracker.tracker.motion_level(), detect_seconds)
     
-    # Count people in zones
-    for t in tracks:
-        tid = t["id"]
-        cx, cy = t["centroid"]
-        
-        # Count if person is currently in zone
-        for z in tracker.zones:
-            if point_in_zone((cx, cy), z):
-                tracker.zone_counts[z["id"]] += 1
-        
-        # Draw bounding boxes and IDs
-        x1, y1, x2, y2 = t["bbox"]
-        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 255), 2)
-        cv2.putText(frame, f"ID {tid}", (x1, y1 - 5),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-        
-        # Draw centroid
-        cx_int, cy_int = int(cx), int(cy)
-        cv2.circle(frame, (cx_int, cy_int), 5, (0, 0, 255), -1)
-        cv2.circle(frame, (cx_int, cy_int), 8, (255, 255, 255), 2)
+    return result
+
+def week2_process_frame(frame, zone_file=None, detections=None):
+    """Process frame with area-specific tracking and counting
+
+    Convenience wrapper around week2_count_frame + week2_annotate_frame that
+    draws onto frame in place and returns (frame, zone_counts, live_count).
+    zone_file selects the area explicitly instead of relying on the global
+    current_area. Pass precomputed detections to skip running the detector.
+    """
+    zone_file = zone_file or current_area
+    if zone_file is None:
+        print("⚠️ No area set! Call week2_set_zone_file() first")
+        return frame, {}, 0
+    
+    # Detect people (unless the cadence makes this a tracker-only frame)
+    detect_seconds = None
+    if detections is None and week2_should_detect(zone_file):
+        start = time.time()
+        detections = detect_people(frame)
+        detect_seconds = time.time() - start
+    
+    result = week2_count_frame(zone_file, detections, detect_seconds)
+    week2_annotate_frame(frame, result)
     
-    return frame, tracker.zone_counts, live_people_count
+    return frame, result.zone_counts, result.live_count
 
 def week2_reset_counts():
     """Reset all zone counts for current area"""